@@ -1,146 +1,297 @@
 #!/usr/bin/env python3
 """
 Script pour ajouter des données d'exemple au D-Tracker
-Génère des dépenses réalistes sur les deux dernières années
+Génère des dépenses réalistes (par défaut sur les deux dernières années)
+
+Les lignes sont produites par blocs de jours avec NumPy puis insérées en
+masse : le générateur est reproductible (graine) et permet de créer des
+bases de plusieurs millions de dépenses.
+
+Exemples :
+    python add_sample_data.py
+    python add_sample_data.py --years 10 --rows-per-day 50 --seed 7
+    python add_sample_data.py --target-rows 10000000 --db big.db
 """
 
-import sqlite3
-import random
-from datetime import datetime, timedelta
+import argparse
+import math
+import numpy as np
+from datetime import datetime
+from config.settings import DATABASE_PATH
 from database import ExpenseDatabase
+from storage.query import QuerySpec
+
+# Descriptions réalistes par catégorie
+DESCRIPTIONS = {
+    'Alimentation': [
+        'Déjeuner au restaurant', 'Courses Carrefour', 'Petit-déjeuner café', 
+        'Dîner avec amis', 'Commande Uber Eats', 'Sandwich midi',
+        'Courses bio', 'Restaurant italien', 'Fast-food', 'Épicerie'
+    ],
+    'Nourriture': [
+        'Déjeuner au restaurant', 'Courses Carrefour', 'Petit-déjeuner café', 
+        'Dîner avec amis', 'Commande Uber Eats', 'Sandwich midi',
+        'Courses bio', 'Restaurant italien', 'Fast-food', 'Épicerie'
+    ],
+    'Transport': [
+        'Essence station', 'Ticket métro', 'Parking centre-ville', 
+        'Taxi aéroport', 'Abonnement transport', 'Réparation voiture',
+        'Vignette autoroute', 'Bus urbain', 'Vélo partagé', 'Covoiturage'
+    ],
+    'Logement': [
+        'Loyer mensuel', 'Charges copropriété', 'Électricité', 
+        'Internet/Box', 'Assurance habitation', 'Réparation robinet',
+        'Nettoyage vitres', 'Décoration salon', 'Plomberie', 'Éclairage'
+    ],
+    'Santé': [
+        'Consultation médecin', 'Pharmacie', 'Dentiste', 
+        'Mutuelle santé', 'Optique lunettes', 'Kinésithérapeute',
+        'Médicaments', 'Analyses médicales', 'Podologue', 'Psychologue'
+    ],
+    'Loisirs': [
+        'Cinéma', 'Abonnement Netflix', 'Livre librairie', 
+        'Concert', 'Musée', 'Sport salle', 'Jeu vidéo', 
+        'Théâtre', 'Piscine', 'Bowling'
+    ],
+    'Shopping': [
+        'Vêtements Zara', 'Chaussures', 'Électronique', 
+        'Cosmétiques', 'Bricolage', 'Jouets enfants', 
+        'Accessoires', 'Parfum', 'Montre', 'Sac à main'
+    ],
+    'Éducation': [
+        'Livre technique', 'Formation en ligne', 'Cours particuliers', 
+        'Matériel scolaire', 'Conférence', 'Abonnement revue',
+        'Stage professionnel', 'Certification', 'Manuel université', 'Kit électronique'
+    ],
+    'Autres': [
+        'Cadeau anniversaire', 'Réparation électroménager', 
+        'Dons association', 'Frais bancaires', 'Timbres',
+        'Coiffeur', 'Nettoyage voiture', 'Pet-sitting', 
+        'Déménagement', 'Divers'
+    ]
+}
+
+# Montants minimum et maximum (€) par catégorie
+AMOUNT_PROFILES = {
+    'Alimentation': (5, 50),
+    'Nourriture': (5, 50),
+    'Transport': (10, 80),
+    'Logement': (20, 200),
+    'Santé': (15, 120),
+    'Loisirs': (8, 60),
+    'Shopping': (15, 150),
+    'Éducation': (10, 80),
+    'Autres': (5, 100)
+}
+DEFAULT_AMOUNT_PROFILE = (5, 100)
+
+# Répartition du nombre de dépenses par jour (0 à 4, plus probable d'avoir 1-2)
+DAILY_COUNT_WEIGHTS = [15, 35, 30, 15, 5]
 
-def add_sample_data():
-    """Ajoute des données d'exemple réalistes"""
+# Marge (en écarts-types de la loi de Poisson) pour atteindre un nombre exact de dépenses
+TARGET_ROWS_MARGIN = 5
+
+# Couleurs des catégories créées en plus des catégories existantes
+EXTRA_CATEGORY_COLORS = ['#17becf', '#1f77b4', '#aec7e8', '#ffbb78', '#98df8a', '#ff9896']
+
+def ensure_categories(db, count=None):
+    """
+    Retourne les catégories à utiliser, en créant les catégories manquantes
     
-    # Initialiser la base de données
-    db = ExpenseDatabase()
+    Args:
+        db (ExpenseDatabase): Base de données
+        count (int, optional): Nombre de catégories souhaité (toutes par défaut)
     
-    # Récupérer les catégories
+    Returns:
+        list: Tuples (id, name, color)
+    """
     categories = db.get_categories()
-    category_dict = {cat[1]: cat[0] for cat in categories}
-    
-    # Descriptions réalistes par catégorie
-    descriptions = {
-        'Alimentation': [
-            'Déjeuner au restaurant', 'Courses Carrefour', 'Petit-déjeuner café', 
-            'Dîner avec amis', 'Commande Uber Eats', 'Sandwich midi',
-            'Courses bio', 'Restaurant italien', 'Fast-food', 'Épicerie'
-        ],
-        'Nourriture': [
-            'Déjeuner au restaurant', 'Courses Carrefour', 'Petit-déjeuner café', 
-            'Dîner avec amis', 'Commande Uber Eats', 'Sandwich midi',
-            'Courses bio', 'Restaurant italien', 'Fast-food', 'Épicerie'
-        ],
-        'Transport': [
-            'Essence station', 'Ticket métro', 'Parking centre-ville', 
-            'Taxi aéroport', 'Abonnement transport', 'Réparation voiture',
-            'Vignette autoroute', 'Bus urbain', 'Vélo partagé', 'Covoiturage'
-        ],
-        'Logement': [
-            'Loyer mensuel', 'Charges copropriété', 'Électricité', 
-            'Internet/Box', 'Assurance habitation', 'Réparation robinet',
-            'Nettoyage vitres', 'Décoration salon', 'Plomberie', 'Éclairage'
-        ],
-        'Santé': [
-            'Consultation médecin', 'Pharmacie', 'Dentiste', 
-            'Mutuelle santé', 'Optique lunettes', 'Kinésithérapeute',
-            'Médicaments', 'Analyses médicales', 'Podologue', 'Psychologue'
-        ],
-        'Loisirs': [
-            'Cinéma', 'Abonnement Netflix', 'Livre librairie', 
-            'Concert', 'Musée', 'Sport salle', 'Jeu vidéo', 
-            'Théâtre', 'Piscine', 'Bowling'
-        ],
-        'Shopping': [
-            'Vêtements Zara', 'Chaussures', 'Électronique', 
-            'Cosmétiques', 'Bricolage', 'Jouets enfants', 
-            'Accessoires', 'Parfum', 'Montre', 'Sac à main'
-        ],
-        'Éducation': [
-            'Livre technique', 'Formation en ligne', 'Cours particuliers', 
-            'Matériel scolaire', 'Conférence', 'Abonnement revue',
-            'Stage professionnel', 'Certification', 'Manuel université', 'Kit électronique'
-        ],
-        'Autres': [
-            'Cadeau anniversaire', 'Réparation électroménager', 
-            'Dons association', 'Frais bancaires', 'Timbres',
-            'Coiffeur', 'Nettoyage voiture', 'Pet-sitting', 
-            'Déménagement', 'Divers'
-        ]
-    }
-    
-    # Générer des dépenses sur les deux dernières années (730 jours)
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=730)
-    
-    print("🔄 Génération des données d'exemple sur 2 ans...")
+    if count is None:
+        return categories
     
-    expenses_added = 0
-    total_days = 730
+    index = 1
+    while len(categories) < count:
+        name = f"Catégorie {index}"
+        if name not in {cat[1] for cat in categories}:
+            color = EXTRA_CATEGORY_COLORS[index % len(EXTRA_CATEGORY_COLORS)]
+            db.add_category(name, color)
+            categories = db.get_categories()
+        index += 1
+    return categories[:count]
+
+def expected_rows(target_rows):
+    """
+    Nombre moyen de dépenses à générer pour en obtenir au moins target_rows
+    
+    La marge couvre les fluctuations de la loi de Poisson : la fenêtre produit
+    presque sûrement assez de lignes, max_rows ramenant ensuite au compte exact.
+    
+    Args:
+        target_rows (int): Nombre de dépenses souhaité
+    
+    Returns:
+        float: Nombre moyen de dépenses de la fenêtre
+    """
+    return target_rows + TARGET_ROWS_MARGIN * math.sqrt(target_rows) + 10
+
+def generate_expenses(categories, end_date, days, rows_per_day=None, seed=42,
+                      block_days=365, max_rows=None):
+    """
+    Génère des dépenses par blocs de jours, en remontant le temps depuis end_date
+    
+    Args:
+        categories (list): Tuples (id, name, color) des catégories à utiliser
+        end_date (datetime): Dernier jour généré
+        days (int): Nombre de jours à générer (fenêtre se terminant à end_date)
+        rows_per_day (float, optional): Moyenne de dépenses par jour (loi de Poisson) ;
+            par défaut, répartition DAILY_COUNT_WEIGHTS
+        seed (int): Graine du générateur aléatoire
+        block_days (int): Nombre de jours générés par bloc
+        max_rows (int, optional): Arrêt après ce nombre de dépenses
+    
+    Yields:
+        list: Tuples (amount, description, category_id, date) d'un bloc
+    
+    Raises:
+        ValueError: Si la fenêtre est vide ou remonte avant l'an 1
+    """
+    last_day = np.datetime64(end_date.strftime("%Y-%m-%d"), 'D')
+    if days < 1:
+        raise ValueError("days doit être positif")
+    if last_day - (days - 1) < np.datetime64('0001-01-01'):
+        raise ValueError(f"{days} jours avant le {last_day} remontent avant l'an 1")
+    
+    rng = np.random.default_rng(seed)
+    
+    category_ids = np.array([cat[0] for cat in categories])
+    bounds = np.array([AMOUNT_PROFILES.get(cat[1], DEFAULT_AMOUNT_PROFILE) for cat in categories], dtype=float)
     
-    # Pour chaque jour sur 2 ans
-    for day in range(total_days + 1):  # +1 pour inclure aujourd'hui
-        current_date = start_date + timedelta(days=day)
-        date_str = current_date.strftime("%Y-%m-%d")
+    # Toutes les descriptions dans un seul tableau, repérées par (début, longueur) par catégorie
+    texts = []
+    offsets = []
+    lengths = []
+    for _, name, _ in categories:
+        category_texts = DESCRIPTIONS.get(name, [f"Dépense {name.lower()}"])
+        offsets.append(len(texts))
+        lengths.append(len(category_texts))
+        texts.extend(category_texts)
+    texts = np.array(texts, dtype=object)
+    offsets = np.array(offsets)
+    lengths = np.array(lengths)
+    
+    weights = np.array(DAILY_COUNT_WEIGHTS, dtype=float)
+    weights /= weights.sum()
+    
+    generated = 0
+    block_end = 0  # Nombre de jours déjà générés avant end_date
+    
+    while block_end < days:
+        block_length = min(block_days, days - block_end)
+        first_day = last_day - (block_end + block_length - 1)
+        block_end += block_length
         
-        # Nombre de dépenses par jour (0-4, plus probable d'avoir 1-2)
-        # Réduire légèrement la probabilité d'avoir des dépenses pour certaines dates
-        num_expenses = random.choices([0, 1, 2, 3, 4], weights=[15, 35, 30, 15, 5])[0]
+        # Nombre de dépenses de chaque jour du bloc
+        if rows_per_day is None:
+            counts = rng.choice(len(weights), size=block_length, p=weights)
+        else:
+            counts = rng.poisson(rows_per_day, size=block_length)
+        day_index = np.repeat(np.arange(block_length), counts)
+        size = len(day_index)
+        if max_rows is not None:
+            size = min(size, max_rows - generated)
+            # Les jours les plus récents du bloc sont conservés en priorité
+            day_index = day_index[len(day_index) - size:]
         
-        for _ in range(num_expenses):
-            # Sélectionner une catégorie aléatoire
-            category_name = random.choice(list(category_dict.keys()))
-            category_id = category_dict[category_name]
+        # Un bloc sans dépense n'est pas produit, la fenêtre avance quand même
+        if size > 0:
+            category_index = rng.integers(0, len(categories), size=size)
+            low = bounds[category_index, 0]
+            high = bounds[category_index, 1]
+            amounts = np.round(low + (high - low) * rng.random(size), 2)
             
-            # Montant réaliste selon la catégorie
-            if category_name in ['Alimentation', 'Nourriture']:
-                amount = round(random.uniform(5, 50), 2)
-            elif category_name == 'Transport':
-                amount = round(random.uniform(10, 80), 2)
-            elif category_name == 'Logement':
-                amount = round(random.uniform(20, 200), 2)
-            elif category_name == 'Santé':
-                amount = round(random.uniform(15, 120), 2)
-            elif category_name == 'Loisirs':
-                amount = round(random.uniform(8, 60), 2)
-            elif category_name == 'Shopping':
-                amount = round(random.uniform(15, 150), 2)
-            elif category_name == 'Éducation':
-                amount = round(random.uniform(10, 80), 2)
-            else:  # Autres
-                amount = round(random.uniform(5, 100), 2)
+            description_index = offsets[category_index] + (rng.random(size) * lengths[category_index]).astype(int)
+            dates = (first_day + np.arange(block_length)).astype(str)
             
-            # Description aléatoire (avec fallback pour les catégories non définies)
-            if category_name in descriptions:
-                description = random.choice(descriptions[category_name])
-            else:
-                # Fallback pour les catégories non définies
-                description = f"Dépense {category_name.lower()}"
-            
-            # Ajouter la dépense
-            try:
-                db.add_expense(amount, description, category_id, date_str)
-                expenses_added += 1
-            except Exception as e:
-                print(f"❌ Erreur lors de l'ajout de la dépense : {e}")
+            yield list(zip(
+                amounts.tolist(),
+                texts[description_index].tolist(),
+                category_ids[category_index].tolist(),
+                dates[day_index].tolist()
+            ))
+        
+        generated += size
+        if max_rows is not None and generated >= max_rows:
+            break
+
+def add_sample_data(db_path=DATABASE_PATH, years=2, rows_per_day=None, seed=42,
+                    category_count=None, target_rows=None, block_days=365):
+    """
+    Ajoute des données d'exemple réalistes
+    
+    Args:
+        db_path (str): Chemin de la base SQLite
+        years (float): Nombre d'années d'historique jusqu'à aujourd'hui
+        rows_per_day (float, optional): Moyenne de dépenses par jour
+        seed (int): Graine du générateur aléatoire
+        category_count (int, optional): Nombre de catégories utilisées
+        target_rows (int, optional): Nombre de dépenses à générer ; avec rows_per_day,
+            la période en découle (years est alors ignoré), sinon la moyenne journalière
+            est déduite de years
+        block_days (int): Nombre de jours générés et insérés par transaction
+    
+    Returns:
+        int: Nombre de dépenses ajoutées
     
-    print(f"✅ {expenses_added} dépenses d'exemple ajoutées avec succès sur 2 ans !")
+    Raises:
+        ValueError: Si rows_per_day n'est pas positif ou si la période remonte avant l'an 1
+        Exception: Erreur d'insertion d'un bloc (les blocs précédents restent en base)
+    """
+    # Fenêtre de jours bornée, se terminant aujourd'hui (+1 pour inclure aujourd'hui)
+    if target_rows is None:
+        days = int(years * 365) + 1
+    elif rows_per_day is None:
+        # Moyenne déduite du nombre cible sur la période demandée
+        days = int(years * 365) + 1
+        rows_per_day = expected_rows(target_rows) / days
+    else:
+        # Période déduite du nombre cible et de la moyenne journalière
+        if rows_per_day <= 0:
+            raise ValueError("rows_per_day doit être positif")
+        days = math.ceil(expected_rows(target_rows) / rows_per_day)
+    
+    # Initialiser la base de données
+    db = ExpenseDatabase(db_path)
+    categories = ensure_categories(db, category_count)
+    
+    if target_rows is None:
+        print(f"🔄 Génération des données d'exemple sur {days} jours...")
+    else:
+        print(f"🔄 Génération de {target_rows} dépenses d'exemple sur {days} jours au plus...")
+    
+    expenses_added = 0
+    for rows in generate_expenses(categories, datetime.now(), days, rows_per_day, seed,
+                                  block_days, target_rows):
+        # Chaque bloc est inséré dans sa propre transaction
+        try:
+            db.add_expenses_bulk(rows)
+        except Exception as e:
+            print(f"❌ Erreur lors de l'ajout des dépenses ({expenses_added} déjà ajoutées) : {e}")
+            raise
+        expenses_added += len(rows)
+    
+    print(f"✅ {expenses_added} dépenses d'exemple ajoutées avec succès !")
     
     # Afficher quelques statistiques
     print("\n📊 Statistiques générées :")
     
-    # Total général
-    total = db.get_total_expenses()
-    print(f"💰 Total des dépenses : {total:.2f} €")
-    
-    # Dépenses d'aujourd'hui
+    # Total général et dépenses d'aujourd'hui (agrégats quotidiens)
     today = datetime.now().strftime("%Y-%m-%d")
-    today_total = db.get_total_expenses(today, today)
-    print(f"📅 Dépenses d'aujourd'hui : {today_total:.2f} €")
+    print(f"💰 Total des dépenses : {db.get_total_expenses():.2f} €")
+    print(f"📅 Dépenses d'aujourd'hui : {db.get_total_expenses(today, today):.2f} €")
     
     # Nombre de transactions
-    all_expenses = db.get_expenses()
-    print(f"📝 Nombre total de transactions : {len(all_expenses)}")
+    count = db.query(QuerySpec(measures=('count',)))['count'].iloc[0]
+    print(f"📝 Nombre total de transactions : {count}")
     
     # Top 3 catégories
     category_stats = db.get_stats_by_category()
@@ -148,7 +299,35 @@ def add_sample_data():
         print(f"\n🏆 Top 3 catégories :")
         for i, (_, row) in enumerate(category_stats.head(3).iterrows()):
             print(f"  {i+1}. {row['category']} : {row['total']:.2f} €")
+    
+    return expenses_added
 
-if __name__ == "__main__":
-    add_sample_data()
+def build_parser():
+    """
+    Construit l'analyseur des arguments de la ligne de commande
+    
+    Returns:
+        argparse.ArgumentParser: Analyseur configuré
+    """
+    parser = argparse.ArgumentParser(description="Génère des dépenses d'exemple pour D-Tracker")
+    parser.add_argument("--db", default=DATABASE_PATH, help="Chemin de la base SQLite")
+    parser.add_argument("--years", type=float, default=2, help="Années d'historique (défaut : 2)")
+    parser.add_argument("--rows-per-day", type=float, help="Moyenne de dépenses par jour (loi de Poisson)")
+    parser.add_argument("--seed", type=int, default=42, help="Graine du générateur (défaut : 42)")
+    parser.add_argument("--categories", type=int, help="Nombre de catégories utilisées (créées si besoin)")
+    parser.add_argument("--target-rows", type=int, help="Nombre exact de dépenses à générer (sur --years, ou sur la période "
+                             "qu'impose --rows-per-day)")
+    parser.add_argument("--block-days", type=int, default=365, help="Jours générés par transaction")
+    return parser
 
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    add_sample_data(
+        db_path=args.db,
+        years=args.years,
+        rows_per_day=args.rows_per_day,
+        seed=args.seed,
+        category_count=args.categories,
+        target_rows=args.target_rows,
+        block_days=args.block_days
+    )
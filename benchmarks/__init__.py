@@ -0,0 +1 @@
+# Benchmarks module for D-Tracker application
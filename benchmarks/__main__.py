@@ -0,0 +1,56 @@
+"""
+Point d'entrée de la suite de benchmarks D-Tracker
+
+Exemples :
+    python -m benchmarks --sizes 10000 100000
+    python -m benchmarks --output .benchmarks/bench.json --compare .benchmarks/bench_precedent.json
+"""
+
+import argparse
+import json
+import os
+
+from benchmarks.runner import compare_reports, run_benchmarks, write_report
+from config.settings import BENCHMARK_SIZES
+
+
+def build_parser():
+    """
+    Construit l'analyseur des arguments de la ligne de commande
+
+    Returns:
+        argparse.ArgumentParser: Analyseur configuré
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks des accès à la base D-Tracker")
+    parser.add_argument("--sizes", type=int, nargs="+", default=BENCHMARK_SIZES,
+                        help="Nombres de dépenses des bases mesurées")
+    parser.add_argument("--repeat", type=int, default=5, help="Exécutions mesurées par scénario")
+    parser.add_argument("--scenarios", nargs="+", help="Limiter aux scénarios nommés")
+    parser.add_argument("--seed", type=int, default=42, help="Graine du générateur de données")
+    parser.add_argument("--workdir", default=".benchmarks", help="Répertoire des bases de benchmark")
+    parser.add_argument("-o", "--output",
+                        help="Rapport JSON produit (défaut : benchmark_report.json dans --workdir)")
+    parser.add_argument("--compare", help="Rapport JSON précédent à comparer")
+    return parser
+
+
+def main(argv=None):
+    """Exécute les benchmarks et écrit le rapport"""
+    args = build_parser().parse_args(argv)
+    report = run_benchmarks(args.sizes, args.workdir, args.repeat, args.scenarios, args.seed)
+    # Rapport à côté des bases, hors du dépôt (.benchmarks/ est ignoré par git)
+    output = args.output or os.path.join(args.workdir, "benchmark_report.json")
+    write_report(report, output)
+    print(f"✅ Rapport écrit dans {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            previous = json.load(handle)
+        print(f"\n{'Taille':>10}  {'Groupe':<13} {'Scénario':<26} {'Avant':>10} {'Après':>10} {'Ratio':>7}")
+        for size, group, name, before, after, ratio in compare_reports(previous, report):
+            ratio_label = f"{ratio:.2f}" if ratio is not None else "-"
+            print(f"{size:>10}  {group:<13} {name:<26} {before:>10.3f} {after:>10.3f} {ratio_label:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Exécution des benchmarks D-Tracker et production du rapport JSON
+"""
+
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+
+from add_sample_data import ensure_categories, expected_rows, generate_expenses
+from benchmarks.scenarios import METHOD_SCENARIOS, PAGE_SCENARIOS, build_context
+from database import ExpenseDatabase
+
+# Historique couvert par les bases de benchmark (années)
+HISTORY_YEARS = 5
+
+
+def build_database(path, size, seed=42):
+    """
+    Construit (ou réutilise) une base contenant exactement `size` dépenses
+
+    Args:
+        path (str): Chemin du fichier SQLite
+        size (int): Nombre de dépenses
+        seed (int): Graine du générateur
+
+    Returns:
+        ExpenseDatabase: Base prête à être mesurée
+    """
+    if os.path.exists(path):
+        db = ExpenseDatabase(path)
+        count = db.connections.connection().execute('SELECT COUNT(*) FROM expenses').fetchone()[0]
+        if count == size:
+            return db
+        db.connections.close_all()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    db = ExpenseDatabase(path)
+    days = HISTORY_YEARS * 365
+    for rows in generate_expenses(ensure_categories(db), datetime.now(), days,
+                                  rows_per_day=expected_rows(size) / days, seed=seed, max_rows=size):
+        db.add_expenses_bulk(rows)
+    db.connections.connection().execute('ANALYZE')
+    return db
+
+
+def measure(scenario, db, ctx, repeat):
+    """
+    Mesure un scénario : temps sur `repeat` exécutions puis pic mémoire
+
+    Returns:
+        dict: Temps (ms) min/médiane/moyenne/max et pic mémoire Python (Mo)
+    """
+    scenario(db, ctx)  # Préchauffage (cache de pages SQLite, imports)
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scenario(db, ctx)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        scenario(db, ctx)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'peak_memory_mb': round(peak / (1024 * 1024), 3)
+    }
+
+
+def run_size(db, repeat, scenarios=None):
+    """
+    Exécute les scénarios sur une base, sans cache puis avec cache pour les pages
+
+    Returns:
+        dict: Résultats par groupe ('methods', 'pages', 'pages_cached') et par scénario
+    """
+    ctx = build_context(db)
+    selected = set(scenarios) if scenarios else None
+    results = {'methods': {}, 'pages': {}, 'pages_cached': {}}
+
+    query_cache = db.query_cache
+    db.query_cache = None  # Mesures à froid : chaque appel interroge SQLite
+    try:
+        for group, group_scenarios in (('methods', METHOD_SCENARIOS), ('pages', PAGE_SCENARIOS)):
+            for scenario in group_scenarios:
+                if selected is None or scenario.__name__ in selected:
+                    results[group][scenario.__name__] = measure(scenario, db, ctx, repeat)
+    finally:
+        db.query_cache = query_cache
+
+    if query_cache is not None:
+        for scenario in PAGE_SCENARIOS:
+            if selected is None or scenario.__name__ in selected:
+                results['pages_cached'][scenario.__name__] = measure(scenario, db, ctx, repeat)
+
+    return results
+
+
+def _git_commit():
+    """Identifiant du commit courant, s'il est disponible"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes, workdir, repeat=5, scenarios=None, seed=42, log=print):
+    """
+    Construit les bases demandées et mesure tous les scénarios
+
+    Args:
+        sizes (list): Nombres de dépenses des bases à mesurer
+        workdir (str): Répertoire des bases de benchmark (réutilisées d'une exécution à l'autre)
+        repeat (int): Nombre d'exécutions mesurées par scénario
+        scenarios (list, optional): Noms des scénarios à exécuter (tous par défaut)
+        seed (int): Graine du générateur de données
+        log (callable): Fonction d'affichage de la progression
+
+    Returns:
+        dict: Rapport complet (métadonnées et résultats par taille)
+    """
+    os.makedirs(workdir, exist_ok=True)
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'seed': seed
+        },
+        'results': {}
+    }
+
+    for size in sizes:
+        path = os.path.join(workdir, f"bench_{size}.db")
+        log(f"🔄 Base de {size} dépenses ({path})...")
+        start = time.perf_counter()
+        db = build_database(path, size, seed)
+        log(f"   prête en {time.perf_counter() - start:.1f} s, mesures en cours...")
+        report['results'][str(size)] = run_size(db, repeat, scenarios)
+        db.connections.close_all()
+
+    return report
+
+
+def compare_reports(previous, current):
+    """
+    Compare deux rapports (temps médians)
+
+    Returns:
+        list: Tuples (taille, groupe, scénario, avant_ms, après_ms, ratio)
+    """
+    rows = []
+    for size, groups in current['results'].items():
+        for group, scenarios in groups.items():
+            for name, values in scenarios.items():
+                before = previous.get('results', {}).get(size, {}).get(group, {}).get(name)
+                if before is None:
+                    continue
+                ratio = values['median_ms'] / before['median_ms'] if before['median_ms'] else None
+                rows.append((size, group, name, before['median_ms'], values['median_ms'], ratio))
+    return rows
+
+
+def write_report(report, path):
+    """Écrit le rapport JSON (clés triées pour faciliter les diff entre commits)"""
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(report, handle, indent=2, sort_keys=True, ensure_ascii=False)
+        handle.write('\n')
@@ -0,0 +1,234 @@
+"""
+Scénarios mesurés par la suite de benchmarks D-Tracker
+
+Chaque scénario est une fonction recevant la base et un contexte de dates ;
+les scénarios de page reproduisent la séquence de lectures d'une page.
+"""
+
+from datetime import datetime, timedelta
+from storage.query import QuerySpec
+from utils.date_utils import get_period_dates
+
+
+def build_context(db):
+    """
+    Prépare les dates et identifiants utilisés par les scénarios
+
+    Args:
+        db (ExpenseDatabase): Base de données mesurée
+
+    Returns:
+        dict: Dates de référence, catégories et curseur de pagination
+    """
+    today = datetime.now()
+    categories = db.get_categories()
+    return {
+        'today': today.strftime("%Y-%m-%d"),
+        'week_start': (today - timedelta(days=6)).strftime("%Y-%m-%d"),
+        'month_start': (today - timedelta(days=30)).strftime("%Y-%m-%d"),
+        'year_start': (today - timedelta(days=365)).strftime("%Y-%m-%d"),
+        'category_names': [cat[1] for cat in categories[:5]],
+        'category_name': categories[0][1],
+        'category_id': categories[0][0]
+    }
+
+
+# Méthodes d'ExpenseDatabase (lectures)
+
+def expenses_month(db, ctx):
+    """Dépenses des 30 derniers jours"""
+    return db.get_expenses(ctx['month_start'], ctx['today'])
+
+def expenses_all(db, ctx):
+    """Toutes les dépenses"""
+    return db.get_expenses()
+
+def expenses_year_category(db, ctx):
+    """Dépenses d'une catégorie sur un an"""
+    return db.get_expenses(ctx['year_start'], ctx['today'], ctx['category_name'])
+
+def expenses_first_page(db, ctx):
+    """Première page de l'historique sur un an"""
+    return db.get_expenses_page(ctx['year_start'], ctx['today'])
+
+def search_all(db, ctx):
+    """Recherche plein texte sur tout l'historique"""
+    return db.search_expenses("uber eats")
+
+def search_month(db, ctx):
+    """Recherche plein texte sur les 30 derniers jours"""
+    return db.search_expenses("courses", ctx['month_start'], ctx['today'])
+
+def iter_expenses_all(db, ctx):
+    """Parcours complet par paquets"""
+    return sum(len(chunk) for chunk in db.iter_expense_rows())
+
+def categories(db, ctx):
+    """Liste des catégories"""
+    return db.get_categories()
+
+def category_by_id(db, ctx):
+    """Catégorie par identifiant"""
+    return db.get_category_by_id(ctx['category_id'])
+
+def stats_by_period_day(db, ctx):
+    """Totaux par jour"""
+    return db.get_stats_by_period('day')
+
+def stats_by_period_week(db, ctx):
+    """Totaux par semaine"""
+    return db.get_stats_by_period('week')
+
+def stats_by_period_month(db, ctx):
+    """Totaux par mois"""
+    return db.get_stats_by_period('month')
+
+def stats_by_period_quarter(db, ctx):
+    """Totaux par trimestre"""
+    return db.get_stats_by_period('quarter')
+
+def stats_by_period_week_year_categories(db, ctx):
+    """Totaux par semaine sur un an, pour quelques catégories"""
+    return db.get_stats_by_period('week', ctx['year_start'], ctx['today'], ctx['category_names'])
+
+def stats_by_category_month(db, ctx):
+    """Répartition par catégorie sur 30 jours"""
+    return db.get_stats_by_category(ctx['month_start'], ctx['today'])
+
+def stats_by_category_all(db, ctx):
+    """Répartition par catégorie sur tout l'historique"""
+    return db.get_stats_by_category()
+
+def total_expenses_all(db, ctx):
+    """Total général"""
+    return db.get_total_expenses()
+
+def total_expenses_month(db, ctx):
+    """Total des 30 derniers jours"""
+    return db.get_total_expenses(ctx['month_start'], ctx['today'])
+
+def period_summary(db, ctx):
+    """Résumé du mois courant et du mois précédent"""
+    start_date, end_date, prev_start, prev_end, _, _ = get_period_dates("mois")
+    return db.get_period_summary((start_date, end_date), (prev_start, prev_end))
+
+def daily_expenses_week(db, ctx):
+    """Évolution des 7 derniers jours"""
+    return db.get_daily_expenses(ctx['week_start'], ctx['today'])
+
+def daily_by_category_year(db, ctx):
+    """Évolution quotidienne de 5 catégories sur un an"""
+    return db.get_daily_expenses_by_category(ctx['year_start'], ctx['today'], ctx['category_names'])
+
+def series_day_month(db, ctx):
+    """Série quotidienne sur 30 jours (moyennes mobiles, cumul, écarts)"""
+    return db.get_expense_series(ctx['month_start'], ctx['today'])
+
+def series_week_year_categories(db, ctx):
+    """Séries hebdomadaires de 5 catégories sur un an"""
+    return db.get_expense_series(ctx['year_start'], ctx['today'], 'week', ctx['category_names'],
+                                 by_category=True)
+
+def series_month_year(db, ctx):
+    """Série mensuelle sur un an"""
+    return db.get_expense_series(ctx['year_start'], ctx['today'], 'month')
+
+def query_category_month(db, ctx):
+    """Requête déclarative : total et nombre par catégorie sur 30 jours"""
+    return db.query(QuerySpec(
+        group_by=('category',), measures=('sum', 'count'),
+        start_date=ctx['month_start'], end_date=ctx['today'], order_by=('-total',)
+    ))
+
+def query_month_category_all(db, ctx):
+    """Requête déclarative : total par mois et par catégorie sur tout l'historique"""
+    return db.query(QuerySpec(group_by=('month', 'category')))
+
+def query_max_year(db, ctx):
+    """Requête déclarative : plus grosse dépense par catégorie sur un an (dépenses unitaires)"""
+    return db.query(QuerySpec(
+        group_by=('category',), measures=('max',), start_date=ctx['year_start'], end_date=ctx['today']
+    ))
+
+def query_text_all(db, ctx):
+    """Requête déclarative : total par mois des dépenses dont la description contient un mot"""
+    return db.query(QuerySpec(group_by=('month',), measures=('sum', 'count'), text="courses"))
+
+
+# Méthodes d'ExpenseDatabase (écritures, annulées après la mesure)
+
+def add_expense(db, ctx):
+    """Ajout d'une dépense"""
+    expense_id = db.add_expense(12.5, "Benchmark", ctx['category_id'], ctx['today'])
+    _delete_expenses(db, expense_id, expense_id)
+
+def add_expenses_bulk_1000(db, ctx):
+    """Ajout en masse de 1000 dépenses"""
+    rows = [(12.5, "Benchmark", ctx['category_id'], ctx['today'])] * 1000
+    first_id, last_id = db.add_expenses_bulk(rows)
+    _delete_expenses(db, first_id, last_id)
+
+def _delete_expenses(db, first_id, last_id):
+    """Supprime les dépenses insérées par un scénario d'écriture"""
+    with db.connections.transaction() as conn:
+        conn.execute('DELETE FROM expenses WHERE id BETWEEN ? AND ?', (first_id, last_id))
+
+
+# Séquences de lecture des pages
+
+def page_dashboard(db, ctx):
+    """Lectures de la page Dashboard"""
+    start_date, end_date, prev_start, prev_end, _, _ = get_period_dates("mois")
+    db.get_period_summary((start_date, end_date), (prev_start, prev_end))
+    db.query(QuerySpec(
+        group_by=('category',), start_date=start_date, end_date=end_date, order_by=('-total',)
+    ))
+    db.get_expense_series(ctx['week_start'], ctx['today'])
+
+def page_analyses(db, ctx):
+    """Lectures de la page Analyses (intervalle personnalisé)"""
+    start_date, end_date, _, _, _, _ = get_period_dates("année")
+    db.query(QuerySpec(
+        group_by=('category',), measures=('sum', 'count'),
+        start_date=start_date, end_date=end_date, order_by=('-total',)
+    ))
+    evolution_categories = db.query(QuerySpec(
+        group_by=('category',), start_date=ctx['month_start'], end_date=ctx['today'], order_by=('-total',)
+    ))
+    db.get_expense_series(
+        ctx['month_start'], ctx['today'], 'day', evolution_categories['category'].tolist()[:5],
+        by_category=True
+    )
+
+def page_historique(db, ctx):
+    """Lectures de la page Historique"""
+    db.get_categories()
+    db.get_expenses_page(ctx['month_start'], ctx['today'])
+
+def page_categories(db, ctx):
+    """Lectures de la page Catégories"""
+    db.get_categories()
+    db.get_categories()
+    db.get_category_by_id(ctx['category_id'])
+
+def page_nouvelle_depense(db, ctx):
+    """Lectures de la page Nouvelle Dépense"""
+    db.get_categories()
+
+
+METHOD_SCENARIOS = [
+    expenses_month, expenses_all, expenses_year_category, expenses_first_page,
+    search_all, search_month, iter_expenses_all, categories, category_by_id,
+    stats_by_period_day, stats_by_period_week, stats_by_period_month,
+    stats_by_period_quarter, stats_by_period_week_year_categories,
+    stats_by_category_month, stats_by_category_all,
+    total_expenses_all, total_expenses_month, period_summary,
+    daily_expenses_week, daily_by_category_year,
+    series_day_month, series_week_year_categories, series_month_year,
+    query_category_month, query_month_category_all, query_max_year, query_text_all,
+    add_expense, add_expenses_bulk_1000,
+]
+
+PAGE_SCENARIOS = [
+    page_dashboard, page_analyses, page_historique, page_categories, page_nouvelle_depense,
+]
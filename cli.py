@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Commandes d'administration de la base de données D-Tracker
+
+Exemples :
+    python cli.py rebuild-totals
+    python cli.py vacuum
+    python cli.py export-csv --start 2024-01-01 --end 2024-12-31 -o depenses.csv
+    python cli.py import-csv releve.csv --encoding latin-1
+    python cli.py export-parquet --start 2024-01-01 -o depenses.parquet
+    python cli.py import-parquet depenses.parquet
+    python cli.py archive --before 2023 --vacuum
+    python cli.py partitions
+    python cli.py backup
+    python cli.py restore expenses-20240101-120000
+"""
+
+import argparse
+import sys
+from config.settings import BACKUP_RETENTION, DATABASE_PATH
+from database import ExpenseDatabase
+from storage.backup import create_backup, list_backups, prune_backups, restore_backup
+from storage.columnar import export_expenses_parquet, import_expenses_parquet
+from storage.export import export_expenses_csv
+from storage.importer import import_statement_csv
+
+def rebuild_totals(args):
+    """Recalcule la table d'agrégats quotidiens par catégorie"""
+    db = ExpenseDatabase(args.db)
+    db.rebuild_daily_totals()
+    print("✅ Agrégats quotidiens recalculés")
+
+def vacuum(args):
+    """Compacte le fichier de la base"""
+    db = ExpenseDatabase(args.db)
+    db.vacuum()
+    print("✅ Base compactée")
+
+def export_csv(args):
+    """Exporte les dépenses filtrées en CSV, en flux"""
+    db = ExpenseDatabase(args.db)
+    if args.output == "-":
+        count = export_expenses_csv(db, sys.stdout, args.start, args.end, args.category, text=args.search)
+    else:
+        count = export_expenses_csv(db, args.output, args.start, args.end, args.category, text=args.search)
+    print(f"✅ {count} dépense(s) exportée(s)", file=sys.stderr)
+
+def import_csv(args):
+    """Importe un relevé bancaire CSV (les opérations déjà importées sont ignorées)"""
+    db = ExpenseDatabase(args.db)
+    try:
+        report = import_statement_csv(db, args.path, args.encoding, args.delimiter)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    for error in report['errors']:
+        print(f"⚠️ {error}", file=sys.stderr)
+    print(
+        f"✅ {report['inserted']} dépense(s) importée(s) sur {report['read']} ligne(s) : "
+        f"{report['duplicates']} déjà présente(s), {report['skipped']} crédit(s) ignoré(s), "
+        f"{report['rejected']} ligne(s) rejetée(s)"
+    )
+
+def export_parquet(args):
+    """Exporte les dépenses filtrées en Parquet, par groupes de lignes"""
+    db = ExpenseDatabase(args.db)
+    try:
+        count = export_expenses_parquet(
+            db, args.output, args.start, args.end, args.category, text=args.search
+        )
+    except ImportError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✅ {count} dépense(s) exportée(s) dans {args.output}")
+
+def import_parquet(args):
+    """Restaure les dépenses d'un fichier Parquet (les dépenses déjà présentes sont ignorées)"""
+    db = ExpenseDatabase(args.db)
+    try:
+        read, inserted = import_expenses_parquet(db, args.path)
+    except (ImportError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✅ {inserted} dépense(s) restaurée(s) sur {read} ({read - inserted} déjà présente(s))")
+
+def archive(args):
+    """Déplace les années closes dans leurs fichiers d'archive"""
+    db = ExpenseDatabase(args.db)
+    if args.year is not None:
+        years = [args.year]
+    else:
+        years = sorted(int(year) for year in db.get_stats_by_period('year')['year'] if int(year) < args.before)
+    
+    total = 0
+    for year in years:
+        try:
+            moved = db.archive_year(year)
+        except (ValueError, FileNotFoundError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(1)
+        if moved:
+            print(f"📦 {year} : {moved} dépense(s) archivée(s)")
+        total += moved
+    if args.vacuum and total:
+        db.vacuum()
+    print(f"✅ {total} dépense(s) archivée(s)")
+
+def partitions(args):
+    """Liste les archives annuelles"""
+    db = ExpenseDatabase(args.db)
+    archives = db.get_partitions()
+    if not archives:
+        print("Aucune archive")
+    for partition in archives:
+        print(f"{partition.year}  {partition.rows:>10} dépense(s)  {partition.path}")
+
+def _print_progress(name, copied, total):
+    """Affiche l'avancement d'une copie de pages"""
+    print(f"\r{name} : {copied}/{total} pages", end="" if copied < total else "\n", file=sys.stderr)
+
+def backup(args):
+    """Sauvegarde la base et ses archives sans bloquer l'application"""
+    snapshot = create_backup(args.db, compress=not args.no_compress, progress=_print_progress)
+    removed = prune_backups(args.db, keep=args.keep)
+    print(f"✅ Sauvegarde {snapshot.name} ({snapshot.size / 1e6:.1f} Mo, {len(snapshot.files)} fichier(s))")
+    if removed:
+        print(f"🗑️ {len(removed)} ancienne(s) sauvegarde(s) supprimée(s)")
+
+def backups(args):
+    """Liste les sauvegardes de la base"""
+    snapshots = list_backups(args.db)
+    if not snapshots:
+        print("Aucune sauvegarde")
+    for snapshot in snapshots:
+        print(f"{snapshot.name}  {snapshot.created_at}  {snapshot.size / 1e6:>8.1f} Mo  {len(snapshot.files)} fichier(s)")
+
+def restore(args):
+    """Restaure une sauvegarde vérifiée (la plus récente par défaut)"""
+    name = args.name
+    if name is None:
+        snapshots = list_backups(args.db)
+        if not snapshots:
+            print("❌ Aucune sauvegarde à restaurer", file=sys.stderr)
+            sys.exit(1)
+        name = snapshots[0].name
+    try:
+        if not args.no_safety_backup:
+            # État actuel sauvegardé d'abord : la restauration reste réversible
+            safety = create_backup(args.db, progress=_print_progress)
+            print(f"💾 État actuel sauvegardé dans {safety.name}")
+        snapshot = restore_backup(args.db, name, progress=_print_progress)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✅ Sauvegarde {snapshot.name} restaurée ({len(snapshot.files)} fichier(s))")
+
+def build_parser():
+    """
+    Construit l'analyseur des arguments de la ligne de commande
+    
+    Returns:
+        argparse.ArgumentParser: Analyseur configuré
+    """
+    parser = argparse.ArgumentParser(description="Administration de la base D-Tracker")
+    parser.add_argument("--db", default=DATABASE_PATH, help="Chemin de la base SQLite")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    rebuild_parser = subparsers.add_parser(
+        "rebuild-totals",
+        help="Recalcule les agrégats quotidiens par catégorie"
+    )
+    rebuild_parser.set_defaults(func=rebuild_totals)
+    
+    vacuum_parser = subparsers.add_parser(
+        "vacuum",
+        help="Compacte le fichier de la base (après une migration)"
+    )
+    vacuum_parser.set_defaults(func=vacuum)
+    
+    export_parser = subparsers.add_parser("export-csv", help="Exporte les dépenses en CSV")
+    export_parser.add_argument("--start", help="Date de début (YYYY-MM-DD)")
+    export_parser.add_argument("--end", help="Date de fin (YYYY-MM-DD)")
+    export_parser.add_argument("--category", help="Nom de la catégorie")
+    export_parser.add_argument("--search", help="Mots cherchés dans la description")
+    export_parser.add_argument("-o", "--output", default="-", help="Fichier de sortie (- pour la sortie standard)")
+    export_parser.set_defaults(func=export_csv)
+    
+    import_parser = subparsers.add_parser("import-csv", help="Importe un relevé bancaire CSV")
+    import_parser.add_argument("path", help="Fichier CSV du relevé")
+    import_parser.add_argument("--encoding", default="utf-8-sig", help="Encodage du fichier")
+    import_parser.add_argument("--delimiter", help="Séparateur (détecté par défaut)")
+    import_parser.set_defaults(func=import_csv)
+    
+    parquet_export_parser = subparsers.add_parser(
+        "export-parquet",
+        help="Exporte les dépenses en Parquet (pyarrow requis)"
+    )
+    parquet_export_parser.add_argument("--start", help="Date de début (YYYY-MM-DD)")
+    parquet_export_parser.add_argument("--end", help="Date de fin (YYYY-MM-DD)")
+    parquet_export_parser.add_argument("--category", help="Nom de la catégorie")
+    parquet_export_parser.add_argument("--search", help="Mots cherchés dans la description")
+    parquet_export_parser.add_argument("-o", "--output", required=True, help="Fichier de sortie")
+    parquet_export_parser.set_defaults(func=export_parquet)
+    
+    parquet_import_parser = subparsers.add_parser(
+        "import-parquet",
+        help="Restaure les dépenses d'un fichier Parquet exporté"
+    )
+    parquet_import_parser.add_argument("path", help="Fichier Parquet")
+    parquet_import_parser.set_defaults(func=import_parquet)
+    
+    archive_parser = subparsers.add_parser(
+        "archive",
+        help="Déplace des années closes dans des fichiers d'archive"
+    )
+    archive_years = archive_parser.add_mutually_exclusive_group(required=True)
+    archive_years.add_argument("--year", type=int, help="Année à archiver")
+    archive_years.add_argument("--before", type=int, help="Archive toutes les années antérieures")
+    archive_parser.add_argument("--vacuum", action="store_true", help="Compacte ensuite la base")
+    archive_parser.set_defaults(func=archive)
+    
+    partitions_parser = subparsers.add_parser("partitions", help="Liste les archives annuelles")
+    partitions_parser.set_defaults(func=partitions)
+    
+    backup_parser = subparsers.add_parser("backup", help="Sauvegarde la base en ligne")
+    backup_parser.add_argument("--keep", type=int, default=BACKUP_RETENTION, help="Sauvegardes conservées")
+    backup_parser.add_argument("--no-compress", action="store_true", help="Copie non compressée")
+    backup_parser.set_defaults(func=backup)
+    
+    backups_parser = subparsers.add_parser("backups", help="Liste les sauvegardes")
+    backups_parser.set_defaults(func=backups)
+    
+    restore_parser = subparsers.add_parser("restore", help="Restaure une sauvegarde vérifiée")
+    restore_parser.add_argument("name", nargs="?", help="Nom de la sauvegarde (la plus récente par défaut)")
+    restore_parser.add_argument(
+        "--no-safety-backup",
+        action="store_true",
+        help="Ne sauvegarde pas l'état actuel avant la restauration"
+    )
+    restore_parser.set_defaults(func=restore)
+    
+    return parser
+
+def main(argv=None):
+    """Point d'entrée de la ligne de commande"""
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
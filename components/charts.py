@@ -5,6 +5,69 @@ Composants de graphiques pour l'application D-Tracker
 import streamlit as st
 import plotly.express as px
 import pandas as pd
+from config.settings import SERIES_MOVING_AVERAGES
+
+# Unité des moyennes mobiles par période de série
+PERIOD_UNITS = {'day': 'jours', 'week': 'semaines', 'month': 'mois'}
+
+# Style des courbes superposées (moyennes mobiles en tirets)
+OVERLAY_DASHES = {'previous': 'dot', 'cumulative': 'dashdot'}
+
+def series_overlay_options(period='day'):
+    """
+    Superpositions proposées sur un graphique d'évolution
+    
+    Args:
+        period (str): Période de la série ('day', 'week' ou 'month')
+    
+    Returns:
+        dict: Colonne de la série (get_expense_series) -> libellé
+    """
+    options = {
+        f'ma_{window}': f"Moyenne mobile {window} {PERIOD_UNITS[period]}"
+        for window in SERIES_MOVING_AVERAGES[period]
+    }
+    options['previous'] = "Période précédente"
+    options['cumulative'] = "Cumul (axe de droite)"
+    return options
+
+def _add_overlays(fig, series, x, overlays, period, color=None, group=None):
+    """
+    Ajoute au graphique les courbes superposées d'une série
+    
+    Le cumul, d'un autre ordre de grandeur, est tracé sur un axe secondaire.
+    
+    Args:
+        fig (Figure): Graphique plotly
+        series (DataFrame): Série (colonnes de get_expense_series)
+        x (Series): Abscisses
+        overlays (list): Colonnes à superposer
+        period (str): Période de la série
+        color (str, optional): Couleur des courbes (celle de la catégorie)
+        group (str, optional): Catégorie (groupe de légende)
+    """
+    labels = series_overlay_options(period)
+    for column in overlays:
+        name = labels[column] if group is None else f"{group} – {labels[column]}"
+        fig.add_scatter(
+            x=x,
+            y=series[column],
+            mode='lines',
+            name=name,
+            legendgroup=group,
+            line=dict(color=color, dash=OVERLAY_DASHES.get(column, 'dash')),
+            yaxis='y2' if column == 'cumulative' else 'y'
+        )
+    if 'cumulative' in overlays:
+        fig.update_layout(yaxis2=dict(title='Cumul (€)', overlaying='y', side='right', showgrid=False))
+
+def _series_axis(series, period):
+    """Abscisses d'une série : dates pour les jours et les mois, libellés ISO pour les semaines"""
+    if period == 'day':
+        return pd.to_datetime(series['date'])
+    if period == 'month':
+        return pd.to_datetime(series['month'], format='%Y-%m')
+    return series[period]
 
 def render_category_progress(category_stats):
     """
@@ -32,14 +95,20 @@ def render_category_progress(category_stats):
     else:
         st.info("Aucune dépense enregistrée pour cette période")
 
-def render_daily_evolution(daily_expenses):
+def _has_expenses(series):
+    """Indique si une série complétée (get_expense_series) contient au moins une dépense"""
+    return len(series) > 0 and bool((series['total'] != 0).any())
+
+def render_daily_evolution(daily_expenses, overlays=()):
     """
     Rendu du graphique d'évolution quotidienne
     
     Args:
-        daily_expenses (DataFrame): Données des dépenses quotidiennes
+        daily_expenses (DataFrame): Série quotidienne (get_expense_series)
+        overlays (list): Colonnes superposées aux barres (series_overlay_options)
     """
-    if len(daily_expenses) > 0:
+    # Série complétée (jours sans dépense à 0) : vide si aucun total n'est non nul
+    if _has_expenses(daily_expenses):
         fig = px.bar(
             daily_expenses,
             x='date',
@@ -48,6 +117,8 @@ def render_daily_evolution(daily_expenses):
             labels={'date': 'Date', 'total': 'Montant (€)'},
             color_discrete_sequence=px.colors.sequential.Viridis
         )
+        if overlays:
+            _add_overlays(fig, daily_expenses, daily_expenses['date'], overlays, 'day')
         st.plotly_chart(fig, use_container_width=True)
     else:
         st.info("Aucune donnée disponible pour les 7 derniers jours")
@@ -97,23 +168,26 @@ def render_category_analysis(category_analysis):
     else:
         st.info("Aucune donnée disponible pour cette période.")
 
-def render_category_evolution(daily_by_category, selected_categories=None):
+def render_category_evolution(daily_by_category, selected_categories=None, overlays=(), period='day'):
     """
     Rendu du graphique d'évolution en courbes par catégorie
     
     Args:
-        daily_by_category (DataFrame): Données des dépenses quotidiennes par catégorie
+        daily_by_category (DataFrame): Série par catégorie (get_expense_series, by_category=True)
         selected_categories (list): Liste des catégories sélectionnées à afficher
+        overlays (list): Colonnes superposées aux courbes (series_overlay_options)
+        period (str): Période de la série ('day', 'week' ou 'month')
     """
-    if len(daily_by_category) > 0:
+    if _has_expenses(daily_by_category):
         # Filtrer par catégories sélectionnées si nécessaire
         df_filtered = daily_by_category.copy()
         if selected_categories:
             df_filtered = df_filtered[df_filtered['category'].isin(selected_categories)]
         
-        if len(df_filtered) > 0:
-            # Convertir la date en datetime pour un meilleur affichage
-            df_filtered['date'] = pd.to_datetime(df_filtered['date'])
+        if _has_expenses(df_filtered):
+            # Abscisses : dates pour les jours et les mois, semaines ISO sinon
+            label = 'date' if period == 'day' else period
+            df_filtered[label] = _series_axis(df_filtered, period)
             
             # Créer un dictionnaire des couleurs par catégorie
             category_colors = {}
@@ -123,14 +197,21 @@ def render_category_evolution(daily_by_category, selected_categories=None):
             # Créer le graphique en courbes avec le format long
             fig = px.line(
                 df_filtered,
-                x='date',
+                x=label,
                 y='total',
                 color='category',
                 title='Évolution des Dépenses par Catégorie',
-                labels={'date': 'Date', 'total': 'Montant (€)', 'category': 'Catégorie'},
+                labels={label: 'Date' if period == 'day' else 'Période', 'total': 'Montant (€)',
+                        'category': 'Catégorie'},
                 color_discrete_map=category_colors if category_colors else None
             )
             
+            # Courbes superposées, de la couleur de leur catégorie
+            if overlays:
+                for category, series in df_filtered.groupby('category', sort=False):
+                    _add_overlays(fig, series, series[label], overlays, period,
+                                  category_colors.get(category), category)
+            
             fig.update_layout(
                 hovermode='x unified',
                 legend=dict(
@@ -2,7 +2,9 @@
 Composant de navigation de la barre latérale pour l'application D-Tracker
 """
 
+import pandas as pd
 import streamlit as st
+from config.settings import QUERY_DEBUG_PANEL
 
 def render_sidebar():
     """
@@ -35,3 +37,53 @@ def render_sidebar():
     # Retour de la page actuelle
     return st.session_state.get("page", "Dashboard")
 
+
+def render_query_debug_panel(db):
+    """
+    Rendu des mesures des requêtes de la page (si QUERY_DEBUG_PANEL est activé)
+    
+    À appeler en fin de page : les compteurs sont remis à zéro pour la
+    réexécution suivante.
+    
+    Args:
+        db (ExpenseDatabase): Base de données utilisée par la page
+    """
+    if not QUERY_DEBUG_PANEL:
+        return
+    
+    stats = db.query_stats(reset=True)
+    
+    with st.sidebar.expander("🔍 Requêtes SQL", expanded=False):
+        col1, col2 = st.columns(2)
+        col1.metric("Requêtes", stats['queries'])
+        col2.metric("Lentes", stats['slow_queries'])
+        col1.metric("Durée", f"{stats['total_ms']:.1f} ms")
+        col2.metric("Attente", f"{stats['wait_ms']:.1f} ms")
+        st.caption(f"{stats['rows']} lignes lues ou modifiées")
+        
+        if stats['by_query']:
+            by_query = pd.DataFrame([
+                {'requête': sql, **entry} for sql, entry in stats['by_query'].items()
+            ]).sort_values('total_ms', ascending=False)
+            st.dataframe(by_query, hide_index=True, use_container_width=True)
+        
+        cache = db.cache_stats()
+        if cache is not None:
+            st.caption(
+                f"Cache : {cache['hits']} succès, {cache['misses']} échecs "
+                f"({cache['hit_ratio']:.0%}), {cache['size']}/{cache['maxsize']} entrées"
+            )
+        
+        statements = db.query_statement_stats()
+        st.caption(
+            f"Requêtes compilées : {statements['hits']} réutilisées, {statements['misses']} compilées, "
+            f"{statements['size']}/{statements['maxsize']} en cache"
+        )
+        
+        analytics = db.analytics_stats()
+        if analytics is not None:
+            st.caption(
+                f"Agrégats ({analytics['backend']}) : {analytics['rows']} lignes, {analytics['full_loads']} "
+                f"chargement(s), {analytics['refreshes']} rafraîchissement(s) "
+                f"({analytics['days_copied']} jours recopiés)"
+            )
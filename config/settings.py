@@ -97,3 +97,128 @@ DEFAULT_CATEGORIES = [
     ('Autres', '#bcbd22')
 ]
 
+
+# Base de données SQLite
+DATABASE_PATH = "expenses.db"
+
+# Pragmas appliqués une seule fois à chaque nouvelle connexion
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,       # 64 Mo de cache de pages
+    "mmap_size": 268435456,     # 256 Mo mappés en mémoire
+    "busy_timeout": 5000,       # millisecondes
+    "temp_store": "MEMORY"
+}
+
+# Nombre de requêtes préparées conservées par connexion
+SQLITE_STATEMENT_CACHE_SIZE = 256
+
+# Connexions libres conservées dans le pool (threads terminés)
+SQLITE_MAX_IDLE_CONNECTIONS = 8
+
+# File d'écriture : un thread unique regroupe les ajouts de dépenses de toutes
+# les sessions dans une même transaction (au plus WRITE_QUEUE_MAX_BATCH ajouts).
+# Un lot contient les demandes arrivées pendant la validation du précédent ;
+# WRITE_QUEUE_MAX_DELAY_MS > 0 attend en plus jusqu'à ce délai après la première
+WRITE_QUEUE_ENABLED = False
+WRITE_QUEUE_MAX_BATCH = 64
+WRITE_QUEUE_MAX_DELAY_MS = 0
+
+# Archives annuelles des dépenses (`python cli.py archive`) : fichier créé à côté
+# de la base ({stem} : nom de la base sans extension) et nombre maximal d'archives
+# attachées à une connexion (SQLite en accepte 10)
+PARTITION_FILENAME = "{stem}_{year}.db"
+PARTITION_MAX_ATTACHED = 8
+
+# Sauvegardes en ligne (`python cli.py backup`) : dossier (relatif au dossier de la
+# base), compression gzip (niveau 1 : 15 fois plus rapide que le niveau 9 pour des
+# fichiers 10 % plus gros) et nombre de sauvegardes conservées. La copie avance par
+# paquets de BACKUP_PAGES_PER_STEP pages, avec une pause de BACKUP_STEP_SLEEP_MS entre
+# deux paquets. Sauvegardes automatiques désactivées par défaut (None) : avec un
+# nombre d'heures (par exemple 24), l'application sauvegarde la base à cet intervalle,
+# la première fois un intervalle après son démarrage (ou après la dernière sauvegarde)
+BACKUP_DIRECTORY = "backups"
+BACKUP_COMPRESS = True
+BACKUP_COMPRESSION_LEVEL = 1
+BACKUP_RETENTION = 7
+BACKUP_PAGES_PER_STEP = 1024
+BACKUP_STEP_SLEEP_MS = 5
+BACKUP_INTERVAL_HOURS = None
+
+# Nombre de lignes envoyées par appel à executemany lors des insertions en masse
+BULK_INSERT_CHUNK_SIZE = 10000
+
+# Import de relevés bancaires CSV (`python cli.py import-csv`, page Nouvelle Dépense).
+# En-têtes reconnus pour chaque champ (comparés sans casse ni accents) ; un relevé
+# a soit une colonne de montant signé, soit des colonnes débit et crédit séparées
+IMPORT_COLUMN_RULES = {
+    "date": ["date", "date operation", "date de l'operation", "date comptable", "booking date"],
+    "description": ["libelle", "libelle operation", "description", "label", "intitule"],
+    "amount": ["montant", "montant eur", "amount"],
+    "debit": ["debit", "debit eur"],
+    "credit": ["credit", "credit eur"],
+    "category": ["categorie", "category"]
+}
+
+# Formats de date essayés dans l'ordre
+IMPORT_DATE_FORMATS = ["%d/%m/%Y", "%Y-%m-%d", "%d/%m/%y", "%d-%m-%Y", "%d.%m.%Y"]
+
+# Catégorie attribuée selon le libellé : premier motif (expression régulière,
+# sans casse) trouvé dans la description ; sinon IMPORT_DEFAULT_CATEGORY
+IMPORT_CATEGORY_RULES = [
+    (r"carrefour|leclerc|auchan|lidl|monoprix|intermarche|franprix|boulangerie|restaurant|uber eats|deliveroo", "Alimentation"),
+    (r"sncf|ratp|navigo|uber|bolt|blablacar|total ?energies|esso|shell|carburant|peage|parking", "Transport"),
+    (r"loyer|edf|engie|eau |assurance hab|syndic", "Logement"),
+    (r"pharmacie|docteur|medecin|dentiste|mutuelle|hopital|cpam", "Santé"),
+    (r"netflix|spotify|cinema|deezer|disney|steam|fnac|concert", "Loisirs"),
+    (r"amazon|zara|decathlon|ikea|h&m|cdiscount", "Shopping"),
+    (r"ecole|universite|udemy|coursera|librairie", "Éducation")
+]
+IMPORT_DEFAULT_CATEGORY = "Autres"
+
+# Lignes lues et insérées par paquet lors d'un import
+IMPORT_CHUNK_SIZE = 5000
+
+# Export et import Parquet (pyarrow requis) : lignes par groupe de lignes et compression
+PARQUET_ROW_GROUP_SIZE = 100000
+PARQUET_COMPRESSION = "zstd"
+
+# Lecture paginée et par paquets des dépenses
+HISTORY_PAGE_SIZE = 50
+EXPENSE_CHUNK_SIZE = 5000
+
+# Nombre maximal de dépenses téléchargeables depuis l'historique : Streamlit garde
+# le fichier téléchargé en mémoire, au-delà seule la commande d'export est proposée
+EXPORT_DOWNLOAD_MAX_ROWS = 100000
+
+# Cache des résultats de lecture (nombre maximal d'entrées, None pour désactiver)
+QUERY_CACHE_SIZE = 256
+
+# Requêtes déclaratives compilées gardées en cache (nombre de formes de requête)
+QUERY_STATEMENT_CACHE_SIZE = 128
+
+# Moyennes mobiles des séries d'évolution, en nombre de périodes (jours, semaines, mois)
+SERIES_MOVING_AVERAGES = {'day': (7, 30), 'week': (4, 13), 'month': (3, 12)}
+
+# Moteur des analyses (agrégats quotidiens) :
+# "sqlite" (base principale), "memory" (copie SQLite en mémoire)
+# ou "duckdb" (copie dans un fichier DuckDB, nécessite duckdb)
+# Les copies sont rafraîchies à la lecture quand les données ont changé (seuls les
+# jours modifiés sont recopiés, sauf au-delà de ANALYTICS_FULL_RELOAD_DAYS jours).
+# Avec une copie, les jours modifiés sont notés par des triggers (table rollup_changes) :
+# chaque écriture de dépense coûte une écriture de plus. Avec "sqlite", ces triggers
+# sont retirés à l'ouverture de la base et les écritures n'en paient pas le coût
+ANALYTICS_BACKEND = "sqlite"
+ANALYTICS_FULL_RELOAD_DAYS = 2000
+# Fichier DuckDB, à côté de la base ({stem} : nom de la base sans extension)
+ANALYTICS_DUCKDB_FILENAME = "{stem}.duckdb"
+
+# Durée (ms) au-delà de laquelle une requête est journalisée avec son plan d'exécution
+SLOW_QUERY_THRESHOLD_MS = 200
+
+# Affiche dans la barre latérale les mesures des requêtes de chaque page
+QUERY_DEBUG_PANEL = False
+
+# Tailles (nombre de dépenses) des bases construites par `python -m benchmarks`
+BENCHMARK_SIZES = [10000, 100000, 1000000, 10000000]
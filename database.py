@@ -1,297 +1,1036 @@
-import sqlite3
+import re
+import threading
+import time
 import pandas as pd
-from datetime import datetime
-import os
+from collections import defaultdict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from itertools import islice
+from config.settings import (
+    DATABASE_PATH, ANALYTICS_BACKEND, BACKUP_INTERVAL_HOURS, BULK_INSERT_CHUNK_SIZE, HISTORY_PAGE_SIZE,
+    EXPENSE_CHUNK_SIZE, QUERY_CACHE_SIZE, WRITE_QUEUE_ENABLED
+)
+from storage.analytics import get_analytics_backend
+from storage.backup import get_backup_scheduler
+from storage.cache import cached_query, get_query_cache
+from storage.categories import get_category_registry
+from storage.connection import get_connection_manager
+from storage.encoding import (
+    amount_sql, cents_sql, date_sql, day_sql, from_cents, from_day, to_day
+)
+from storage.instrumentation import QueryRecorder
+from storage.write_queue import get_write_queue
+from storage.series import moving_average_columns, series_query
+from storage.query import (
+    compile_query, finish_frame, merge_partials, partial_spec, search_terms, sorted_in_frame,
+    statement_cache_info, uses_rollup, validate_spec
+)
+from storage.partitions import (
+    ArchiveLookup, archive_year, attach, load_partitions, overlapping, source_groups, union_source
+)
+from storage.migrations import (
+    FULLTEXT_TABLE, ROLLUP_CHANGE_TRIGGERS, SCHEMA_VERSION, apply_migrations, deferred_insert_maintenance,
+    get_schema_version, has_fulltext_index, rebuild_daily_totals, rollup_change_triggers,
+    set_rollup_change_tracking
+)
 
 class ExpenseDatabase:
-    def __init__(self, db_path="expenses.db"):
+    def __init__(self, db_path=DATABASE_PATH):
         self.db_path = db_path
+        # Connexions persistantes partagées par toutes les instances du processus
+        self.connections = get_connection_manager(db_path)
+        # Cache des lectures, invalidé à chaque changement des données
+        self.query_cache = get_query_cache(db_path) if QUERY_CACHE_SIZE else None
+        # Catégories en mémoire, rechargées après chaque écriture de catégorie
+        self.categories = get_category_registry(db_path)
+        # Mesure des requêtes (durée, lignes, attente, requêtes lentes)
+        self.recorder = QueryRecorder()
+        # Ajouts de dépenses regroupés par un thread d'écriture unique (optionnel)
+        self.write_queue = get_write_queue(self.connections) if WRITE_QUEUE_ENABLED else None
+        # Moteur des lectures d'agrégats (base principale, copie en mémoire ou DuckDB)
+        self.analytics = get_analytics_backend(ANALYTICS_BACKEND, self.connections, self._connection)
         self.init_database()
+        # Journal des jours d'agrégats modifiés, tenu seulement pour un moteur à copie
+        self._sync_rollup_change_tracking()
+        # Recherche via l'index FTS5 si disponible, sinon par LIKE
+        self.fulltext = has_fulltext_index(self.connections.connection())
+        # Registre des archives annuelles, relu quand les données changent
+        self._partition_cache = None
     
     def init_database(self):
         """Initialise la base de données avec les tables nécessaires"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Table des catégories
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS categories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL,
-                color TEXT DEFAULT '#1f77b4'
-            )
-        ''')
-        
-        # Table des dépenses
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS expenses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                amount REAL NOT NULL,
-                description TEXT,
-                category_id INTEGER,
-                date TEXT NOT NULL,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (category_id) REFERENCES categories (id)
-            )
-        ''')
-        
-        # Insérer les catégories par défaut
-        default_categories = [
-            ('Alimentation', '#ff7f0e'),
-            ('Transport', '#2ca02c'),
-            ('Logement', '#d62728'),
-            ('Santé', '#9467bd'),
-            ('Loisirs', '#8c564b'),
-            ('Shopping', '#e377c2'),
-            ('Éducation', '#7f7f7f'),
-            ('Autres', '#bcbd22')
-        ]
-        
-        for name, color in default_categories:
-            cursor.execute('''
-                INSERT OR IGNORE INTO categories (name, color) VALUES (?, ?)
-            ''', (name, color))
+        # Chemin rapide : schéma déjà à jour, aucune transaction d'écriture
+        if get_schema_version(self.connections.connection()) >= SCHEMA_VERSION:
+            return
+        
+        with self.connections.transaction() as conn:
+            # Tables, index et catégories par défaut, appliqués de façon incrémentale
+            apply_migrations(conn)
+    
+    def _sync_rollup_change_tracking(self):
+        """Installe les triggers de rollup_changes pour un moteur à copie, les retire sinon"""
+        expected = set(ROLLUP_CHANGE_TRIGGERS) if self.analytics.mirrored else set()
+        # Chemin rapide : triggers déjà dans l'état attendu, aucune transaction d'écriture
+        if rollup_change_triggers(self.connections.connection()) == expected:
+            return
         
-        conn.commit()
-        conn.close()
+        with self.connections.transaction() as conn:
+            set_rollup_change_tracking(conn.cursor(), self.analytics.mirrored)
+    
+    def _connection(self):
+        """Connexion du thread courant (temps d'obtention mesuré)"""
+        start = time.perf_counter()
+        conn = self.connections.connection()
+        self.recorder.add_wait(time.perf_counter() - start)
+        return conn
+    
+    @contextmanager
+    def _transaction(self):
+        """Transaction d'écriture (attente du verrou mesurée)"""
+        start = time.perf_counter()
+        with self.connections.transaction() as conn:
+            self.recorder.add_wait(time.perf_counter() - start)
+            yield conn
+    
+    def _execute(self, conn, query, params=()):
+        """Exécute une écriture mesurée et retourne le curseur"""
+        with self.recorder.trace(conn, query, params) as trace:
+            cursor = conn.execute(query, params)
+            trace.rows = max(cursor.rowcount, 0)
+        return cursor
+    
+    def _fetchall(self, query, params=()):
+        """Exécute une lecture mesurée et retourne toutes les lignes"""
+        conn = self._connection()
+        with self.recorder.trace(conn, query, params) as trace:
+            rows = conn.execute(query, params).fetchall()
+            trace.rows = len(rows)
+        return rows
+    
+    def _fetchone(self, query, params=()):
+        """Exécute une lecture mesurée et retourne la première ligne"""
+        conn = self._connection()
+        with self.recorder.trace(conn, query, params) as trace:
+            row = conn.execute(query, params).fetchone()
+            trace.rows = 0 if row is None else 1
+        return row
+    
+    def _read_frame(self, query, params=()):
+        """Exécute une lecture mesurée et retourne un DataFrame"""
+        conn = self._connection()
+        with self.recorder.trace(conn, query, params) as trace:
+            frame = pd.read_sql_query(query, conn, params=params)
+            trace.rows = len(frame)
+        return frame
+    
+    def _read_totals(self, query, params=()):
+        """Lecture mesurée d'agrégats quotidiens, exécutée par le moteur d'analyse"""
+        with self.analytics.reading() as conn:
+            with self.recorder.trace(conn, query, params) as trace:
+                frame = self.analytics.read_frame(conn, query, params)
+                trace.rows = len(frame)
+        return frame
+    
+    # Montant en euros et date 'YYYY-MM-DD' convertis en centimes et numéro de jour
+    INSERT_EXPENSE_QUERY = f'''
+        INSERT INTO expenses (amount_cents, description, category_id, day)
+        VALUES ({cents_sql('?')}, ?, ?, {day_sql('?')})
+    '''
     
     def add_expense(self, amount, description, category_id, date):
         """Ajoute une nouvelle dépense"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        if self.write_queue is not None:
+            return self.submit_expense(amount, description, category_id, date).result()
+        
+        with self._transaction() as conn:
+            return self._insert_expense(conn, amount, description, category_id, date)
+    
+    def submit_expense(self, amount, description, category_id, date):
+        """
+        Confie l'ajout d'une dépense à la file d'écriture sans attendre sa validation
         
-        cursor.execute('''
-            INSERT INTO expenses (amount, description, category_id, date)
-            VALUES (?, ?, ?, ?)
-        ''', (amount, description, category_id, date))
+        Sans file d'écriture (WRITE_QUEUE_ENABLED désactivé), l'ajout est
+        fait immédiatement et le Future retourné est déjà résolu.
         
-        conn.commit()
-        conn.close()
+        Returns:
+            Future: Résolu avec l'ID de la dépense une fois le lot validé
+        """
+        if self.write_queue is not None:
+            return self.write_queue.submit(
+                self._insert_expense, amount, description, category_id, date
+            )
+        
+        future = Future()
+        try:
+            future.set_result(self.add_expense(amount, description, category_id, date))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    
+    def _insert_expense(self, conn, amount, description, category_id, date):
+        """Insère une dépense dans la transaction en cours et retourne son ID"""
+        cursor = self._execute(
+            conn, self.INSERT_EXPENSE_QUERY, (amount, description, category_id, date)
+        )
         return cursor.lastrowid
     
-    def get_expenses(self, start_date=None, end_date=None, category_name=None):
-        """Récupère les dépenses avec filtres optionnels"""
-        conn = sqlite3.connect(self.db_path)
+    def add_expenses_bulk(self, rows, chunk_size=BULK_INSERT_CHUNK_SIZE):
+        """
+        Ajoute un lot de dépenses dans une seule transaction
         
-        query = '''
-            SELECT e.id, e.amount, e.description, e.date, c.name as category, c.color
-            FROM expenses e
-            LEFT JOIN categories c ON e.category_id = c.id
-        '''
+        Args:
+            rows: Tuples (amount, description, category_id, date), générateur
+                ou DataFrame possédant ces colonnes
+            chunk_size (int): Nombre de lignes par appel à executemany
+        
+        Returns:
+            tuple: (premier_id, dernier_id) des lignes insérées, None si rien n'a été inséré
+        """
+        if isinstance(rows, pd.DataFrame):
+            frame = rows[['amount', 'description', 'category_id', 'date']]
+            if pd.api.types.is_datetime64_any_dtype(frame['date']):
+                frame = frame.assign(date=frame['date'].dt.strftime('%Y-%m-%d'))
+            rows = frame.itertuples(index=False, name=None)
+        
+        with self._transaction() as conn:
+            inserted = self._executemany_chunks(conn, self.INSERT_EXPENSE_QUERY, rows, chunk_size)
+            if inserted == 0:
+                return None
+            last_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+        
+        # Le verrou d'écriture est tenu pendant toute la transaction :
+        # les identifiants AUTOINCREMENT attribués sont donc contigus
+        return last_id - inserted + 1, last_id
+    
+    # Les lignes dont l'empreinte existe déjà sont ignorées (réimport sans effet) ;
+    # contrairement à INSERT OR IGNORE, les autres contraintes restent vérifiées
+    IMPORT_EXPENSE_QUERY = f'''
+        INSERT INTO expenses (amount_cents, description, category_id, day, import_hash)
+        VALUES ({cents_sql('?')}, ?, ?, {day_sql('?')}, ?)
+        ON CONFLICT (import_hash) WHERE import_hash IS NOT NULL DO NOTHING
+    '''
+    
+    def import_expenses_bulk(self, rows, chunk_size=BULK_INSERT_CHUNK_SIZE):
+        """
+        Importe un lot de dépenses identifiées par une empreinte, dans une seule transaction
+        
+        Args:
+            rows: Tuples (amount, description, category_id, date, import_hash),
+                éventuellement un générateur consommé par paquets
+            chunk_size (int): Nombre de lignes par appel à executemany
+        
+        Returns:
+            int: Nombre de lignes insérées (les lignes déjà importées ne comptent pas)
+        """
+        # Les empreintes des années archivées ne sont plus dans l'index unique
+        rows = self._without_archived(
+            rows, 'import_hash', key_index=4, year_of=lambda row: int(row[3][:4]), chunk_size=chunk_size
+        )
+        with self._transaction() as conn:
+            # Agrégats et index plein texte mis à jour en une passe après le chargement
+            with deferred_insert_maintenance(conn.cursor()):
+                return self._executemany_chunks(conn, self.IMPORT_EXPENSE_QUERY, rows, chunk_size)
+    
+    # Restauration : identifiants d'origine conservés, lignes déjà présentes
+    # (même id ou même empreinte d'import) ignorées
+    RESTORE_EXPENSE_QUERY = '''
+        INSERT INTO expenses (id, day, amount_cents, description, category_id, created_at, import_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT DO NOTHING
+    '''
+    
+    def restore_expenses_bulk(self, rows, chunk_size=BULK_INSERT_CHUNK_SIZE):
+        """
+        Restaure des dépenses exportées par iter_expense_records, dans une seule transaction
         
+        Args:
+            rows: Tuples (id, day, amount_cents, description, category_id, created_at,
+                import_hash), éventuellement un générateur consommé par paquets
+            chunk_size (int): Nombre de lignes par appel à executemany
+        
+        Returns:
+            int: Nombre de lignes insérées
+        """
+        rows = self._without_archived(
+            rows, 'id', key_index=0, year_of=lambda row: int(from_day(row[1])[:4]), chunk_size=chunk_size
+        )
+        with self._transaction() as conn:
+            # Les id restaurés peuvent précéder les id existants : recalcul complet
+            with deferred_insert_maintenance(conn.cursor(), rebuild=True):
+                return self._executemany_chunks(conn, self.RESTORE_EXPENSE_QUERY, rows, chunk_size)
+    
+    def _without_archived(self, rows, column, key_index, year_of, chunk_size):
+        """
+        Écarte les lignes dont la clé existe déjà dans l'archive de leur année
+        
+        Args:
+            rows: Lignes à insérer (itérable)
+            column (str): Colonne de la clé ('id' ou 'import_hash')
+            key_index (int): Position de la clé dans une ligne
+            year_of (callable): Année d'une ligne
+            chunk_size (int): Nombre de lignes vérifiées par paquet
+        
+        Yields:
+            tuple: Lignes absentes des archives
+        """
+        partitions = self._partitions()
+        if not partitions:
+            yield from rows
+            return
+        
+        lookup = ArchiveLookup(partitions)
+        rows = iter(rows)
+        try:
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                keys_by_year = defaultdict(list)
+                for row in chunk:
+                    keys_by_year[year_of(row)].append(row[key_index])
+                archived = set()
+                for year, keys in keys_by_year.items():
+                    archived |= lookup.existing(year, column, keys)
+                yield from (row for row in chunk if row[key_index] not in archived)
+        finally:
+            lookup.close()
+    
+    def _executemany_chunks(self, conn, query, rows, chunk_size):
+        """
+        Exécute une insertion par paquets de chunk_size lignes dans la transaction en cours
+        
+        Returns:
+            int: Nombre de lignes insérées (hors modifications faites par les triggers)
+        """
+        rows = iter(rows)
+        inserted = 0
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            with self.recorder.trace(conn, query, chunk[0]) as trace:
+                cursor = conn.executemany(query, chunk)
+                trace.rows = max(cursor.rowcount, 0)
+            inserted += trace.rows
+        return inserted
+    
+    EXPENSE_COLUMNS = ['id', 'amount', 'description', 'date', 'category', 'color']
+    
+    # Colonnes lues dans expenses e ; nom et couleur de catégorie viennent du registre
+    EXPENSE_FIELDS = (
+        f"e.id, {amount_sql('e.amount_cents')} as amount, e.description, "
+        f"{date_sql('e.day')} as date, e.category_id"
+    )
+    
+    def _category_registry(self):
+        """
+        Registre des catégories, chargé à la première utilisation
+        
+        Il est rechargé dès que la génération des données a changé depuis son
+        chargement : écriture de ce processus, restauration, import ou
+        renommage fait par un autre processus (PRAGMA data_version).
+        """
+        registry = self.categories
+        generation = self.connections.data_generation()
+        if registry.loaded() and generation == registry.generation:
+            return registry
+        
+        registry.load(self._fetchall('SELECT id, name, color FROM categories ORDER BY name'), generation)
+        return registry
+    
+    def _category_ids(self, names):
+        """Identifiants des catégories nommées (les noms inconnus sont ignorés)"""
+        registry = self._category_registry()
+        return [registry.by_name[name] for name in names if name in registry.by_name]
+    
+    def _with_categories(self, rows):
+        """Remplace category_id (dernière colonne) par le nom et la couleur de la catégorie"""
+        registry = self._category_registry()
+        names = registry.names
+        colors = registry.colors
+        return [row[:4] + (names.get(row[4]), colors.get(row[4])) for row in rows]
+    
+    def _partitions(self):
+        """Archives annuelles enregistrées (relues quand les données changent)"""
+        generation = self.connections.data_generation()
+        if self._partition_cache is None or self._partition_cache[0] != generation:
+            self._partition_cache = (generation, load_partitions(self._connection(), self.db_path))
+        return self._partition_cache[1]
+    
+    def _source_groups(self, start_date=None, end_date=None):
+        """
+        Planifie la lecture des dépenses d'une période
+        
+        Seules les archives dont l'année recoupe la période sont lues.
+        Au-delà de PARTITION_MAX_ATTACHED archives, la lecture se fait en
+        plusieurs groupes, attachés l'un après l'autre.
+        
+        Returns:
+            list: Groupes d'archives (la base principale est lue avec le premier)
+        """
+        partitions = overlapping(
+            self._partitions(),
+            to_day(start_date) if start_date else None,
+            to_day(end_date) if end_date else None
+        )
+        return source_groups(partitions)
+    
+    def _expense_sources(self, start_date=None, end_date=None):
+        """
+        Attache tour à tour les groupes d'archives d'une période
+        
+        Chaque groupe est à interroger avant de passer au suivant, qui peut
+        détacher ses archives.
+        
+        Yields:
+            list: Schémas interrogés ensemble ('main' dans le premier groupe)
+        """
+        for index, group in enumerate(self._source_groups(start_date, end_date)):
+            schemas = attach(self._connection(), group) if group else []
+            yield (['main'] if index == 0 else []) + schemas
+    
+    def _expenses_query(self, start_date=None, end_date=None, category_name=None, after=None,
+                        schemas=('main',), text=None):
+        """Construit la requête des dépenses, triée par (date, id) décroissants"""
+        query = f'SELECT {self.EXPENSE_FIELDS} FROM {union_source(schemas)} e'
+        
+        conditions, params = self._expense_filters(start_date, end_date, category_name)
+        text_conditions, text_params = self._text_filter(text, schemas)
+        conditions.extend(text_conditions)
+        params.extend(text_params)
+        if after:
+            # Curseur de pagination : dernière ligne (date, id) de la page précédente
+            conditions.append('(e.day, e.id) < (?, ?)')
+            params.extend([to_day(after[0]), after[1]])
+        
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        
+        query += ' ORDER BY e.day DESC, e.id DESC'
+        
+        return query, params
+    
+    def _expense_filters(self, start_date=None, end_date=None, category_name=None):
+        """Conditions communes des requêtes de dépenses (alias e)"""
         params = []
         conditions = []
         
         if start_date:
-            conditions.append('e.date >= ?')
-            params.append(start_date)
+            conditions.append('e.day >= ?')
+            params.append(to_day(start_date))
         if end_date:
-            conditions.append('e.date <= ?')
-            params.append(end_date)
+            conditions.append('e.day <= ?')
+            params.append(to_day(end_date))
         if category_name:
-            conditions.append('c.name = ?')
-            params.append(category_name)
+            # Filtre direct sur l'identifiant, sans jointure
+            category_ids = self._category_ids([category_name])
+            conditions.append('e.category_id = ?')
+            params.append(category_ids[0] if category_ids else None)
         
-        if conditions:
-            query += ' WHERE ' + ' AND '.join(conditions)
+        return conditions, params
+    
+    def _text_filter(self, text, schemas):
+        """
+        Conditions sur la description (alias e), avec les mots de search_expenses
         
-        query += ' ORDER BY e.date DESC'
+        Les dépenses sont retenues par l'index plein texte de chaque base
+        (identifiants uniques entre les bases), sinon par LIKE.
         
-        df = pd.read_sql_query(query, conn, params=params)
-        conn.close()
-        return df
+        Returns:
+            tuple: (conditions, paramètres) ; aucune condition sans texte
+        """
+        if not text:
+            return [], []
+        terms = search_terms(text)
+        if not terms:
+            # Comme search_expenses : un texte sans mot ne trouve rien
+            return ['FALSE'], []
+        if self.fulltext:
+            matches = ' UNION ALL '.join(
+                f'SELECT rowid FROM {schema}.{FULLTEXT_TABLE} WHERE {FULLTEXT_TABLE} MATCH ?'
+                for schema in schemas
+            )
+            return [f'e.id IN ({matches})'], [' '.join(f'"{term}"*' for term in terms)] * len(schemas)
+        return (
+            ["e.description LIKE ? ESCAPE '\\'"] * len(terms),
+            ['%' + term.replace('_', '\\_') + '%' for term in terms]
+        )
     
-    def get_categories(self):
-        """Récupère toutes les catégories"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT id, name, color FROM categories ORDER BY name')
-        categories = cursor.fetchall()
-        conn.close()
-        return categories
-    
-    def get_stats_by_period(self, period='month'):
-        """Récupère les statistiques par période"""
-        conn = sqlite3.connect(self.db_path)
-        
-        if period == 'day':
-            query = '''
-                SELECT date, SUM(amount) as total
-                FROM expenses
-                GROUP BY date
-                ORDER BY date DESC
-            '''
-        elif period == 'week':
-            query = '''
-                SELECT strftime('%Y-%W', date) as week, SUM(amount) as total
-                FROM expenses
-                GROUP BY strftime('%Y-%W', date)
-                ORDER BY week DESC
-            '''
-        elif period == 'month':
-            query = '''
-                SELECT strftime('%Y-%m', date) as month, SUM(amount) as total
-                FROM expenses
-                GROUP BY strftime('%Y-%m', date)
-                ORDER BY month DESC
-            '''
-        
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        return df
+    @cached_query
+    def get_expenses(self, start_date=None, end_date=None, category_name=None):
+        """Récupère les dépenses avec filtres optionnels"""
+        frames = []
+        for schemas in self._expense_sources(start_date, end_date):
+            query, params = self._expenses_query(start_date, end_date, category_name, schemas=schemas)
+            frames.append(self._read_frame(query, params))
+        frame = frames[0]
+        if len(frames) > 1:
+            frame = pd.concat(frames, ignore_index=True).sort_values(
+                ['date', 'id'], ascending=False, ignore_index=True
+            )
+        
+        registry = self._category_registry()
+        frame['category'] = frame['category_id'].map(registry.names)
+        frame['color'] = frame['category_id'].map(registry.colors)
+        return frame[self.EXPENSE_COLUMNS]
     
-    def get_stats_by_category(self, start_date=None, end_date=None):
-        """Récupère les statistiques par catégorie"""
-        conn = sqlite3.connect(self.db_path)
+    @cached_query
+    def get_expenses_page(self, start_date=None, end_date=None, category_name=None,
+                          page_size=HISTORY_PAGE_SIZE, after=None):
+        """
+        Récupère une page de dépenses par pagination sur clé (date, id)
         
-        query = '''
-            SELECT c.name as category, c.color, SUM(e.amount) as total, COUNT(e.id) as count
-            FROM expenses e
-            INNER JOIN categories c ON e.category_id = c.id
-        '''
+        Args:
+            start_date (str, optional): Date de début 'YYYY-MM-DD'
+            end_date (str, optional): Date de fin 'YYYY-MM-DD'
+            category_name (str, optional): Nom de la catégorie
+            page_size (int): Nombre de lignes par page
+            after (tuple, optional): Curseur (date, id) retourné par la page précédente
         
-        params = []
-        conditions = []
+        Returns:
+            tuple: (DataFrame de la page, curseur de la page suivante ou None)
+        """
+        # Une ligne de plus pour savoir s'il existe une page suivante
+        rows = []
+        for schemas in self._expense_sources(start_date, end_date):
+            query, params = self._expenses_query(start_date, end_date, category_name, after, schemas)
+            rows.extend(self._fetchall(query + ' LIMIT ?', params + [page_size + 1]))
+        rows.sort(key=lambda row: (row[3], row[0]), reverse=True)
+        rows = rows[:page_size + 1]
+        has_next = len(rows) > page_size
+        rows = self._with_categories(rows[:page_size])
         
-        if start_date:
-            conditions.append('e.date >= ?')
-            params.append(start_date)
-        if end_date:
-            conditions.append('e.date <= ?')
-            params.append(end_date)
+        page = pd.DataFrame(rows, columns=self.EXPENSE_COLUMNS)
+        next_cursor = (rows[-1][3], rows[-1][0]) if has_next else None
+        return page, next_cursor
+    
+    @cached_query
+    def search_expenses(self, text, start_date=None, end_date=None, category_name=None,
+                        limit=HISTORY_PAGE_SIZE, offset=0):
+        """
+        Recherche les dépenses dont la description contient les mots saisis
+        
+        Chaque mot est cherché comme préfixe (« uber ea » trouve « Uber Eats »),
+        sans tenir compte des majuscules ni des accents. Les résultats sont
+        classés par pertinence (bm25) puis par date décroissante.
+        
+        Args:
+            text (str): Texte saisi par l'utilisateur
+            start_date (str, optional): Date de début 'YYYY-MM-DD'
+            end_date (str, optional): Date de fin 'YYYY-MM-DD'
+            category_name (str, optional): Nom de la catégorie
+            limit (int): Nombre de lignes par page
+            offset (int): Nombre de résultats à sauter
+        
+        Returns:
+            tuple: (DataFrame de la page, offset de la page suivante ou None)
+        """
+        # Seuls les mots sont conservés : la syntaxe FTS5 saisie n'est pas interprétée
+        terms = re.findall(r'\w+', text.lower())
+        if not terms:
+            return pd.DataFrame(columns=self.EXPENSE_COLUMNS), None
+        
+        merged = len(self._source_groups(start_date, end_date)) > 1
+        rows = []
+        for schemas in self._expense_sources(start_date, end_date):
+            query, params = self._search_query(terms, start_date, end_date, category_name, schemas)
+            if not merged:
+                # Une ligne de plus pour savoir s'il existe une page suivante
+                rows = self._fetchall(query + ' LIMIT ? OFFSET ?', params + [limit + 1, offset])
+            else:
+                # Plusieurs groupes d'archives : fusion des meilleurs résultats de chacun
+                rows.extend(self._fetchall(query + ' LIMIT ?', params + [offset + limit + 1]))
+        if merged:
+            rows.sort(key=lambda row: (row[3], row[0]), reverse=True)
+            if self.fulltext:
+                rows.sort(key=lambda row: row[5], reverse=True)
+            rows = rows[offset:offset + limit + 1]
+        has_next = len(rows) > limit
+        
+        page = pd.DataFrame(self._with_categories(rows[:limit]), columns=self.EXPENSE_COLUMNS)
+        return page, offset + limit if has_next else None
+    
+    def _search_query(self, terms, start_date, end_date, category_name, schemas):
+        """Construit la requête de recherche, triée par pertinence puis (date, id) décroissants"""
+        conditions, params = self._expense_filters(start_date, end_date, category_name)
+        
+        if self.fulltext:
+            match = ' '.join(f'"{term}"*' for term in terms)
+            # Un index plein texte par base : une branche par schéma, pertinence en 6e colonne.
+            # Le score bm25 dépend des statistiques de chaque index : il est rapporté au
+            # meilleur score de l'index (1 = meilleure correspondance) pour être comparable.
+            branches = ' UNION ALL '.join(
+                f'''SELECT e.id, e.amount_cents, e.description, e.category_id, e.day,
+                          f.rank / MIN(f.rank) OVER () AS relevance
+                   FROM {schema}.{FULLTEXT_TABLE} f
+                   INNER JOIN {schema}.expenses e ON e.id = f.rowid
+                   WHERE f.{FULLTEXT_TABLE} MATCH ?'''
+                for schema in schemas
+            )
+            query = f'SELECT {self.EXPENSE_FIELDS}, e.relevance FROM ({branches}) e'
+            params = [match] * len(schemas) + params
+            order = 'e.relevance DESC, e.day DESC, e.id DESC'
+        else:
+            # Sans FTS5, parcours de la table (lent sur les gros historiques)
+            query = f'SELECT {self.EXPENSE_FIELDS} FROM {union_source(schemas)} e'
+            for term in terms:
+                conditions.append("e.description LIKE ? ESCAPE '\\'")
+                params.append('%' + term.replace('_', '\\_') + '%')
+            order = 'e.day DESC, e.id DESC'
         
         if conditions:
             query += ' WHERE ' + ' AND '.join(conditions)
+        return query + f' ORDER BY {order}', params
+    
+    def iter_expense_rows(self, start_date=None, end_date=None, category_name=None,
+                          chunk_size=EXPENSE_CHUNK_SIZE, text=None):
+        """
+        Parcourt les dépenses par paquets sans tout charger en mémoire
         
-        query += '''
-            GROUP BY c.id, c.name, c.color
-            ORDER BY total DESC
-        '''
+        Args:
+            start_date (str, optional): Date de début 'YYYY-MM-DD'
+            end_date (str, optional): Date de fin 'YYYY-MM-DD'
+            category_name (str, optional): Nom de la catégorie
+            chunk_size (int): Nombre de lignes par paquet
+            text (str, optional): Mots cherchés dans la description (comme search_expenses)
+        
+        Yields:
+            list: Tuples (id, amount, description, date, category, color)
+        """
+        for schemas in self._expense_sources(start_date, end_date):
+            query, params = self._expenses_query(
+                start_date, end_date, category_name, schemas=schemas, text=text
+            )
+            for rows in self._iter_chunks(query, params, chunk_size):
+                yield self._with_categories(rows)
+    
+    # Colonnes telles que stockées, dans l'ordre des fichiers en colonnes (storage/columnar.py)
+    EXPENSE_RECORD_FIELDS = 'e.id, e.day, e.amount_cents, e.description, e.category_id, e.created_at, e.import_hash'
+    
+    def iter_expense_records(self, start_date=None, end_date=None, category_name=None,
+                             chunk_size=EXPENSE_CHUNK_SIZE, text=None):
+        """
+        Parcourt par paquets les dépenses telles que stockées, par date croissante
+        
+        Args:
+            start_date (str, optional): Date de début 'YYYY-MM-DD'
+            end_date (str, optional): Date de fin 'YYYY-MM-DD'
+            category_name (str, optional): Nom de la catégorie
+            chunk_size (int): Nombre de lignes par paquet
+            text (str, optional): Mots cherchés dans la description (comme search_expenses)
+        
+        Yields:
+            list: Tuples (id, day, amount_cents, description, category_id, created_at, import_hash)
+                (par date croissante dans chaque groupe d'archives)
+        """
+        for schemas in self._expense_sources(start_date, end_date):
+            conditions, params = self._expense_filters(start_date, end_date, category_name)
+            text_conditions, text_params = self._text_filter(text, schemas)
+            conditions.extend(text_conditions)
+            params.extend(text_params)
+            where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+            # Ordre de l'index idx_expenses_day : aucun tri sur la base principale seule
+            query = (
+                f'SELECT {self.EXPENSE_RECORD_FIELDS} FROM {union_source(schemas)} e'
+                f'{where} ORDER BY e.day, e.id'
+            )
+            yield from self._iter_chunks(query, params, chunk_size)
+    
+    def _iter_chunks(self, query, params, chunk_size):
+        """Exécute une lecture mesurée et en produit les lignes par paquets"""
+        conn = self._connection()
         
-        df = pd.read_sql_query(query, conn, params=params)
-        conn.close()
-        return df
+        # Seul le temps passé dans SQLite est mesuré, pas celui du consommateur
+        elapsed = 0.0
+        fetched = 0
+        start = time.perf_counter()
+        cursor = conn.execute(query, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                elapsed += time.perf_counter() - start
+                if not rows:
+                    break
+                fetched += len(rows)
+                yield rows
+                start = time.perf_counter()
+        finally:
+            cursor.close()
+            self.recorder.record(conn, query, params, elapsed, fetched)
     
+    def iter_expenses(self, start_date=None, end_date=None, category_name=None,
+                      chunk_size=EXPENSE_CHUNK_SIZE):
+        """
+        Parcourt les dépenses filtrées sous forme de DataFrames successifs
+        
+        Yields:
+            DataFrame: Au plus chunk_size dépenses, même colonnes que get_expenses
+        """
+        for rows in self.iter_expense_rows(start_date, end_date, category_name, chunk_size):
+            yield pd.DataFrame(rows, columns=self.EXPENSE_COLUMNS)
+    
+    def get_categories(self):
+        """Récupère toutes les catégories (depuis le registre en mémoire)"""
+        return self._category_registry().all()
+    
+    @cached_query
+    def get_stats_by_period(self, period='month', start_date=None, end_date=None,
+                            category_names=None):
+        """
+        Récupère les totaux par période, de la plus récente à la plus ancienne
+        
+        Args:
+            period (str): 'day', 'week' (semaine ISO, '2024-W01'), 'month' ('2024-01'),
+                'quarter' ('2024-Q1') ou 'year' (2024)
+            start_date (str, optional): Date de début 'YYYY-MM-DD'
+            end_date (str, optional): Date de fin 'YYYY-MM-DD'
+            category_names (list, optional): Noms des catégories à inclure
+        
+        Returns:
+            DataFrame: Colonnes (date, week, month, quarter ou year selon la période) et total
+        """
+        category_ids = self._category_ids(category_names) if category_names else None
+        # Agrégats pré-calculés, regroupés par la colonne de la période
+        query, params = self.analytics.period_totals_query(period, start_date, end_date, category_ids)
+        return self._read_totals(query, params)
+    
+    @cached_query
+    def get_stats_by_category(self, start_date=None, end_date=None):
+        """Récupère les statistiques par catégorie"""
+        # Lecture des agrégats pré-calculés (jours × catégories) plutôt que des dépenses
+        query, params = self.analytics.category_totals_query(start_date, end_date)
+        
+        stats = self._read_totals(query, params)
+        return self._name_categories(stats)[['category', 'color', 'total', 'count']]
+    
+    @cached_query
     def get_total_expenses(self, start_date=None, end_date=None):
         """Calcule le total des dépenses"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        condition, params = self._date_range_condition('day', start_date, end_date)
+        query = f'SELECT SUM(total_cents) FROM daily_category_totals WHERE {condition}'
+        
+        total_cents = self._fetchone(query, params)[0]
+        return from_cents(total_cents) if total_cents else 0
+    
+    @cached_query
+    def get_period_summary(self, current_range, previous_range):
+        """
+        Calcule en une seule requête les indicateurs de deux périodes
         
-        query = 'SELECT SUM(amount) FROM expenses'
+        Args:
+            current_range (tuple): (date_début, date_fin) de la période actuelle
+            previous_range (tuple): (date_début, date_fin) de la période précédente
+        
+        Returns:
+            dict: {'current': {...}, 'previous': {...}} avec pour chaque période
+                les clés total, count, average et max
+        """
+        periods = [('current', current_range), ('previous', previous_range)]
+        columns = []
         params = []
         
-        if start_date or end_date:
-            query += ' WHERE'
-            conditions = []
-            if start_date:
-                conditions.append('date >= ?')
-                params.append(start_date)
-            if end_date:
-                conditions.append('date <= ?')
-                params.append(end_date)
-            query += ' ' + ' AND '.join(conditions)
-        
-        cursor.execute(query, params)
-        total = cursor.fetchone()[0] or 0
-        conn.close()
-        return total
+        # Agrégation conditionnelle : chaque période filtre ses propres lignes
+        # (moyenne déduite du total et du nombre : les résultats partiels s'additionnent)
+        for _, (start_date, end_date) in periods:
+            condition, condition_params = self._date_range_condition('day', start_date, end_date)
+            for aggregate in ('SUM(CASE WHEN {} THEN amount_cents END)',
+                              'COUNT(CASE WHEN {} THEN 1 END)',
+                              'MAX(CASE WHEN {} THEN amount_cents END)'):
+                columns.append(aggregate.format(condition))
+                params.extend(condition_params)
+        
+        # Seule l'enveloppe des deux périodes est parcourue (via l'index sur la date)
+        starts = [period[0] for _, period in periods]
+        ends = [period[1] for _, period in periods]
+        envelope_start = None if None in starts else min(starts)
+        envelope_end = None if None in ends else max(ends)
+        envelope, envelope_params = self._date_range_condition('day', envelope_start, envelope_end)
+        params.extend(envelope_params)
+        
+        # Base principale et archives de l'enveloppe, fusionnées groupe par groupe
+        totals = [[0, 0, None] for _ in periods]
+        for schemas in self._expense_sources(envelope_start, envelope_end):
+            query = f'SELECT {", ".join(columns)} FROM {union_source(schemas)} WHERE {envelope}'
+            row = self._fetchone(query, params)
+            for index, merged in enumerate(totals):
+                total, count, maximum = row[index * 3:index * 3 + 3]
+                merged[0] += total or 0
+                merged[1] += count
+                if maximum is not None:
+                    merged[2] = maximum if merged[2] is None else max(merged[2], maximum)
+        
+        summary = {}
+        for (name, _), (total, count, maximum) in zip(periods, totals):
+            summary[name] = {
+                'total': from_cents(total) if total else 0,
+                'count': count,
+                'average': from_cents(total / count) if count else 0,
+                'max': from_cents(maximum) if maximum else 0
+            }
+        return summary
+    
+    @staticmethod
+    def _date_range_condition(column, start_date=None, end_date=None):
+        """Construit la condition SQL d'un intervalle de dates sur une colonne de numéros de jour"""
+        conditions = []
+        params = []
+        if start_date:
+            conditions.append(f'{column} >= ?')
+            params.append(to_day(start_date))
+        if end_date:
+            conditions.append(f'{column} <= ?')
+            params.append(to_day(end_date))
+        return (' AND '.join(conditions) or '1'), params
     
     def add_category(self, name, color):
         """Ajoute une nouvelle catégorie"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO categories (name, color)
-            VALUES (?, ?)
-        ''', (name, color))
+        with self._transaction() as conn:
+            cursor = self._execute(conn, '''
+                INSERT INTO categories (name, color)
+                VALUES (?, ?)
+            ''', (name, color))
         
-        conn.commit()
-        conn.close()
+        self.categories.invalidate()
         return cursor.lastrowid
     
     def update_category(self, category_id, name, color):
         """Met à jour une catégorie"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE categories 
-            SET name = ?, color = ?
-            WHERE id = ?
-        ''', (name, color, category_id))
+        with self._transaction() as conn:
+            self._execute(conn, '''
+                UPDATE categories
+                SET name = ?, color = ?
+                WHERE id = ?
+            ''', (name, color, category_id))
         
-        conn.commit()
-        conn.close()
+        self.categories.invalidate()
     
     def delete_category(self, category_id):
         """Supprime une catégorie"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._transaction() as conn:
+            # Vérifier s'il y a des dépenses associées
+            # Dépenses de la base principale et des archives annuelles
+            count = self._fetchone(
+                '''SELECT (SELECT COUNT(*) FROM expenses WHERE category_id = ?)
+                        + (SELECT IFNULL(SUM(count), 0) FROM partition_totals WHERE category_id = ?)''',
+                (category_id, category_id)
+            )[0]
+            
+            if count > 0:
+                return False, f"Il y a {count} dépense(s) associée(s) à cette catégorie. Impossible de la supprimer."
+            
+            self._execute(conn, 'DELETE FROM categories WHERE id = ?', (category_id,))
         
-        # Vérifier s'il y a des dépenses associées
-        cursor.execute('SELECT COUNT(*) FROM expenses WHERE category_id = ?', (category_id,))
-        count = cursor.fetchone()[0]
+        self.categories.invalidate()
+        return True, "Catégorie supprimée avec succès"
+    
+    def rebuild_daily_totals(self):
+        """Recalcule la table d'agrégats quotidiens depuis les dépenses"""
+        with self._transaction() as conn:
+            rebuild_daily_totals(conn.cursor())
+    
+    def archive_year(self, year):
+        """
+        Déplace les dépenses d'une année close dans son fichier d'archive
         
-        if count > 0:
-            conn.close()
-            return False, f"Il y a {count} dépense(s) associée(s) à cette catégorie. Impossible de la supprimer."
+        Returns:
+            int: Nombre de dépenses déplacées
+        """
+        return archive_year(self.connections, year, self.fulltext)
+    
+    def get_partitions(self):
+        """
+        Archives annuelles enregistrées
         
-        cursor.execute('DELETE FROM categories WHERE id = ?', (category_id,))
-        conn.commit()
-        conn.close()
-        return True, "Catégorie supprimée avec succès"
+        Returns:
+            list: Partition (year, path, first_day, last_day, rows) triées par année
+        """
+        return list(self._partitions())
     
-    def get_category_by_id(self, category_id):
-        """Récupère une catégorie par son ID"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def vacuum(self):
+        """Compacte le fichier de la base (utile après une migration qui recrée des tables)"""
+        conn = self._connection()
+        self._execute(conn, 'VACUUM')
+    
+    def query_stats(self, reset=False):
+        """
+        Mesures des requêtes exécutées par le thread courant (la réexécution en cours)
         
-        cursor.execute('SELECT id, name, color FROM categories WHERE id = ?', (category_id,))
-        category = cursor.fetchone()
-        conn.close()
-        return category
+        Args:
+            reset (bool): Remet les compteurs à zéro après lecture
+        
+        Returns:
+            dict: queries, total_ms, wait_ms, rows, slow_queries et détail by_query
+        """
+        return self.recorder.snapshot(reset)
+    
+    def cache_stats(self):
+        """
+        Statistiques du cache de lecture
+        
+        Returns:
+            dict: hits, misses, hit_ratio, size, maxsize, invalidations (None si désactivé)
+        """
+        return self.query_cache.stats() if self.query_cache is not None else None
+    
+    def analytics_stats(self):
+        """
+        Statistiques de la copie des agrégats servant les analyses
+        
+        Returns:
+            dict: backend, full_loads, refreshes, days_copied, rows (None pour le moteur sqlite)
+        """
+        return self.analytics.stats()
+    
+    def query_statement_stats(self):
+        """
+        Statistiques du cache des requêtes déclaratives compilées
+        
+        Returns:
+            dict: hits, misses, size, maxsize
+        """
+        return statement_cache_info()
+    
+    def get_category_by_id(self, category_id):
+        """Récupère une catégorie par son ID (depuis le registre en mémoire)"""
+        return self._category_registry().by_id.get(category_id)
     
+    @cached_query
     def get_daily_expenses(self, start_date, end_date):
         """Récupère les dépenses quotidiennes pour une période donnée"""
-        conn = sqlite3.connect(self.db_path)
-        
-        query = '''
-            SELECT date, SUM(amount) as total
-            FROM expenses
-            WHERE date >= ? AND date <= ?
-            GROUP BY date
-            ORDER BY date ASC
+        query = f'''
+            SELECT {date_sql('day')} as date, SUM(total_cents) / 100.0 as total
+            FROM daily_category_totals
+            WHERE day >= ? AND day <= ?
+            GROUP BY day
+            ORDER BY day ASC
         '''
         
-        df = pd.read_sql_query(query, conn, params=[start_date, end_date])
-        conn.close()
-        return df
+        return self._read_frame(query, [to_day(start_date), to_day(end_date)])
     
+    @cached_query
     def get_daily_expenses_by_category(self, start_date, end_date, category_names=None):
         """Récupère les dépenses quotidiennes par catégorie pour une période donnée"""
-        conn = sqlite3.connect(self.db_path)
+        category_ids = self._category_ids(category_names) if category_names else None
+        query, params = self.analytics.daily_category_query(start_date, end_date, category_ids)
         
-        query = '''
-            SELECT e.date, c.name as category, c.color, SUM(e.amount) as total
-            FROM expenses e
-            INNER JOIN categories c ON e.category_id = c.id
-            WHERE e.date >= ? AND e.date <= ?
-        '''
+        daily = self._name_categories(self._read_totals(query, params))
+        daily = daily.sort_values(['date', 'category'], kind='stable', ignore_index=True)
+        return daily[['date', 'category', 'color', 'total']]
+    
+    @cached_query
+    def get_expense_series(self, start_date, end_date, period='day', category_names=None,
+                           by_category=False):
+        """
+        Série d'évolution des dépenses, périodes sans dépense comprises (total nul)
         
-        params = [start_date, end_date]
+        Moyennes mobiles, cumul et écart avec la période précédente sont
+        calculés en SQL (storage/series.py).
         
-        if category_names:
-            placeholders = ','.join(['?' for _ in category_names])
-            query += f' AND c.name IN ({placeholders})'
-            params.extend(category_names)
+        Args:
+            start_date (str): Date de début 'YYYY-MM-DD'
+            end_date (str): Date de fin 'YYYY-MM-DD'
+            period (str): 'day', 'week' (semaines ISO complètes) ou 'month' (mois complets)
+            category_names (list, optional): Noms des catégories à inclure
+            by_category (bool): Une série par catégorie plutôt qu'une série totale
         
-        query += '''
-            GROUP BY e.date, c.id, c.name, c.color
-            ORDER BY e.date ASC, c.name ASC
-        '''
+        Returns:
+            DataFrame: date, week ou month ; category et color (par catégorie) ; total ;
+                moyennes mobiles (SERIES_MOVING_AVERAGES, par exemple ma_7 et ma_30 par jour) ;
+                cumulative (depuis le début de la série) ; previous, change et change_pct
+                (période précédente, écart et écart relatif)
+        
+        Raises:
+            ValueError: Si la période n'a pas de série
+        """
+        category_ids = self._category_ids(category_names) if category_names else None
+        query, params = series_query(period, start_date, end_date, category_ids, by_category)
+        series = self._read_frame(query, params)
+        if not by_category:
+            return series
+        
+        label = series.columns[0]
+        series = self._name_categories(series)
+        series = series.sort_values([label, 'category'], kind='stable', ignore_index=True)
+        measures = ['total'] + moving_average_columns(period) + ['cumulative', 'previous', 'change', 'change_pct']
+        return series[[label, 'category', 'color'] + measures]
+    
+    @cached_query
+    def query(self, spec):
+        """
+        Exécute une requête déclarative en un seul aller-retour (storage/query.py)
+        
+        Les specs sans filtre de montant ni de texte, et dont les mesures sont
+        calculables par jour et catégorie, lisent les agrégats quotidiens via
+        le moteur d'analyse ; les autres lisent les dépenses, archives comprises.
+        
+        Args:
+            spec (QuerySpec): Filtres, dimensions, mesures, tri et limite
+        
+        Returns:
+            DataFrame: Une colonne par dimension (category et color pour la catégorie),
+                puis une par mesure (total, count, average, min, max)
+        
+        Raises:
+            ValueError: Si une dimension, une mesure ou une colonne de tri est inconnue
+        """
+        validate_spec(spec)
+        category_ids = self._category_ids(spec.categories) if spec.categories is not None else None
+        sort = sorted_in_frame(spec)
         
-        df = pd.read_sql_query(query, conn, params=params)
-        conn.close()
-        return df
+        if uses_rollup(spec):
+            query, params = compile_query(spec, category_ids, date_expr=self.analytics.date_expr)
+            frame = self._read_totals(query, params)
+        else:
+            merged = len(self._source_groups(spec.start_date, spec.end_date)) > 1
+            # Plusieurs groupes d'archives : résultats partiels fusionnés, puis triés
+            executed = partial_spec(spec) if merged else spec
+            frames = []
+            for schemas in self._expense_sources(spec.start_date, spec.end_date):
+                query, params = compile_query(executed, category_ids, schemas=schemas, fulltext=self.fulltext)
+                frames.append(self._read_frame(query, params))
+            frame = merge_partials(frames, spec) if merged else frames[0]
+            sort = sort or merged
+        
+        if 'category' in spec.group_by:
+            frame = self._name_categories(frame)
+        return finish_frame(frame, spec, sort)
+    
+    def _name_categories(self, frame):
+        """
+        Ajoute les colonnes category et color d'un DataFrame d'agrégats par category_id
+        
+        Les lignes des catégories inconnues (dépenses sans catégorie) sont écartées.
+        """
+        registry = self._category_registry()
+        frame = frame[frame['category_id'].isin(registry.by_id.keys())].reset_index(drop=True)
+        frame['category'] = frame['category_id'].map(registry.names)
+        frame['color'] = frame['category_id'].map(registry.colors)
+        return frame
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+def get_database(db_path=DATABASE_PATH):
+    """
+    Retourne l'instance d'ExpenseDatabase partagée par tout le processus
+    
+    Les pages l'appellent à chaque réexécution : l'initialisation (vérification
+    du schéma) n'a lieu qu'une seule fois par fichier de base. Les sauvegardes
+    automatiques, si BACKUP_INTERVAL_HOURS est renseigné, démarrent avec la
+    première instance.
+    
+    Args:
+        db_path (str): Chemin du fichier SQLite
+    
+    Returns:
+        ExpenseDatabase: Instance partagée
+    """
+    with _databases_lock:
+        db = _databases.get(db_path)
+        if db is None:
+            db = ExpenseDatabase(db_path)
+            _databases[db_path] = db
+            if BACKUP_INTERVAL_HOURS:
+                get_backup_scheduler(db_path).start()
+        return db
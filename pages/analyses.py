@@ -4,8 +4,10 @@ Page d'analyses pour l'application D-Tracker
 
 import streamlit as st
 from datetime import datetime, timedelta
-from database import ExpenseDatabase
-from components.charts import render_category_analysis, render_category_evolution
+from database import get_database
+from components.sidebar import render_query_debug_panel
+from components.charts import render_category_analysis, render_category_evolution, series_overlay_options
+from storage.query import QuerySpec
 from utils.date_utils import get_period_dates
 from config.settings import CSS_STYLES
 
@@ -14,8 +16,8 @@ st.markdown(CSS_STYLES, unsafe_allow_html=True)
 
 st.header("Analyses Détaillées")
 
-# Initialisation de la base de données
-db = ExpenseDatabase()
+# Base de données partagée par toutes les sessions
+db = get_database()
 
 # Sélecteur de période pour la section "Analyse par Catégorie"
 st.subheader("Analyse par Catégorie")
@@ -35,8 +37,14 @@ analysis_end_str = end_date
 # Affichage de la période sélectionnée
 st.caption(f"Période : {period_label}")
 
-# Récupérer toutes les catégories disponibles pour cette période
-category_analysis = db.get_stats_by_category(analysis_start_str, analysis_end_str)
+# Récupérer toutes les catégories disponibles pour cette période (total et nombre de dépenses)
+category_analysis = db.query(QuerySpec(
+    group_by=('category',),
+    measures=('sum', 'count'),
+    start_date=analysis_start_str,
+    end_date=analysis_end_str,
+    order_by=('-total',)
+))
 available_categories = category_analysis['category'].tolist() if len(category_analysis) > 0 else []
 
 # Graphiques barres et camembert
@@ -92,9 +100,15 @@ if available_categories:
             st.caption(f"Période : {evolution_label}")
         
         if evolution_start_str and evolution_end_str:
-            # Récupérer les catégories disponibles pour cette période personnalisée
-            evolution_category_analysis = db.get_stats_by_category(evolution_start_str, evolution_end_str)
-            available_categories = evolution_category_analysis['category'].tolist() if len(evolution_category_analysis) > 0 else []
+            # Catégories ayant des dépenses sur la période personnalisée, de la plus grosse à la plus
+            # petite : le total (agrégats quotidiens) ordonne la liste et désigne les 5 présélectionnées
+            evolution_categories = db.query(QuerySpec(
+                group_by=('category',),
+                start_date=evolution_start_str,
+                end_date=evolution_end_str,
+                order_by=('-total',)
+            ))
+            available_categories = evolution_categories['category'].tolist()
     
     # Multi-sélecteur de catégories
     if evolution_start_str and evolution_end_str:
@@ -105,17 +119,43 @@ if available_categories:
             key="selected_categories_evolution"
         )
         
+        # Granularité de la série et courbes superposées (calculées en SQL)
+        col_granularity, col_overlays = st.columns([1, 2])
+        with col_granularity:
+            granularity_labels = {'day': "Jour", 'week': "Semaine", 'month': "Mois"}
+            evolution_granularity = st.radio(
+                "Granularité",
+                options=list(granularity_labels),
+                format_func=granularity_labels.get,
+                key="evolution_granularity",
+                horizontal=True
+            )
+        with col_overlays:
+            overlay_options = series_overlay_options(evolution_granularity)
+            evolution_overlays = st.multiselect(
+                "Superpositions",
+                options=list(overlay_options),
+                format_func=overlay_options.get,
+                key=f"evolution_overlays_{evolution_granularity}"
+            )
+        
         if selected_categories:
-            # Récupérer les dépenses quotidiennes par catégorie
-            daily_by_category = db.get_daily_expenses_by_category(
+            # Série par catégorie, périodes sans dépense comprises
+            series_by_category = db.get_expense_series(
                 evolution_start_str,
                 evolution_end_str,
-                selected_categories
+                evolution_granularity,
+                selected_categories,
+                by_category=True
             )
             
             # Afficher le graphique en courbes
-            render_category_evolution(daily_by_category, selected_categories)
+            render_category_evolution(
+                series_by_category, selected_categories, evolution_overlays, evolution_granularity
+            )
         else:
             st.info("Veuillez sélectionner au moins une catégorie pour afficher le graphique.")
     else:
         st.info("Veuillez sélectionner un intervalle de dates valide.")
+
+render_query_debug_panel(db)
@@ -3,7 +3,8 @@ Page de gestion des catégories pour l'application D-Tracker
 """
 
 import streamlit as st
-from database import ExpenseDatabase
+from database import get_database
+from components.sidebar import render_query_debug_panel
 from config.settings import CSS_STYLES
 
 # Application du CSS personnalisé
@@ -11,8 +12,8 @@ st.markdown(CSS_STYLES, unsafe_allow_html=True)
 
 st.header("Gérer les Catégories")
 
-# Initialisation de la base de données
-db = ExpenseDatabase()
+# Base de données partagée par toutes les sessions
+db = get_database()
 
 # Initialisation de l'onglet actif
 if 'category_tab' not in st.session_state:
@@ -141,3 +142,5 @@ with tab3:
                             st.error("❌ Le nom de la catégorie ne peut pas être vide.")
     else:
         st.info("Aucune catégorie à modifier.")
+
+render_query_debug_panel(db)
@@ -4,9 +4,11 @@ Page Dashboard pour l'application D-Tracker
 
 import streamlit as st
 from datetime import datetime, timedelta
-from database import ExpenseDatabase
+from database import get_database
 from components.metrics import render_summary_metrics
-from components.charts import render_category_progress, render_daily_evolution
+from components.charts import render_category_progress, render_daily_evolution, series_overlay_options
+from components.sidebar import render_query_debug_panel
+from storage.query import QuerySpec
 from utils.date_utils import get_period_dates
 from config.settings import CSS_STYLES
 
@@ -15,8 +17,8 @@ st.markdown(CSS_STYLES, unsafe_allow_html=True)
 
 st.header("Dashboard")
 
-# Initialisation de la base de données
-db = ExpenseDatabase()
+# Base de données partagée par toutes les sessions
+db = get_database()
 
 # Sélecteur de période
 col_title, col_select = st.columns([3, 1])
@@ -35,25 +37,27 @@ with col_select:
 # Obtention des dates de période
 start_date, end_date, prev_start, prev_end, period_label, prev_label = get_period_dates(period_choice)
 
-# Obtention des données de la période actuelle et précédente
-current_expenses = db.get_total_expenses(start_date, end_date)
-previous_expenses = db.get_total_expenses(prev_start, prev_end)
-
-current_expenses_list = db.get_expenses(start_date, end_date)
-previous_expenses_list = db.get_expenses(prev_start, prev_end)
-
-current_count = len(current_expenses_list)
-previous_count = len(previous_expenses_list)
+# Obtention des indicateurs de la période actuelle et précédente (une seule requête)
+summary = db.get_period_summary((start_date, end_date), (prev_start, prev_end))
 
 # Rendu des métriques de résumé
-render_summary_metrics(current_expenses, previous_expenses, current_count, previous_count)
+render_summary_metrics(
+    summary['current']['total'],
+    summary['previous']['total'],
+    summary['current']['count'],
+    summary['previous']['count']
+)
 
 st.markdown("---")
 
 # Répartition par catégorie
 st.subheader("Répartition par Catégorie")
-category_stats = db.get_stats_by_category(start_date, end_date)
-print(category_stats)
+category_stats = db.query(QuerySpec(
+    group_by=('category',),
+    start_date=start_date,
+    end_date=end_date,
+    order_by=('-total',)
+))
 render_category_progress(category_stats)
 
 # Graphique d'évolution quotidienne
@@ -61,10 +65,21 @@ st.subheader("Évolution des 7 Derniers Jours")
 end_date_7_days = datetime.now()
 start_date_7_days = end_date_7_days - timedelta(days=6)
 
-daily_expenses = db.get_daily_expenses(
-    start_date_7_days.strftime("%Y-%m-%d"), 
+# Moyennes mobiles, cumul et jour précédent superposables aux barres
+overlay_options = series_overlay_options('day')
+daily_overlays = st.multiselect(
+    "Superpositions",
+    options=list(overlay_options),
+    format_func=overlay_options.get,
+    key="dashboard_overlays"
+)
+
+# Série quotidienne : jours sans dépense compris, moyennes calculées sur l'historique
+daily_expenses = db.get_expense_series(
+    start_date_7_days.strftime("%Y-%m-%d"),
     end_date_7_days.strftime("%Y-%m-%d")
 )
 
-render_daily_evolution(daily_expenses)
+render_daily_evolution(daily_expenses, daily_overlays)
 
+render_query_debug_panel(db)
@@ -2,19 +2,24 @@
 Page d'historique pour l'application D-Tracker
 """
 
+import os
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
-from database import ExpenseDatabase
-from config.settings import CSS_STYLES
+from database import get_database
+from components.sidebar import render_query_debug_panel
+from storage.columnar import export_expenses_parquet_to_tempfile
+from storage.export import export_expenses_csv_to_tempfile
+from storage.query import QuerySpec
+from config.settings import CSS_STYLES, EXPORT_DOWNLOAD_MAX_ROWS
 
 # Application du CSS personnalisé
 st.markdown(CSS_STYLES, unsafe_allow_html=True)
 
 st.header("Historique des Dépenses")
 
-# Initialisation de la base de données
-db = ExpenseDatabase()
+# Base de données partagée par toutes les sessions
+db = get_database()
 
 # Filtres
 col1, col2, col3 = st.columns(3)
@@ -40,15 +45,41 @@ with col3:
         ["Toutes"] + [cat[1] for cat in categories]
     )
 
+# Recherche plein texte dans les descriptions
+search_text = st.text_input(
+    "Rechercher dans les descriptions",
+    placeholder="ex. uber eats",
+    key="history_search"
+).strip()
+
 history_start_str = history_start.strftime("%Y-%m-%d")
 history_end_str = history_end.strftime("%Y-%m-%d")
 
-# Obtention des dépenses
-expenses_history = db.get_expenses(
-    history_start_str, 
-    history_end_str, 
-    category_filter if category_filter != "Toutes" else None
-)
+category_name = category_filter if category_filter != "Toutes" else None
+
+# Pagination : pile des curseurs des pages déjà visitées, réinitialisée si les filtres changent
+history_filters = (history_start_str, history_end_str, category_name, search_text)
+if st.session_state.get("history_filters") != history_filters:
+    st.session_state.history_filters = history_filters
+    st.session_state.history_cursors = [None]
+
+# Obtention de la page courante uniquement
+if search_text:
+    # Résultats classés par pertinence ; le curseur est alors un décalage
+    expenses_history, next_cursor = db.search_expenses(
+        search_text,
+        history_start_str,
+        history_end_str,
+        category_name,
+        offset=st.session_state.history_cursors[-1] or 0
+    )
+else:
+    expenses_history, next_cursor = db.get_expenses_page(
+        history_start_str,
+        history_end_str,
+        category_name,
+        after=st.session_state.history_cursors[-1]
+    )
 
 if len(expenses_history) > 0:
     # Formatage des données pour l'affichage
@@ -65,14 +96,86 @@ if len(expenses_history) > 0:
         hide_index=True
     )
     
-    # Bouton d'export
-    if st.button("Exporter en CSV"):
-        csv = expenses_history.to_csv(index=False)
-        st.download_button(
-            label="Télécharger le fichier CSV",
-            data=csv,
-            file_name=f"depenses_{history_start_str}_{history_end_str}.csv",
-            mime="text/csv"
+    # Navigation entre les pages
+    page_number = len(st.session_state.history_cursors)
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    
+    with col_prev:
+        if st.button("← Précédente", disabled=page_number == 1, key="history_prev"):
+            st.session_state.history_cursors.pop()
+            st.rerun()
+    
+    with col_page:
+        st.caption(f"Page {page_number}")
+    
+    with col_next:
+        if st.button("Suivante →", disabled=next_cursor is None, key="history_next"):
+            st.session_state.history_cursors.append(next_cursor)
+            st.rerun()
+    
+    # Nombre de dépenses exportées (agrégats quotidiens, sauf avec une recherche)
+    export_count = db.query(QuerySpec(
+        measures=('count',),
+        start_date=history_start_str,
+        end_date=history_end_str,
+        categories=[category_name] if category_name else None,
+        text=search_text or None
+    ))['count'].iloc[0] or 0
+    
+    if export_count > EXPORT_DOWNLOAD_MAX_ROWS:
+        # Streamlit garde le fichier téléchargé en mémoire : au-delà du seuil,
+        # seule la ligne de commande, qui écrit le fichier en flux, est proposée
+        category_option = f' --category "{category_name}"' if category_name else ''
+        search_option = f' --search "{search_text}"' if search_text else ''
+        st.info(
+            f"{export_count} dépenses à exporter : au-delà de {EXPORT_DOWNLOAD_MAX_ROWS}, "
+            "l'export se fait en ligne de commande, sans charger le fichier en mémoire."
+        )
+        st.code(
+            f"python cli.py export-csv --start {history_start_str} --end {history_end_str}"
+            f"{category_option}{search_option} -o depenses.csv",
+            language="bash"
         )
+    else:
+        # Boutons d'export (écrits par paquets dans un fichier temporaire), avec la recherche en cours
+        col_csv, col_parquet = st.columns(2)
+        
+        with col_csv:
+            if st.button("Exporter en CSV"):
+                csv_path, _ = export_expenses_csv_to_tempfile(
+                    db, history_start_str, history_end_str, category_name, text=search_text
+                )
+                try:
+                    with open(csv_path, 'rb') as csv_file:
+                        st.download_button(
+                            label="Télécharger le fichier CSV",
+                            data=csv_file,
+                            file_name=f"depenses_{history_start_str}_{history_end_str}.csv",
+                            mime="text/csv"
+                        )
+                finally:
+                    os.remove(csv_path)
+        
+        with col_parquet:
+            if st.button("Exporter en Parquet"):
+                try:
+                    parquet_path, _ = export_expenses_parquet_to_tempfile(
+                        db, history_start_str, history_end_str, category_name, text=search_text
+                    )
+                except ImportError as e:
+                    st.error(f"❌ {str(e)}")
+                else:
+                    try:
+                        with open(parquet_path, 'rb') as parquet_file:
+                            st.download_button(
+                                label="Télécharger le fichier Parquet",
+                                data=parquet_file,
+                                file_name=f"depenses_{history_start_str}_{history_end_str}.parquet",
+                                mime="application/vnd.apache.parquet"
+                            )
+                    finally:
+                        os.remove(parquet_path)
 else:
     st.info("Aucune dépense trouvée pour les critères sélectionnés.")
+
+render_query_debug_panel(db)
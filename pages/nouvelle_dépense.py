@@ -4,7 +4,9 @@ Page de nouvelle dépense pour l'application D-Tracker
 
 import streamlit as st
 from datetime import datetime
-from database import ExpenseDatabase
+from database import get_database
+from components.sidebar import render_query_debug_panel
+from storage.importer import import_statement_csv
 from config.settings import CSS_STYLES
 
 # Application du CSS personnalisé
@@ -12,8 +14,8 @@ st.markdown(CSS_STYLES, unsafe_allow_html=True)
 
 st.header("Enregistrer une Nouvelle Dépense")
 
-# Initialisation de la base de données
-db = ExpenseDatabase()
+# Base de données partagée par toutes les sessions
+db = get_database()
 
 with st.form("expense_form"):
     col1, col2 = st.columns(2)
@@ -59,3 +61,31 @@ with st.form("expense_form"):
                 st.error(f"❌ Erreur lors de l'enregistrement : {str(e)}")
         else:
             st.error("❌ Le montant doit être supérieur à 0 €")
+
+# Import d'un relevé bancaire : les opérations déjà importées sont ignorées
+with st.expander("Importer un relevé bancaire (CSV)"):
+    statement_file = st.file_uploader("Relevé CSV", type=["csv"], key="statement_file")
+    statement_encoding = st.selectbox(
+        "Encodage",
+        ["utf-8-sig", "latin-1", "cp1252"],
+        key="statement_encoding"
+    )
+    
+    if statement_file is not None and st.button("Importer le relevé", key="statement_import"):
+        try:
+            with st.spinner("Import en cours..."):
+                report = import_statement_csv(db, statement_file, statement_encoding)
+        except (ValueError, UnicodeDecodeError) as e:
+            st.error(f"❌ Import impossible : {str(e)}")
+        else:
+            st.success(
+                f"✅ {report['inserted']} dépense(s) importée(s) sur {report['read']} ligne(s)"
+            )
+            st.caption(
+                f"{report['duplicates']} déjà présente(s) · {report['skipped']} crédit(s) ignoré(s) · "
+                f"{report['rejected']} ligne(s) rejetée(s)"
+            )
+            for error in report['errors']:
+                st.warning(error)
+
+render_query_debug_panel(db)
@@ -0,0 +1 @@
+# Storage module for D-Tracker application
@@ -0,0 +1,510 @@
+"""
+Moteurs de lecture des agrégats pour l'application D-Tracker
+
+Les statistiques (par catégorie, par période, quotidiennes par catégorie)
+lisent les agrégats quotidiens daily_category_totals. ExpenseDatabase
+délègue ces lectures au moteur choisi par ANALYTICS_BACKEND :
+
+- "sqlite" : la base principale, par la connexion du thread courant ;
+- "memory" : une copie de la table dans une base SQLite en mémoire, qui
+  ne lit plus le fichier partagé avec les écrivains ;
+- "duckdb" : une copie dans un fichier DuckDB (moteur en colonnes à
+  exécution vectorisée, dépendance optionnelle importée à la demande).
+
+Les copies sont rafraîchies à la lecture quand la génération des données a
+changé. Les triggers de daily_category_totals notent dans rollup_changes
+chaque jour modifié avec un numéro de version croissant : seuls les jours
+modifiés depuis la dernière copie sont relus. Ces triggers ne sont installés
+qu'avec un moteur à copie (ExpenseDatabase les retire avec "sqlite").
+
+Seul le rafraîchissement est exclusif : chaque thread lit ensuite la copie
+par sa propre connexion, sans verrou, en parallèle des autres lectures.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+from config.settings import ANALYTICS_DUCKDB_FILENAME, ANALYTICS_FULL_RELOAD_DAYS
+from storage.encoding import date_sql, period_key, to_day
+from storage.migrations import PERIOD_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Colonnes stockées de la table d'agrégats (les colonnes de période sont générées)
+ROLLUP_COLUMNS = 'day, category_id, total_cents, count'
+
+# Nombre maximal de paramètres par requête IN (...)
+DAY_BATCH_SIZE = 500
+
+
+def _duckdb():
+    """Importe duckdb à la demande"""
+    try:
+        import duckdb
+    except ImportError:
+        raise ImportError("Le moteur d'analyse DuckDB nécessite duckdb : pip install duckdb") from None
+    return duckdb
+
+
+class SQLiteBackend:
+    """
+    Agrégats lus dans la base principale
+
+    Définit l'interface commune aux moteurs : reading() fournit une
+    connexion, les méthodes *_query construisent (requête, paramètres) et
+    read_frame exécute une requête sur la connexion.
+    """
+
+    name = 'sqlite'
+    # Copie à rafraîchir depuis le journal rollup_changes (triggers installés à l'ouverture)
+    mirrored = False
+    # Date 'YYYY-MM-DD' des lignes d'agrégats regroupées par jour
+    date_expr = date_sql('day')
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    @contextmanager
+    def reading(self):
+        """
+        Connexion sur laquelle exécuter les requêtes du moteur
+
+        Yields:
+            Connexion du moteur (à utiliser en lecture seule)
+        """
+        yield self._connection()
+
+    def read_frame(self, conn, query, params):
+        """Exécute une requête du moteur et retourne un DataFrame"""
+        return pd.read_sql_query(query, conn, params=params)
+
+    def stats(self):
+        """Compteurs du moteur (None : aucune copie à tenir à jour)"""
+        return None
+
+    @staticmethod
+    def _conditions(start_date=None, end_date=None, category_ids=None):
+        """Conditions sur l'intervalle de dates et les catégories"""
+        conditions = []
+        params = []
+        if start_date:
+            conditions.append('day >= ?')
+            params.append(to_day(start_date))
+        if end_date:
+            conditions.append('day <= ?')
+            params.append(to_day(end_date))
+        if category_ids is not None:
+            if category_ids:
+                conditions.append(f"category_id IN ({', '.join('?' * len(category_ids))})")
+                params.extend(category_ids)
+            else:
+                conditions.append('FALSE')
+        return ' AND '.join(conditions) or 'TRUE', params
+
+    def category_totals_query(self, start_date=None, end_date=None):
+        """Total et nombre de dépenses par catégorie, du plus gros total au plus petit"""
+        condition, params = self._conditions(start_date, end_date)
+        return f'''
+            SELECT category_id, SUM(total_cents) / 100.0 as total, CAST(SUM(count) AS BIGINT) as count
+            FROM daily_category_totals
+            WHERE {condition}
+            GROUP BY category_id
+            ORDER BY total DESC, category_id
+        ''', params
+
+    def daily_category_query(self, start_date, end_date, category_ids=None):
+        """Total par jour et par catégorie, par date croissante"""
+        condition, params = self._conditions(start_date, end_date, category_ids)
+        return f'''
+            SELECT {self.date_expr} as date, category_id, SUM(total_cents) / 100.0 as total
+            FROM daily_category_totals
+            WHERE {condition}
+            GROUP BY day, category_id
+            ORDER BY day ASC, category_id
+        ''', params
+
+    def period_totals_query(self, period, start_date=None, end_date=None, category_ids=None):
+        """
+        Total par période, de la plus récente à la plus ancienne
+
+        Raises:
+            ValueError: Si la période est inconnue
+        """
+        condition, params = self._conditions(start_date, end_date, category_ids)
+        conditions = [condition]
+
+        if period == 'day':
+            key = 'day'
+            label = f'{self.date_expr} as date'
+        elif period in PERIOD_COLUMNS:
+            key = PERIOD_COLUMNS[period]
+            label = f'{key} as {period}'
+            # Bornes sur la colonne de période : parcours d'une plage de son index
+            if start_date:
+                conditions.append(f'{key} >= ?')
+                params.append(period_key(period, start_date))
+            if end_date:
+                conditions.append(f'{key} <= ?')
+                params.append(period_key(period, end_date))
+        else:
+            raise ValueError(f"Période inconnue : {period}")
+
+        return f'''
+            SELECT {label}, SUM(total_cents) / 100.0 as total
+            FROM daily_category_totals
+            WHERE {' AND '.join(conditions)}
+            GROUP BY {key}
+            ORDER BY {key} DESC
+        ''', params
+
+
+class MirroredBackend(SQLiteBackend):
+    """Copie des agrégats, rafraîchie jour par jour depuis la base principale"""
+
+    mirrored = True
+
+    def __init__(self, connections, full_reload_days=ANALYTICS_FULL_RELOAD_DAYS):
+        super().__init__(connections.connection)
+        self.connections = connections
+        self.full_reload_days = full_reload_days
+        # Connexion du rafraîchissement (verrou tenu) ; les lectures ont leur connexion par thread
+        self.conn = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # État de la copie publié pour les lectures
+        self.snapshot = None
+        self.generation = None
+        # Dernière version de rollup_changes copiée (None : copie pas encore chargée)
+        self.version = None
+        self.full_loads = 0
+        self.refreshes = 0
+        self.days_copied = 0
+
+    @contextmanager
+    def reading(self):
+        """
+        Connexion du thread courant à la copie, à jour
+
+        Le verrou n'est tenu que pour le rafraîchissement : la requête
+        s'exécute sur la connexion du thread, sans bloquer les autres lectures.
+        """
+        previous = None
+        with self._lock:
+            if self.conn is None:
+                self.conn = self._open()
+            self._refresh()
+            # Connexion ouverte verrou tenu : l'état publié ne peut pas être remplacé entre-temps
+            reader = getattr(self._local, 'reader', None)
+            if reader is None or self._local.snapshot != self.snapshot:
+                previous = reader
+                reader = self._connect_reader(self.snapshot)
+                self._local.reader = reader
+                self._local.snapshot = self.snapshot
+        if previous is not None:
+            previous.close()
+        yield reader
+
+    def _open(self):
+        """Ouvre la base de la copie (chargée à la première lecture)"""
+        raise NotImplementedError
+
+    def _publish(self):
+        """Rend l'état courant de la copie visible des lectures (verrou tenu)"""
+        self.snapshot = self.conn
+
+    def _connect_reader(self, snapshot):
+        """Ouvre la connexion de lecture d'un thread sur un état publié"""
+        raise NotImplementedError
+
+    def _refresh(self):
+        """Recopie les jours modifiés depuis la dernière lecture"""
+        generation = self.connections.data_generation()
+        if generation == self.generation:
+            return
+
+        source = self._connection()
+        # Version et agrégats lus dans la même transaction de lecture
+        own_transaction = not source.in_transaction
+        if own_transaction:
+            source.execute('BEGIN')
+        try:
+            version = source.execute('SELECT IFNULL(MAX(version), 0) FROM rollup_changes').fetchone()[0]
+            if self.version is None or version < self.version:
+                # Premier chargement, ou base remplacée (restauration)
+                self._load(source, version)
+            elif version > self.version:
+                days = [row[0] for row in source.execute(
+                    'SELECT day FROM rollup_changes WHERE version > ?', (self.version,)
+                )]
+                if len(days) > self.full_reload_days:
+                    self._load(source, version)
+                else:
+                    self._copy_days(source, days, version)
+            if self.version != version:
+                self._publish()
+        finally:
+            if own_transaction:
+                source.execute('COMMIT')
+
+        self.version = version
+        self.generation = generation
+
+    def _load(self, source, version):
+        """Remplace entièrement la copie"""
+        raise NotImplementedError
+
+    def _copy_days(self, source, days, version):
+        """Remplace dans la copie les agrégats des jours donnés"""
+        raise NotImplementedError
+
+    def stats(self):
+        """
+        Compteurs de la copie
+
+        Returns:
+            dict: backend, full_loads, refreshes, days_copied, rows
+        """
+        with self._lock:
+            rows = (
+                self.conn.execute('SELECT COUNT(*) FROM daily_category_totals').fetchone()[0]
+                if self.conn is not None and self.version is not None else 0
+            )
+            return {
+                'backend': self.name,
+                'full_loads': self.full_loads,
+                'refreshes': self.refreshes,
+                'days_copied': self.days_copied,
+                'rows': rows
+            }
+
+
+class MemoryBackend(MirroredBackend):
+    """
+    Copie des agrégats dans une base SQLite en mémoire
+
+    La copie est tenue à jour dans une base privée. Après chaque
+    rafraîchissement, elle est recopiée (API de sauvegarde) dans une nouvelle
+    base en mémoire partagée (cache partagé), qui n'est plus modifiée : les
+    threads la lisent chacun par leur connexion, sans conflit de verrou avec
+    le rafraîchissement suivant. Une base publiée disparaît avec la dernière
+    connexion qui la lit.
+    """
+
+    name = 'memory'
+
+    def __init__(self, connections, full_reload_days=ANALYTICS_FULL_RELOAD_DAYS):
+        super().__init__(connections, full_reload_days)
+        self.published = 0
+        # Connexion maintenant en vie la dernière base publiée
+        self._keeper = None
+
+    def _open(self):
+        return sqlite3.connect(':memory:', check_same_thread=False, isolation_level=None)
+
+    def _publish(self):
+        self.published += 1
+        uri = f'file:analytics-{id(self)}-{self.published}?mode=memory&cache=shared'
+        keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self.conn.backup(keeper)
+        previous, self._keeper = self._keeper, keeper
+        self.snapshot = uri
+        if previous is not None:
+            previous.close()
+
+    def _connect_reader(self, snapshot):
+        conn = sqlite3.connect(snapshot, uri=True, check_same_thread=False)
+        conn.execute('PRAGMA query_only = 1')
+        return conn
+
+    @contextmanager
+    def _writing(self):
+        """Transaction sur la base en mémoire (annulée en cas d'erreur)"""
+        self.conn.execute('BEGIN')
+        try:
+            yield
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        self.conn.execute('COMMIT')
+
+    def _load(self, source, version):
+        """Recrée la table en mémoire à l'identique et la remplit entièrement"""
+        schema = source.execute(
+            "SELECT type, sql FROM sqlite_master WHERE tbl_name = 'daily_category_totals' AND sql IS NOT NULL"
+        ).fetchall()
+        rows = source.execute(f'SELECT {ROLLUP_COLUMNS} FROM daily_category_totals').fetchall()
+
+        with self._writing():
+            self.conn.execute('DROP TABLE IF EXISTS daily_category_totals')
+            # Table puis index (créés après le remplissage)
+            for kind, sql in sorted(schema, key=lambda item: item[0] != 'table'):
+                if kind == 'table':
+                    self.conn.execute(sql)
+                    self.conn.executemany(
+                        f'INSERT INTO daily_category_totals ({ROLLUP_COLUMNS}) VALUES (?, ?, ?, ?)', rows
+                    )
+                elif kind == 'index':
+                    self.conn.execute(sql)
+        self.full_loads += 1
+
+    def _copy_days(self, source, days, version):
+        with self._writing():
+            for start in range(0, len(days), DAY_BATCH_SIZE):
+                batch = days[start:start + DAY_BATCH_SIZE]
+                placeholders = ', '.join('?' * len(batch))
+                rows = source.execute(
+                    f'SELECT {ROLLUP_COLUMNS} FROM daily_category_totals WHERE day IN ({placeholders})',
+                    batch
+                ).fetchall()
+                self.conn.execute(f'DELETE FROM daily_category_totals WHERE day IN ({placeholders})', batch)
+                self.conn.executemany(
+                    f'INSERT INTO daily_category_totals ({ROLLUP_COLUMNS}) VALUES (?, ?, ?, ?)', rows
+                )
+        self.refreshes += 1
+        self.days_copied += len(days)
+
+
+class DuckDBBackend(MirroredBackend):
+    """
+    Copie des agrégats dans un fichier DuckDB, à côté de la base
+
+    Les colonnes de date et de période sont copiées telles que SQLite les
+    calcule : les résultats sont identiques à ceux des autres moteurs. La
+    copie est rechargée entièrement à la première lecture du processus (la
+    base a pu être modifiée ou restaurée entre-temps). Si le fichier est
+    déjà ouvert par un autre processus, la copie est faite en mémoire.
+    """
+
+    name = 'duckdb'
+    # Colonne copiée, hors du GROUP BY : une valeur quelconque du groupe (toutes égales)
+    date_expr = 'any_value(date)'
+    COLUMNS = ['day', 'category_id', 'total_cents', 'count', 'date'] + list(PERIOD_COLUMNS.values())
+
+    def __init__(self, connections, full_reload_days=ANALYTICS_FULL_RELOAD_DAYS):
+        super().__init__(connections, full_reload_days)
+        stem = os.path.splitext(os.path.basename(connections.db_path))[0]
+        self.path = os.path.join(
+            os.path.dirname(os.path.abspath(connections.db_path)),
+            ANALYTICS_DUCKDB_FILENAME.format(stem=stem)
+        )
+        self.duckdb = _duckdb()
+
+    def _open(self):
+        try:
+            conn = self.duckdb.connect(self.path)
+        except self.duckdb.IOException as e:
+            logger.warning("Copie DuckDB %s indisponible (%s) : copie en mémoire", self.path, e)
+            conn = self.duckdb.connect()
+
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS daily_category_totals (
+                day BIGINT NOT NULL,
+                category_id BIGINT NOT NULL,
+                total_cents BIGINT NOT NULL,
+                count BIGINT NOT NULL,
+                date VARCHAR NOT NULL,
+                year_week VARCHAR NOT NULL,
+                year_month VARCHAR NOT NULL,
+                year_quarter VARCHAR NOT NULL,
+                year BIGINT NOT NULL
+            )
+        ''')
+        return conn
+
+    def _connect_reader(self, snapshot):
+        # Connexion distincte à la même base : les transactions du rafraîchissement
+        # (MVCC) ne sont visibles qu'une fois validées
+        return snapshot.cursor()
+
+    def read_frame(self, conn, query, params):
+        return conn.execute(query, params).df()
+
+    def _select(self, where=''):
+        """Lecture des colonnes copiées, date et périodes calculées par SQLite"""
+        return (
+            f"SELECT {ROLLUP_COLUMNS}, {date_sql('day')}, {', '.join(PERIOD_COLUMNS.values())} "
+            f"FROM daily_category_totals {where}"
+        )
+
+    def _frame(self, rows):
+        """Lignes lues dans SQLite -> DataFrame aux colonnes de la copie"""
+        return pd.DataFrame(rows, columns=self.COLUMNS)
+
+    @contextmanager
+    def _writing(self):
+        """Transaction DuckDB (annulée en cas d'erreur)"""
+        self.conn.begin()
+        try:
+            yield
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+
+    def _load(self, source, version):
+        frame = self._frame(source.execute(self._select()).fetchall())
+        with self._writing():
+            self.conn.execute('DELETE FROM daily_category_totals')
+            self.conn.register('rollup_rows', frame)
+            self.conn.execute('INSERT INTO daily_category_totals SELECT * FROM rollup_rows')
+            self.conn.unregister('rollup_rows')
+        self.full_loads += 1
+
+    def _copy_days(self, source, days, version):
+        with self._writing():
+            for start in range(0, len(days), DAY_BATCH_SIZE):
+                batch = days[start:start + DAY_BATCH_SIZE]
+                placeholders = ', '.join('?' * len(batch))
+                frame = self._frame(
+                    source.execute(self._select(f'WHERE day IN ({placeholders})'), batch).fetchall()
+                )
+                self.conn.execute(f'DELETE FROM daily_category_totals WHERE day IN ({placeholders})', batch)
+                self.conn.register('rollup_rows', frame)
+                self.conn.execute('INSERT INTO daily_category_totals SELECT * FROM rollup_rows')
+                self.conn.unregister('rollup_rows')
+        self.refreshes += 1
+        self.days_copied += len(days)
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'memory': MemoryBackend,
+    'duckdb': DuckDBBackend
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_analytics_backend(name, connections, connection):
+    """
+    Retourne le moteur de lecture des agrégats
+
+    Args:
+        name (str): 'sqlite', 'memory' ou 'duckdb'
+        connections (ConnectionManager): Gestionnaire de la base
+        connection (callable): Retourne la connexion du thread courant (moteur 'sqlite')
+
+    Returns:
+        SQLiteBackend: Moteur ; les copies sont communes à tout le processus
+
+    Raises:
+        ValueError: Si le moteur est inconnu
+        ImportError: Si duckdb n'est pas installé (moteur 'duckdb')
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Moteur d'analyse inconnu : {name} ({', '.join(BACKENDS)})")
+    if name == 'sqlite':
+        return SQLiteBackend(connection)
+
+    with _backends_lock:
+        backend = _backends.get((name, connections.db_path))
+        if backend is None:
+            backend = BACKENDS[name](connections)
+            _backends[(name, connections.db_path)] = backend
+        return backend
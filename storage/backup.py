@@ -0,0 +1,487 @@
+"""
+Sauvegardes en ligne de la base pour l'application D-Tracker
+
+Copier expenses.db pendant une écriture peut produire une copie incohérente
+(et le fichier WAL n'est pas copié). Les sauvegardes passent par l'API de
+sauvegarde de SQLite, par paquets de BACKUP_PAGES_PER_STEP pages avec une
+courte pause entre deux paquets : la copie d'une grosse base ne monopolise
+ni le disque ni le processus.
+
+La base source est lue dans une transaction de lecture ouverte pendant toute
+la copie : en WAL, elle ne bloque aucun écrivain et la sauvegarde est un
+instantané de la base à son début (les écritures suivantes restent dans le
+WAL jusqu'à la fin de la copie). Les archives annuelles enregistrées sont
+copiées dans le même instantané.
+
+Une sauvegarde est un dossier <base>-AAAAMMJJ-HHMMSS contenant chaque
+fichier (compressé en gzip) et un manifeste (empreinte SHA-256, taille,
+version du schéma). La restauration vérifie empreinte et intégrité de
+chaque fichier avant de remplacer quoi que ce soit.
+"""
+
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from config.settings import (
+    BACKUP_COMPRESS, BACKUP_COMPRESSION_LEVEL, BACKUP_DIRECTORY, BACKUP_INTERVAL_HOURS, BACKUP_PAGES_PER_STEP,
+    BACKUP_RETENTION, BACKUP_STEP_SLEEP_MS
+)
+from storage.migrations import SCHEMA_VERSION, get_schema_version
+from storage.partitions import load_partitions
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+SNAPSHOT_TIME_FORMAT = '%Y%m%d-%H%M%S'
+# Taille des blocs lus lors de la compression et de la décompression
+COPY_BUFFER_SIZE = 1 << 20
+# Suffixe des archives annuelles absentes d'une sauvegarde restaurée (mises de côté)
+ORPHAN_SUFFIX = '.avant-restauration'
+
+Snapshot = namedtuple('Snapshot', ['name', 'path', 'created_at', 'files', 'size'])
+
+
+def backup_directory(db_path, directory=BACKUP_DIRECTORY):
+    """Dossier des sauvegardes (un chemin relatif part du dossier de la base)"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), directory)
+
+
+def _stem(db_path):
+    """Nom de la base sans extension"""
+    return os.path.splitext(os.path.basename(db_path))[0]
+
+
+def _throttle(progress, name, step_sleep_ms):
+    """Rappel de conn.backup : pause entre deux paquets de pages et suivi de l'avancement"""
+    def callback(status, remaining, total):
+        if progress is not None:
+            progress(name, total - remaining, total)
+        if remaining and step_sleep_ms:
+            time.sleep(step_sleep_ms / 1000)
+    return callback
+
+
+def _copy_database(source, target_path, name, pages_per_step, step_sleep_ms, progress,
+                   standalone=False):
+    """Copie une base ouverte vers un fichier par paquets de pages"""
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target, pages=pages_per_step, progress=_throttle(progress, name, step_sleep_ms))
+        if standalone:
+            # Copie de sauvegarde sans WAL : elle tient dans un seul fichier
+            target.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        target.close()
+
+
+def _check_database(path, full=False):
+    """
+    Vérifie l'intégrité d'une base copiée
+
+    Returns:
+        tuple: (version du schéma, nombre de pages)
+
+    Raises:
+        ValueError: Si la base est corrompue
+    """
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        check = 'integrity_check' if full else 'quick_check'
+        result = [row[0] for row in conn.execute(f'PRAGMA {check}')]
+        if result != ['ok']:
+            raise ValueError(f"Base corrompue ({os.path.basename(path)}) : {'; '.join(result[:5])}")
+        return get_schema_version(conn), conn.execute('PRAGMA page_count').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _store(path, target, compress):
+    """
+    Range un fichier copié dans la sauvegarde (compressé ou non)
+
+    Returns:
+        tuple: (taille du fichier d'origine, empreinte SHA-256 de son contenu)
+    """
+    digest = hashlib.sha256()
+    if compress:
+        output = gzip.open(target, 'wb', compresslevel=BACKUP_COMPRESSION_LEVEL)
+    else:
+        output = open(target, 'wb')
+    with open(path, 'rb') as source, output:
+        while True:
+            block = source.read(COPY_BUFFER_SIZE)
+            if not block:
+                break
+            digest.update(block)
+            output.write(block)
+    return os.path.getsize(path), digest.hexdigest()
+
+
+def create_backup(db_path, directory=BACKUP_DIRECTORY, compress=BACKUP_COMPRESS,
+                  pages_per_step=BACKUP_PAGES_PER_STEP, step_sleep_ms=BACKUP_STEP_SLEEP_MS,
+                  progress=None):
+    """
+    Sauvegarde la base et ses archives annuelles sans bloquer l'application
+
+    Args:
+        db_path (str): Chemin de la base
+        directory (str): Dossier des sauvegardes
+        compress (bool): Compresse les fichiers en gzip
+        pages_per_step (int): Pages copiées par étape
+        step_sleep_ms (int): Pause entre deux étapes
+        progress (callable, optional): Appelé avec (fichier, pages copiées, pages totales)
+
+    Returns:
+        Snapshot: Sauvegarde créée
+    """
+    directory = backup_directory(db_path, directory)
+    os.makedirs(directory, exist_ok=True)
+    created_at = datetime.now()
+    base_name = name = f'{_stem(db_path)}-{created_at.strftime(SNAPSHOT_TIME_FORMAT)}'
+    # Plusieurs sauvegardes dans la même seconde : suffixe -2, -3...
+    suffix = 1
+    while os.path.exists(os.path.join(directory, name)) or os.path.exists(
+            os.path.join(directory, name + '.partial')):
+        suffix += 1
+        name = f'{base_name}-{suffix}'
+    partial = os.path.join(directory, name + '.partial')
+    os.makedirs(partial)
+
+    source = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        # Instantané de lecture tenu pendant toute la copie (base et archives)
+        source.execute('BEGIN')
+        partitions = load_partitions(source, db_path) if _has_partitions(source) else []
+        databases = [(os.path.basename(db_path), db_path, False)] + [
+            (os.path.basename(partition.path), partition.path, True) for partition in partitions
+        ]
+
+        files = []
+        for filename, source_path, is_archive in databases:
+            copy_path = os.path.join(partial, filename + '.tmp')
+            if is_archive:
+                if not os.path.exists(source_path):
+                    raise FileNotFoundError(f"Archive introuvable : {source_path}")
+                conn = sqlite3.connect(f'file:{source_path}?mode=ro', uri=True)
+            else:
+                conn = source
+            try:
+                _copy_database(
+                    conn, copy_path, filename, pages_per_step, step_sleep_ms, progress, standalone=True
+                )
+            finally:
+                if is_archive:
+                    conn.close()
+            schema_version, pages = _check_database(copy_path)
+
+            stored = filename + '.gz' if compress else filename
+            size, sha256 = _store(copy_path, os.path.join(partial, stored), compress)
+            os.remove(copy_path)
+            files.append({
+                'name': filename,
+                'stored': stored,
+                'archive': is_archive,
+                'size': size,
+                'pages': pages,
+                'schema_version': schema_version,
+                'sha256': sha256
+            })
+        source.execute('COMMIT')
+    except BaseException:
+        shutil.rmtree(partial, ignore_errors=True)
+        raise
+    finally:
+        source.close()
+
+    manifest = {
+        'database': os.path.basename(db_path),
+        'created_at': created_at.isoformat(timespec='seconds'),
+        'schema_version': files[0]['schema_version'],
+        'compressed': compress,
+        'files': files
+    }
+    with open(os.path.join(partial, MANIFEST_NAME), 'w', encoding='utf-8') as handle:
+        json.dump(manifest, handle, indent=2)
+
+    # Visible sous son nom définitif seulement une fois complète
+    path = os.path.join(directory, name)
+    os.rename(partial, path)
+    return _snapshot(path, manifest)
+
+
+def _has_partitions(conn):
+    """Indique si la base a un registre d'archives (schéma à jour)"""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'partitions'"
+    ).fetchone() is not None
+
+
+def _snapshot(path, manifest):
+    """Snapshot décrit par un manifeste"""
+    size = sum(
+        os.path.getsize(os.path.join(path, entry['stored'])) for entry in manifest['files']
+    )
+    return Snapshot(
+        os.path.basename(path), path, manifest['created_at'],
+        [entry['name'] for entry in manifest['files']], size
+    )
+
+
+def _read_manifest(path):
+    """Manifeste d'une sauvegarde, None s'il est absent ou illisible"""
+    try:
+        with open(os.path.join(path, MANIFEST_NAME), encoding='utf-8') as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def list_backups(db_path, directory=BACKUP_DIRECTORY):
+    """
+    Sauvegardes complètes d'une base
+
+    Returns:
+        list: Snapshot de la plus récente à la plus ancienne
+    """
+    directory = backup_directory(db_path, directory)
+    if not os.path.isdir(directory):
+        return []
+
+    prefix = _stem(db_path) + '-'
+    snapshots = []
+    for entry in os.listdir(directory):
+        path = os.path.join(directory, entry)
+        if not entry.startswith(prefix) or entry.endswith('.partial') or not os.path.isdir(path):
+            continue
+        manifest = _read_manifest(path)
+        if manifest is not None and manifest.get('database') == os.path.basename(db_path):
+            snapshots.append(_snapshot(path, manifest))
+    return sorted(snapshots, key=lambda snapshot: snapshot.name, reverse=True)
+
+
+def prune_backups(db_path, directory=BACKUP_DIRECTORY, keep=BACKUP_RETENTION):
+    """
+    Supprime les sauvegardes au-delà des `keep` plus récentes
+
+    Returns:
+        list: Noms des sauvegardes supprimées
+    """
+    removed = []
+    for snapshot in list_backups(db_path, directory)[keep:]:
+        shutil.rmtree(snapshot.path)
+        removed.append(snapshot.name)
+    return removed
+
+
+def _extract(path, entry, compressed, target):
+    """Décompresse un fichier de sauvegarde et vérifie son empreinte"""
+    digest = hashlib.sha256()
+    opener = gzip.open if compressed else open
+    with opener(os.path.join(path, entry['stored']), 'rb') as source, open(target, 'wb') as output:
+        while True:
+            block = source.read(COPY_BUFFER_SIZE)
+            if not block:
+                break
+            digest.update(block)
+            output.write(block)
+    if digest.hexdigest() != entry['sha256']:
+        raise ValueError(f"Empreinte invalide pour {entry['name']} : sauvegarde altérée")
+
+
+def restore_backup(db_path, name=None, directory=BACKUP_DIRECTORY,
+                   pages_per_step=BACKUP_PAGES_PER_STEP, step_sleep_ms=BACKUP_STEP_SLEEP_MS,
+                   progress=None):
+    """
+    Restaure une sauvegarde après l'avoir vérifiée
+
+    Chaque fichier est décompressé à côté de la base puis contrôlé
+    (empreinte, PRAGMA integrity_check, version du schéma) ; rien n'est
+    remplacé si l'un d'eux est invalide. Les fichiers sont ensuite recopiés
+    par l'API de sauvegarde dans la base en place : les connexions ouvertes
+    voient les données restaurées. Les archives annuelles absentes de la
+    sauvegarde sont renommées (suffixe ORPHAN_SUFFIX).
+
+    Args:
+        db_path (str): Chemin de la base à restaurer
+        name (str, optional): Nom ou chemin de la sauvegarde (la plus récente par défaut)
+        directory (str): Dossier des sauvegardes
+        pages_per_step (int): Pages copiées par étape
+        step_sleep_ms (int): Pause entre deux étapes
+        progress (callable, optional): Appelé avec (fichier, pages copiées, pages totales)
+
+    Returns:
+        Snapshot: Sauvegarde restaurée
+
+    Raises:
+        FileNotFoundError: Si la sauvegarde n'existe pas
+        ValueError: Si un fichier est altéré, corrompu ou d'un schéma plus récent
+    """
+    if name is None:
+        snapshots = list_backups(db_path, directory)
+        if not snapshots:
+            raise FileNotFoundError("Aucune sauvegarde à restaurer")
+        path = snapshots[0].path
+    elif os.path.isdir(name):
+        path = name
+    else:
+        path = os.path.join(backup_directory(db_path, directory), name)
+    manifest = _read_manifest(path)
+    if manifest is None:
+        raise FileNotFoundError(f"Sauvegarde introuvable : {path}")
+
+    target_directory = os.path.dirname(os.path.abspath(db_path))
+    extracted = []
+    try:
+        # 1. Vérification de tous les fichiers avant toute modification
+        for entry in manifest['files']:
+            handle, temp_path = tempfile.mkstemp(
+                prefix=f".{entry['name']}.", suffix='.restore', dir=target_directory
+            )
+            os.close(handle)
+            extracted.append((entry, temp_path))
+            _extract(path, entry, manifest['compressed'], temp_path)
+            schema_version, _ = _check_database(temp_path, full=True)
+            if schema_version > SCHEMA_VERSION:
+                raise ValueError(
+                    f"{entry['name']} provient d'une version plus récente de l'application "
+                    f"(schéma {schema_version} > {SCHEMA_VERSION})"
+                )
+
+        # 2. Archives puis base principale, dont le registre les référence
+        restored = {entry['name'] for entry in manifest['files']}
+        for entry, temp_path in sorted(extracted, key=lambda item: not item[0]['archive']):
+            target_path = (
+                db_path if not entry['archive'] else os.path.join(target_directory, entry['name'])
+            )
+            source = sqlite3.connect(temp_path)
+            try:
+                _copy_database(source, target_path, entry['name'], pages_per_step, step_sleep_ms, progress)
+            finally:
+                source.close()
+        _set_aside_orphans(db_path, restored)
+    finally:
+        for _, temp_path in extracted:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    return _snapshot(path, manifest)
+
+
+def _set_aside_orphans(db_path, restored):
+    """Renomme les archives annuelles que la base restaurée ne référence pas"""
+    conn = sqlite3.connect(db_path)
+    try:
+        referenced = {
+            os.path.basename(partition.path) for partition in load_partitions(conn, db_path)
+        } if _has_partitions(conn) else set()
+    finally:
+        conn.close()
+
+    directory = os.path.dirname(os.path.abspath(db_path))
+    prefix = _stem(db_path) + '_'
+    for entry in os.listdir(directory):
+        stem, extension = os.path.splitext(entry)
+        if (entry.startswith(prefix) and stem[len(prefix):].isdigit() and extension == '.db'
+                and entry not in referenced and entry not in restored):
+            os.rename(os.path.join(directory, entry), os.path.join(directory, entry + ORPHAN_SUFFIX))
+
+
+class BackupScheduler:
+    """Thread de sauvegardes périodiques, avec suppression des plus anciennes"""
+
+    def __init__(self, db_path, interval_hours=BACKUP_INTERVAL_HOURS, keep=BACKUP_RETENTION,
+                 directory=BACKUP_DIRECTORY):
+        self.db_path = db_path
+        self.interval = interval_hours * 3600 if interval_hours else None
+        self.keep = keep
+        self.directory = directory
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.last_snapshot = None
+        self.last_error = None
+
+    def start(self):
+        """Démarre le thread (sans effet s'il tourne déjà ou sans intervalle)"""
+        if self.interval is None:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="d-tracker-backup", daemon=True
+                )
+                self._thread.start()
+
+    def _next_delay(self):
+        """Secondes avant la prochaine sauvegarde (depuis la plus récente, ou un intervalle complet)"""
+        snapshots = list_backups(self.db_path, self.directory)
+        if not snapshots:
+            # Pas de sauvegarde au démarrage : la première attend un intervalle
+            return self.interval
+        elapsed = (datetime.now() - datetime.fromisoformat(snapshots[0].created_at)).total_seconds()
+        return max(self.interval - elapsed, 0)
+
+    def _run(self):
+        """Boucle du thread : attend l'échéance, sauvegarde puis applique la rétention"""
+        while not self._stop.wait(self._next_delay()):
+            try:
+                self.last_snapshot = create_backup(self.db_path, self.directory)
+                prune_backups(self.db_path, self.directory, self.keep)
+                self.last_error = None
+            except Exception as e:
+                # Nouvel essai à l'échéance suivante
+                self.last_error = e
+                logger.exception("Échec de la sauvegarde automatique de %s", self.db_path)
+                if self._stop.wait(self.interval):
+                    break
+
+    def stop(self, timeout=None):
+        """Arrête le thread (une sauvegarde en cours se termine)"""
+        self._stop.set()
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_backup_scheduler(db_path):
+    """
+    Retourne le planificateur de sauvegardes partagé pour un fichier de base
+
+    Args:
+        db_path (str): Chemin du fichier SQLite
+
+    Returns:
+        BackupScheduler: Planificateur commun à tout le processus (non démarré)
+    """
+    with _schedulers_lock:
+        scheduler = _schedulers.get(db_path)
+        if scheduler is None:
+            scheduler = BackupScheduler(db_path)
+            _schedulers[db_path] = scheduler
+        return scheduler
+
+
+@atexit.register
+def _stop_schedulers():
+    """Laisse une sauvegarde en cours se terminer à l'arrêt du processus"""
+    with _schedulers_lock:
+        schedulers = list(_schedulers.values())
+    for scheduler in schedulers:
+        scheduler.stop(timeout=60)
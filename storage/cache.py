@@ -0,0 +1,155 @@
+"""
+Cache des résultats de requêtes pour l'application D-Tracker
+
+Streamlit réexécute toute la page à chaque interaction : les lectures
+identiques sont servies depuis ce cache tant que les données n'ont pas
+changé. Le cache est vidé dès que la génération des données (compteur
+d'écritures + `PRAGMA data_version`) évolue.
+"""
+
+import copy
+import functools
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from config.settings import QUERY_CACHE_SIZE
+
+
+class QueryCache:
+    """Cache LRU borné, associé à une génération de données"""
+
+    def __init__(self, maxsize=QUERY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _sync(self, generation):
+        """
+        Vide le cache si les données ont changé depuis le dernier accès
+
+        La génération ne fait que croître : une génération plus ancienne
+        (lecteur en retard) ne vide pas le cache et ne le fait pas reculer.
+        """
+        if self._generation is None or generation > self._generation:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._generation = generation
+
+    def get(self, key, generation):
+        """
+        Cherche une entrée valide pour la génération donnée
+
+        Returns:
+            tuple: (trouvé, valeur)
+        """
+        with self._lock:
+            self._sync(generation)
+            if generation == self._generation and key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value, generation):
+        """Enregistre un résultat calculé pour la génération donnée"""
+        with self._lock:
+            # Résultat d'une génération dépassée : ni enregistré, ni cause d'invalidation
+            if generation != self._generation:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Vide entièrement le cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Statistiques d'utilisation du cache
+
+        Returns:
+            dict: hits, misses, hit_ratio, size, maxsize et invalidations
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'invalidations': self.invalidations
+            }
+
+
+def _freeze(value):
+    """Rend hachables les arguments (listes de catégories, etc.)"""
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+def _copy_result(value):
+    """Copie un résultat pour que l'appelant ne modifie pas l'entrée en cache"""
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    return copy.deepcopy(value)
+
+
+def cached_query(method):
+    """
+    Décorateur des méthodes de lecture d'ExpenseDatabase
+
+    La clé est formée du nom de la méthode et de ses arguments ; l'instance
+    doit exposer `query_cache` (None pour désactiver) et `connections`.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = self.query_cache
+        if cache is None:
+            return method(self, *args, **kwargs)
+
+        generation = self.connections.data_generation()
+        key = (method.__name__, _freeze(args), _freeze(kwargs))
+        found, value = cache.get(key, generation)
+        if not found:
+            value = method(self, *args, **kwargs)
+            cache.set(key, value, generation)
+        return _copy_result(value)
+
+    return wrapper
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_query_cache(db_path):
+    """
+    Retourne le cache partagé pour un fichier de base
+
+    Args:
+        db_path (str): Chemin du fichier SQLite
+
+    Returns:
+        QueryCache: Cache commun à tout le processus
+    """
+    with _caches_lock:
+        cache = _caches.get(db_path)
+        if cache is None:
+            cache = QueryCache()
+            _caches[db_path] = cache
+        return cache
@@ -0,0 +1,88 @@
+"""
+Registre des catégories en mémoire pour l'application D-Tracker
+
+Les catégories sont peu nombreuses et lues à chaque réexécution de page :
+elles sont chargées une fois, puis servies depuis des dictionnaires
+id -> (id, nom, couleur) et nom -> id. Le registre note la génération des
+données lues (storage/connection.py) : il est rechargé à la lecture suivante
+dès qu'elle change, y compris après une restauration, un import ou un
+renommage fait par un autre processus. Il est aussi vidé à chaque écriture
+de catégorie.
+"""
+
+import threading
+
+
+class CategoryRegistry:
+    """Catégories (id, nom, couleur) gardées en mémoire"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = None
+        self.by_id = {}
+        self.by_name = {}
+        self.names = {}
+        self.colors = {}
+        # Génération des données au moment du chargement
+        self.generation = None
+        self.loads = 0
+
+    def loaded(self):
+        """Indique si les catégories sont en mémoire"""
+        return self._rows is not None
+
+    def load(self, rows, generation=None):
+        """
+        Remplace le contenu du registre
+
+        Args:
+            rows (list): Tuples (id, name, color) triés par nom
+            generation (int, optional): Génération des données lues
+        """
+        rows = [tuple(row) for row in rows]
+        with self._lock:
+            # Les dictionnaires sont remplacés d'un bloc : un lecteur ne voit
+            # jamais un état partiellement chargé
+            self.by_id = {row[0]: row for row in rows}
+            self.by_name = {row[1]: row[0] for row in rows}
+            self.names = {row[0]: row[1] for row in rows}
+            self.colors = {row[0]: row[2] for row in rows}
+            self._rows = rows
+            self.generation = generation
+            self.loads += 1
+
+    def invalidate(self):
+        """Oublie les catégories chargées (après une écriture de catégorie)"""
+        with self._lock:
+            self._rows = None
+
+    def all(self):
+        """
+        Retourne toutes les catégories
+
+        Returns:
+            list: Tuples (id, name, color) triés par nom
+        """
+        return list(self._rows or [])
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_category_registry(db_path):
+    """
+    Retourne le registre de catégories partagé pour un fichier de base
+
+    Args:
+        db_path (str): Chemin du fichier SQLite
+
+    Returns:
+        CategoryRegistry: Registre commun à tout le processus
+    """
+    with _registries_lock:
+        registry = _registries.get(db_path)
+        if registry is None:
+            registry = CategoryRegistry()
+            _registries[db_path] = registry
+        return registry
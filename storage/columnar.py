@@ -0,0 +1,214 @@
+"""
+Export et import des dépenses au format Parquet pour l'application D-Tracker
+
+Les dépenses sont lues dans SQLite par paquets de PARQUET_ROW_GROUP_SIZE
+lignes, par date croissante, et chaque paquet devient un groupe de lignes
+du fichier : les statistiques min/max de chaque groupe permettent aux outils
+d'analyse de ne lire que les dates demandées. Les colonnes sont typées :
+date (date32), montant en centimes (int64, exact), catégorie en
+dictionnaire, date de création (timestamp UTC). Les couleurs des catégories
+sont conservées dans les métadonnées du schéma.
+
+Un fichier exporté peut être réimporté (restauration en masse) : les
+identifiants d'origine sont conservés et les dépenses déjà présentes ignorées.
+
+pyarrow est une dépendance optionnelle, importée à la première utilisation.
+"""
+
+import json
+import os
+import tempfile
+
+from config.settings import BULK_INSERT_CHUNK_SIZE, PARQUET_COMPRESSION, PARQUET_ROW_GROUP_SIZE
+
+# Colonnes du fichier, dans l'ordre des lignes de db.iter_expense_records
+PARQUET_COLUMNS = ['id', 'date', 'amount_cents', 'description', 'category', 'created_at', 'import_hash']
+
+# Métadonnée du schéma listant les catégories [[nom, couleur], ...]
+CATEGORIES_METADATA_KEY = b'd_tracker.categories'
+
+# Format de created_at dans SQLite (CURRENT_TIMESTAMP, en UTC)
+SQLITE_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _pyarrow():
+    """Importe pyarrow à la demande"""
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Le format Parquet nécessite pyarrow : pip install pyarrow") from None
+    return pyarrow
+
+
+def expense_schema(categories):
+    """
+    Schéma Arrow des fichiers de dépenses
+
+    Args:
+        categories (list): Tuples (id, name, color) enregistrés dans les métadonnées
+
+    Returns:
+        pyarrow.Schema: Schéma des colonnes PARQUET_COLUMNS
+    """
+    pa = _pyarrow()
+    metadata = {
+        CATEGORIES_METADATA_KEY: json.dumps(
+            [[name, color] for _, name, color in categories], ensure_ascii=False
+        )
+    }
+    return pa.schema([
+        pa.field('id', pa.int64(), nullable=False),
+        pa.field('date', pa.date32(), nullable=False),
+        pa.field('amount_cents', pa.int64(), nullable=False),
+        pa.field('description', pa.string()),
+        pa.field('category', pa.dictionary(pa.int32(), pa.string())),
+        pa.field('created_at', pa.timestamp('s', tz='UTC')),
+        pa.field('import_hash', pa.binary())
+    ], metadata=metadata)
+
+
+def _record_batch(schema, categories, rows):
+    """Paquet de lignes de db.iter_expense_records -> RecordBatch"""
+    pa = _pyarrow()
+    ids, days, cents, descriptions, category_ids, created, hashes = zip(*rows)
+
+    # Dictionnaire commun à tous les groupes : les indices sont les positions dans categories
+    positions = {category[0]: index for index, category in enumerate(categories)}
+    category_column = pa.DictionaryArray.from_arrays(
+        pa.array([positions.get(category_id) for category_id in category_ids], pa.int32()),
+        pa.array([name for _, name, _ in categories], pa.string())
+    )
+    created_column = pa.compute.strptime(
+        pa.array(created, pa.string()), format=SQLITE_TIMESTAMP_FORMAT, unit='s',
+        error_is_null=True
+    ).cast(pa.timestamp('s', tz='UTC'))
+
+    return pa.RecordBatch.from_arrays([
+        # Les numéros de jour sont directement des date32 (jours depuis le 1970-01-01)
+        pa.array(ids, pa.int64()),
+        pa.array(days, pa.int32()).cast(pa.date32()),
+        pa.array(cents, pa.int64()),
+        pa.array(descriptions, pa.string()),
+        category_column,
+        created_column,
+        pa.array(hashes, pa.binary())
+    ], schema=schema)
+
+
+def export_expenses_parquet(db, output, start_date=None, end_date=None, category_name=None,
+                            row_group_size=PARQUET_ROW_GROUP_SIZE, text=None):
+    """
+    Écrit les dépenses filtrées au format Parquet
+
+    Args:
+        db (ExpenseDatabase): Base de données source
+        output: Chemin du fichier ou objet fichier binaire déjà ouvert
+        start_date (str, optional): Date de début 'YYYY-MM-DD'
+        end_date (str, optional): Date de fin 'YYYY-MM-DD'
+        category_name (str, optional): Nom de la catégorie
+        row_group_size (int): Nombre de lignes lues par paquet et par groupe de lignes
+        text (str, optional): Mots cherchés dans la description (comme search_expenses)
+
+    Returns:
+        int: Nombre de dépenses exportées
+
+    Raises:
+        ImportError: Si pyarrow n'est pas installé
+    """
+    pa = _pyarrow()
+    categories = db.get_categories()
+    schema = expense_schema(categories)
+
+    exported = 0
+    with pa.parquet.ParquetWriter(output, schema, compression=PARQUET_COMPRESSION) as writer:
+        for rows in db.iter_expense_records(start_date, end_date, category_name, row_group_size, text):
+            writer.write_batch(_record_batch(schema, categories, rows), row_group_size=row_group_size)
+            exported += len(rows)
+    return exported
+
+
+def export_expenses_parquet_to_tempfile(db, start_date=None, end_date=None, category_name=None,
+                                        row_group_size=PARQUET_ROW_GROUP_SIZE, text=None):
+    """
+    Exporte les dépenses filtrées dans un fichier Parquet temporaire
+
+    Returns:
+        tuple: (chemin du fichier, nombre de dépenses) ; le fichier est à supprimer par l'appelant
+    """
+    handle = tempfile.NamedTemporaryFile(suffix='.parquet', prefix='depenses_', delete=False)
+    try:
+        with handle:
+            exported = export_expenses_parquet(
+                db, handle, start_date, end_date, category_name, row_group_size, text
+            )
+    except BaseException:
+        os.remove(handle.name)
+        raise
+    return handle.name, exported
+
+
+def _restore_categories(db, metadata):
+    """
+    Crée les catégories du fichier absentes de la base
+
+    Returns:
+        dict: Nom -> id de toutes les catégories de la base
+    """
+    existing = {name for _, name, _ in db.get_categories()}
+    stored = json.loads((metadata or {}).get(CATEGORIES_METADATA_KEY, b'[]'))
+    for name, color in stored:
+        if name not in existing:
+            db.add_category(name, color)
+    return {name: category_id for category_id, name, _ in db.get_categories()}
+
+
+def import_expenses_parquet(db, source, chunk_size=BULK_INSERT_CHUNK_SIZE):
+    """
+    Restaure dans la base les dépenses d'un fichier Parquet exporté
+
+    Les catégories sont rattachées par nom (créées au besoin avec leur
+    couleur d'origine). Les dépenses dont l'id ou l'empreinte d'import
+    existent déjà sont ignorées : réimporter un fichier n'a pas d'effet.
+
+    Args:
+        db (ExpenseDatabase): Base de destination
+        source: Chemin du fichier ou objet fichier binaire
+        chunk_size (int): Nombre de lignes lues et insérées par paquet
+
+    Returns:
+        tuple: (dépenses lues, dépenses insérées)
+
+    Raises:
+        ImportError: Si pyarrow n'est pas installé
+        ValueError: Si une colonne du format d'export manque
+    """
+    pa = _pyarrow()
+    parquet_file = pa.parquet.ParquetFile(source)
+    schema = parquet_file.schema_arrow
+    missing = [column for column in PARQUET_COLUMNS if column not in schema.names]
+    if missing:
+        raise ValueError(f"Colonnes absentes du fichier Parquet : {', '.join(missing)}")
+
+    category_ids = _restore_categories(db, schema.metadata)
+
+    def records():
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=PARQUET_COLUMNS):
+            # Parquet stocke les timestamps en millisecondes : retour à la seconde
+            created = pa.compute.strftime(
+                batch.column('created_at').cast(pa.timestamp('s', tz='UTC'), safe=False),
+                format=SQLITE_TIMESTAMP_FORMAT
+            )
+            yield from zip(
+                batch.column('id').to_pylist(),
+                batch.column('date').cast(pa.int32()).to_pylist(),
+                batch.column('amount_cents').to_pylist(),
+                batch.column('description').to_pylist(),
+                [category_ids.get(name) for name in batch.column('category').to_pylist()],
+                created.to_pylist(),
+                batch.column('import_hash').to_pylist()
+            )
+
+    inserted = db.restore_expenses_bulk(records(), chunk_size)
+    return parquet_file.metadata.num_rows, inserted
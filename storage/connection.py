@@ -0,0 +1,186 @@
+"""
+Gestionnaire de connexions SQLite pour l'application D-Tracker
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from config.settings import SQLITE_MAX_IDLE_CONNECTIONS, SQLITE_PRAGMAS, SQLITE_STATEMENT_CACHE_SIZE
+
+
+class ManagedConnection(sqlite3.Connection):
+    """Connexion SQLite mémorisant la dernière `data_version` observée et ses archives attachées"""
+
+    data_version = None
+    # Nom de schéma -> chemin des archives attachées, de la moins à la plus récemment utilisée
+    attached = None
+
+
+class ConnectionManager:
+    """
+    Pool de connexions SQLite attribuées à un thread pendant toute sa durée
+
+    Streamlit exécute chaque réexécution de page dans un thread : ce thread
+    réutilise sa connexion (et le cache de requêtes préparées associé) au
+    lieu d'en ouvrir une nouvelle à chaque appel. Quand le thread se termine,
+    sa connexion retourne dans le pool et sert au thread suivant.
+    """
+
+    def __init__(self, db_path, pragmas=None, statement_cache_size=SQLITE_STATEMENT_CACHE_SIZE):
+        self.db_path = db_path
+        self.pragmas = dict(SQLITE_PRAGMAS if pragmas is None else pragmas)
+        self.statement_cache_size = statement_cache_size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._owners = {}  # Identifiant de thread -> (thread, connexion)
+        self._idle = []
+        # Incrémenté à chaque écriture validée ou modification externe détectée
+        self._generation = 0
+
+    def _open(self):
+        """Ouvre une connexion et lui applique les pragmas configurés"""
+        conn = sqlite3.connect(
+            self.db_path,
+            isolation_level=None,  # Transactions gérées explicitement
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size,
+            factory=ManagedConnection
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def connection(self):
+        """
+        Retourne la connexion du thread courant, attribuée au premier appel
+
+        Returns:
+            sqlite3.Connection: Connexion réservée au thread courant
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._acquire()
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    def _acquire(self):
+        """Prend une connexion libre dans le pool ou en ouvre une nouvelle"""
+        thread = threading.current_thread()
+        with self._lock:
+            self._reclaim()
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._open()
+        with self._lock:
+            if conn not in self._connections:
+                self._connections.append(conn)
+            self._owners[thread.ident] = (thread, conn)
+        return conn
+
+    def _reclaim(self):
+        """Remet dans le pool les connexions des threads terminés (verrou tenu)"""
+        for ident, (thread, conn) in list(self._owners.items()):
+            if thread.is_alive():
+                continue
+            del self._owners[ident]
+            if conn.in_transaction:
+                conn.rollback()
+            if len(self._idle) < SQLITE_MAX_IDLE_CONNECTIONS:
+                self._idle.append(conn)
+            else:
+                self._connections.remove(conn)
+                conn.close()
+
+    @contextmanager
+    def transaction(self, immediate=True):
+        """
+        Exécute un bloc dans une transaction (imbrication autorisée)
+
+        Args:
+            immediate (bool): Prend le verrou d'écriture dès le début
+
+        Yields:
+            sqlite3.Connection: Connexion du thread courant
+        """
+        conn = self.connection()
+        if self._local.depth > 0:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+        self._local.depth = 1
+        changes_before = conn.total_changes
+        try:
+            yield conn
+            conn.execute('COMMIT')
+            if conn.total_changes != changes_before:
+                self.bump_generation()
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            self._local.depth = 0
+
+    def bump_generation(self):
+        """Signale que les données ont changé"""
+        with self._lock:
+            self._generation += 1
+
+    def data_generation(self):
+        """
+        Retourne la génération courante des données
+
+        Les écritures faites par ce processus incrémentent directement le
+        compteur ; `PRAGMA data_version` (lecture de l'en-tête, sans accès
+        aux tables) détecte celles faites par d'autres connexions.
+
+        Returns:
+            int: Valeur qui change dès que les données ont pu changer
+        """
+        conn = self.connection()
+        data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+        if data_version != conn.data_version:
+            if conn.data_version is not None:
+                self.bump_generation()
+            conn.data_version = data_version
+        return self._generation
+
+    def close_all(self):
+        """Ferme toutes les connexions ouvertes par ce gestionnaire"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._owners.clear()
+            self._idle = []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_connection_manager(db_path):
+    """
+    Retourne le gestionnaire de connexions partagé pour un fichier de base
+
+    Args:
+        db_path (str): Chemin du fichier SQLite
+
+    Returns:
+        ConnectionManager: Gestionnaire commun à tout le processus
+    """
+    with _managers_lock:
+        manager = _managers.get(db_path)
+        if manager is None:
+            manager = ConnectionManager(db_path)
+            _managers[db_path] = manager
+        return manager
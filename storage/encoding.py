@@ -0,0 +1,155 @@
+"""
+Encodage des montants et des dates stockés par l'application D-Tracker
+
+Les montants sont stockés en centimes entiers (sommes exactes) et les dates
+en numéros de jour depuis le 1er janvier 1970 (comparaisons entières).
+L'API d'ExpenseDatabase continue d'accepter et de retourner des montants
+décimaux en euros et des dates 'YYYY-MM-DD' : la conversion se fait ici,
+côté Python pour les paramètres et côté SQL pour les colonnes lues.
+"""
+
+from datetime import date, timedelta
+
+EPOCH = date(1970, 1, 1)
+
+# Jour julien de l'époque Unix (1970-01-01 à 00:00)
+EPOCH_JULIAN_DAY = 2440587.5
+
+
+def to_cents(amount):
+    """Montant en euros -> centimes entiers"""
+    return int(round(amount * 100))
+
+
+def from_cents(cents):
+    """Centimes entiers -> montant en euros"""
+    return cents / 100
+
+
+def to_day(value):
+    """
+    Date 'YYYY-MM-DD' (ou date/datetime) -> numéro de jour
+
+    Args:
+        value (str | date): Date à encoder
+
+    Returns:
+        int: Nombre de jours depuis le 1970-01-01
+    """
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    elif hasattr(value, 'date'):
+        value = value.date()
+    return (value - EPOCH).days
+
+
+def from_day(day):
+    """Numéro de jour -> date 'YYYY-MM-DD'"""
+    return (EPOCH + timedelta(days=day)).isoformat()
+
+
+def cents_sql(expr):
+    """Expression SQL convertissant un montant en euros en centimes"""
+    return f'CAST(ROUND({expr} * 100) AS INTEGER)'
+
+
+def amount_sql(expr):
+    """Expression SQL convertissant des centimes en euros"""
+    return f'{expr} / 100.0'
+
+
+def day_sql(expr):
+    """Expression SQL convertissant une date 'YYYY-MM-DD' en numéro de jour (NULL si invalide)"""
+    return f'CAST(julianday({expr}) - {EPOCH_JULIAN_DAY} AS INTEGER)'
+
+
+def date_sql(expr):
+    """Expression SQL convertissant un numéro de jour en date 'YYYY-MM-DD'"""
+    return f"date({expr} * 86400, 'unixepoch')"
+
+
+def _iso_thursday_sql(expr):
+    """Numéro du jeudi de la semaine ISO contenant le jour (le 1970-01-01 est un jeudi)"""
+    return f'({expr} - (({expr} + 3) % 7 + 7) % 7 + 3)'
+
+
+def period_sql(period, expr):
+    """
+    Expression SQL de la période ('week', 'month', 'quarter', 'year') d'un numéro de jour
+
+    Les semaines suivent la norme ISO 8601 ('2024-W01'), les trimestres
+    sont notés '2024-Q1', les mois '2024-01' et les années 2024.
+
+    Args:
+        period (str): Granularité
+        expr (str): Expression SQL du numéro de jour
+
+    Returns:
+        str: Expression SQL déterministe (utilisable dans une colonne générée)
+    """
+    if period == 'week':
+        thursday = _iso_thursday_sql(expr)
+        return (
+            f"strftime('%Y', {thursday} * 86400, 'unixepoch') || '-W' || "
+            f"printf('%02d', (strftime('%j', {thursday} * 86400, 'unixepoch') - 1) / 7 + 1)"
+        )
+    if period == 'month':
+        return f"strftime('%Y-%m', {expr} * 86400, 'unixepoch')"
+    if period == 'quarter':
+        return (
+            f"strftime('%Y', {expr} * 86400, 'unixepoch') || '-Q' || "
+            f"((CAST(strftime('%m', {expr} * 86400, 'unixepoch') AS INTEGER) + 2) / 3)"
+        )
+    if period == 'year':
+        return f"CAST(strftime('%Y', {expr} * 86400, 'unixepoch') AS INTEGER)"
+    raise ValueError(f"Période inconnue : {period}")
+
+
+def period_key(period, value):
+    """
+    Période d'une date, au même format que period_sql
+
+    Args:
+        period (str): Granularité ('week', 'month', 'quarter' ou 'year')
+        value (str | date): Date 'YYYY-MM-DD'
+
+    Returns:
+        str | int: Clé de la période contenant la date
+    """
+    current = EPOCH + timedelta(days=to_day(value))
+    if period == 'week':
+        year, week, _ = current.isocalendar()
+        return f'{year}-W{week:02d}'
+    if period == 'month':
+        return f'{current.year}-{current.month:02d}'
+    if period == 'quarter':
+        return f'{current.year}-Q{(current.month + 2) // 3}'
+    if period == 'year':
+        return current.year
+    raise ValueError(f"Période inconnue : {period}")
+
+
+def period_start_day(period, value, offset=0):
+    """
+    Premier jour de la période contenant une date, décalée de `offset` périodes
+
+    Args:
+        period (str): Granularité ('day', 'week', 'month', 'quarter' ou 'year')
+        value (str | date): Date 'YYYY-MM-DD'
+        offset (int): Nombre de périodes à ajouter (négatif : périodes précédentes)
+
+    Returns:
+        int: Numéro du premier jour de la période
+    """
+    day = to_day(value)
+    if period == 'day':
+        return day + offset
+    if period == 'week':
+        # Lundi de la semaine ISO (le 1970-01-01 est un jeudi)
+        return day - (day + 3) % 7 + 7 * offset
+    months = {'month': 1, 'quarter': 3, 'year': 12}.get(period)
+    if months is None:
+        raise ValueError(f"Période inconnue : {period}")
+    current = EPOCH + timedelta(days=day)
+    index = current.year * 12 + (current.month - 1) // months * months + offset * months
+    return to_day(date(index // 12, index % 12 + 1, 1))
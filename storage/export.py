@@ -0,0 +1,67 @@
+"""
+Export des dépenses en flux pour l'application D-Tracker
+
+Les lignes sont lues dans SQLite par paquets et écrites au fur et à mesure :
+la mémoire utilisée ne dépend pas de la taille de la période exportée.
+"""
+
+import csv
+import os
+import tempfile
+
+from config.settings import EXPENSE_CHUNK_SIZE
+
+CSV_COLUMNS = ['id', 'amount', 'description', 'date', 'category', 'color']
+
+
+def export_expenses_csv(db, output, start_date=None, end_date=None, category_name=None,
+                        chunk_size=EXPENSE_CHUNK_SIZE, text=None):
+    """
+    Écrit les dépenses filtrées au format CSV
+
+    Args:
+        db (ExpenseDatabase): Base de données source
+        output: Chemin du fichier ou objet fichier texte déjà ouvert
+        start_date (str, optional): Date de début 'YYYY-MM-DD'
+        end_date (str, optional): Date de fin 'YYYY-MM-DD'
+        category_name (str, optional): Nom de la catégorie
+        chunk_size (int): Nombre de lignes lues par paquet
+        text (str, optional): Mots cherchés dans la description (comme search_expenses)
+
+    Returns:
+        int: Nombre de dépenses exportées
+    """
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, 'w', newline='', encoding='utf-8') as handle:
+            return export_expenses_csv(db, handle, start_date, end_date, category_name, chunk_size, text)
+
+    writer = csv.writer(output, lineterminator='\n')
+    writer.writerow(CSV_COLUMNS)
+
+    exported = 0
+    for rows in db.iter_expense_rows(start_date, end_date, category_name, chunk_size, text):
+        writer.writerows(rows)
+        exported += len(rows)
+    return exported
+
+
+def export_expenses_csv_to_tempfile(db, start_date=None, end_date=None, category_name=None,
+                                    chunk_size=EXPENSE_CHUNK_SIZE, text=None):
+    """
+    Exporte les dépenses filtrées dans un fichier CSV temporaire
+
+    Returns:
+        tuple: (chemin du fichier, nombre de dépenses) ; le fichier est à supprimer par l'appelant
+    """
+    handle = tempfile.NamedTemporaryFile(
+        'w', suffix='.csv', prefix='depenses_', newline='', encoding='utf-8', delete=False
+    )
+    try:
+        with handle:
+            exported = export_expenses_csv(
+                db, handle, start_date, end_date, category_name, chunk_size, text
+            )
+    except BaseException:
+        os.remove(handle.name)
+        raise
+    return handle.name, exported
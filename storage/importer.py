@@ -0,0 +1,371 @@
+"""
+Import en flux de relevés bancaires CSV pour l'application D-Tracker
+
+Le fichier est lu ligne à ligne et inséré par paquets de IMPORT_CHUNK_SIZE
+lignes dans une seule transaction : un import interrompu ne laisse rien en
+base. Les colonnes sont reconnues d'après IMPORT_COLUMN_RULES et les
+catégories attribuées d'après IMPORT_CATEGORY_RULES.
+
+Chaque ligne reçoit une empreinte (date, montant, libellé, rang de la ligne
+parmi ses doublons exacts du fichier) protégée par un index unique : importer
+de nouveau un relevé, ou un relevé qui en chevauche un autre, n'ajoute que
+les opérations absentes de la base.
+"""
+
+import csv
+import hashlib
+import io
+import re
+import unicodedata
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from config.settings import (
+    IMPORT_CATEGORY_RULES, IMPORT_CHUNK_SIZE, IMPORT_COLUMN_RULES, IMPORT_DATE_FORMATS,
+    IMPORT_DEFAULT_CATEGORY
+)
+
+# Séparateurs reconnus, par ordre de préférence en cas d'égalité
+DELIMITERS = (';', ',', '\t', '|')
+
+# Lignes examinées au début du fichier pour trouver l'en-tête (préambule du relevé)
+MAX_PREAMBLE_LINES = 20
+
+# Messages d'erreur conservés dans le rapport d'import
+MAX_REPORTED_ERRORS = 20
+
+
+def normalize_text(text):
+    """Texte en minuscules, sans accents ni espaces superflus (comparaison des en-têtes et libellés)"""
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.casefold().split())
+
+
+def map_columns(header, rules=IMPORT_COLUMN_RULES):
+    """
+    Associe les champs attendus aux colonnes d'un en-tête
+
+    Args:
+        header (list): Noms des colonnes du fichier
+        rules (dict): En-têtes reconnus pour chaque champ
+
+    Returns:
+        dict: Champ -> index de colonne
+
+    Raises:
+        ValueError: Si la date, le libellé ou le montant (ou le débit) sont introuvables
+    """
+    positions = {normalize_text(name): index for index, name in enumerate(header)}
+    columns = {}
+    for field, names in rules.items():
+        for name in names:
+            index = positions.get(normalize_text(name))
+            if index is not None:
+                columns[field] = index
+                break
+
+    missing = [field for field in ('date', 'description') if field not in columns]
+    if 'amount' not in columns and 'debit' not in columns:
+        missing.append('amount')
+    if missing:
+        raise ValueError(f"Colonnes introuvables dans l'en-tête : {', '.join(missing)}")
+    return columns
+
+
+def parse_amount(text):
+    """
+    Montant écrit dans un relevé -> centimes entiers
+
+    Accepte les formats '1 234,56', '1.234,56', '1,234.56', '-12.50',
+    '12,50-' et les symboles '€' ou 'EUR'.
+
+    Returns:
+        int | None: Montant signé en centimes, None si la cellule est vide
+
+    Raises:
+        ValueError: Si le montant est illisible
+    """
+    text = text.replace('€', '').replace('EUR', '')
+    text = ''.join(text.split())
+    if not text:
+        return None
+
+    negative = text.startswith('-') or text.endswith('-')
+    text = text.strip('+-')
+    # Le dernier séparateur rencontré est le séparateur décimal
+    if ',' in text and '.' in text:
+        thousands = '.' if text.rfind(',') > text.rfind('.') else ','
+        text = text.replace(thousands, '')
+    text = text.replace(',', '.')
+
+    try:
+        cents = int((Decimal(text) * 100).to_integral_value())
+    except InvalidOperation:
+        raise ValueError(f"Montant illisible : {text!r}") from None
+    return -cents if negative else cents
+
+
+class DateParser:
+    """Lecture des dates selon une liste de formats, en retenant le dernier format reconnu"""
+
+    def __init__(self, formats=IMPORT_DATE_FORMATS):
+        self.formats = list(formats)
+        # Un relevé répète les mêmes dates : chaque texte n'est analysé qu'une fois
+        self._parsed = {}
+
+    def __call__(self, text):
+        """
+        Texte -> date 'YYYY-MM-DD'
+
+        Raises:
+            ValueError: Si aucun format ne correspond
+        """
+        text = text.strip()
+        value = self._parsed.get(text)
+        if value is not None:
+            return value
+
+        for index, date_format in enumerate(self.formats):
+            try:
+                value = datetime.strptime(text, date_format).strftime('%Y-%m-%d')
+            except ValueError:
+                continue
+            if index:
+                # Le format du relevé est essayé en premier pour les lignes suivantes
+                self.formats.insert(0, self.formats.pop(index))
+            if len(self._parsed) < 10000:
+                self._parsed[text] = value
+            return value
+        raise ValueError(f"Date illisible : {text!r}")
+
+
+class CategoryMatcher:
+    """Attribution d'une catégorie existante à une opération"""
+
+    def __init__(self, categories, rules=IMPORT_CATEGORY_RULES,
+                 default_category=IMPORT_DEFAULT_CATEGORY):
+        """
+        Args:
+            categories (list): Tuples (id, name, color) des catégories en base
+            rules (list): Tuples (motif, nom de catégorie), testés dans l'ordre
+            default_category (str): Catégorie des opérations sans motif reconnu
+
+        Raises:
+            ValueError: Si la catégorie par défaut n'existe pas
+        """
+        self.by_name = {normalize_text(name): category_id for category_id, name, _ in categories}
+        self.default_id = self.by_name.get(normalize_text(default_category))
+        if self.default_id is None:
+            raise ValueError(f"Catégorie par défaut inconnue : {default_category}")
+        # Les règles visant une catégorie absente de la base sont ignorées
+        self.rules = [
+            (re.compile(pattern, re.IGNORECASE), self.by_name[normalize_text(name)])
+            for pattern, name in rules
+            if normalize_text(name) in self.by_name
+        ]
+        # Un relevé répète les mêmes libellés : chaque libellé n'est classé qu'une fois
+        self._matched = {}
+
+    def __call__(self, description, category_name=None):
+        """
+        Identifiant de catégorie d'une opération
+
+        Args:
+            description (str): Libellé de l'opération
+            category_name (str, optional): Catégorie indiquée par le relevé
+
+        Returns:
+            int: Catégorie du relevé si elle existe, sinon première règle
+                correspondant au libellé, sinon catégorie par défaut
+        """
+        if category_name:
+            category_id = self.by_name.get(normalize_text(category_name))
+            if category_id is not None:
+                return category_id
+        category_id = self._matched.get(description)
+        if category_id is not None:
+            return category_id
+
+        category_id = next(
+            (category_id for pattern, category_id in self.rules if pattern.search(description)),
+            self.default_id
+        )
+        if len(self._matched) < 10000:
+            self._matched[description] = category_id
+        return category_id
+
+
+def import_hash(date, cents, description, occurrence):
+    """
+    Empreinte d'une opération importée (16 octets)
+
+    Args:
+        date (str): Date 'YYYY-MM-DD'
+        cents (int): Montant en centimes
+        description (str): Libellé normalisé (normalize_text)
+        occurrence (int): Rang de l'opération parmi les lignes identiques du fichier
+
+    Returns:
+        bytes: Empreinte stockée dans expenses.import_hash
+    """
+    key = f'{date}|{cents}|{description}|{occurrence}'
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+
+
+def _detect_delimiter(line):
+    """Séparateur le plus fréquent de la ligne d'en-tête"""
+    return max(DELIMITERS, key=line.count)
+
+
+def _open_text(source, encoding):
+    """Flux texte à partir d'un chemin, d'un flux binaire (fichier envoyé) ou d'un flux texte"""
+    if isinstance(source, io.TextIOBase):
+        return source, False
+    if hasattr(source, 'read'):
+        return io.TextIOWrapper(source, encoding=encoding, newline=''), False
+    return open(source, encoding=encoding, newline=''), True
+
+
+class StatementImport:
+    """Lecture en flux d'un relevé CSV et comptage des lignes traitées"""
+
+    def __init__(self, lines, categories, delimiter=None, column_rules=IMPORT_COLUMN_RULES,
+                 date_formats=IMPORT_DATE_FORMATS, category_rules=IMPORT_CATEGORY_RULES,
+                 default_category=IMPORT_DEFAULT_CATEGORY):
+        """
+        Args:
+            lines: Itérateur des lignes du fichier
+            categories (list): Tuples (id, name, color) des catégories en base
+            delimiter (str, optional): Séparateur (détecté sur l'en-tête par défaut)
+        """
+        self.read = 0
+        self.skipped = 0
+        self.rejected = 0
+        self.errors = []
+        self.line_number = 0
+        self.match_category = CategoryMatcher(categories, category_rules, default_category)
+        self.parse_date = DateParser(date_formats)
+        # Nombre de lignes identiques déjà vues (date, montant, libellé)
+        self._occurrences = {}
+        self._read_header(iter(lines), delimiter, column_rules)
+
+    def _read_header(self, lines, delimiter, column_rules):
+        """Cherche l'en-tête parmi les premières lignes puis prépare le lecteur CSV"""
+        error = ValueError("Fichier vide")
+        for line in lines:
+            self.line_number += 1
+            line_delimiter = delimiter or _detect_delimiter(line)
+            header = next(csv.reader([line], delimiter=line_delimiter), [])
+            try:
+                self.columns = map_columns(header, column_rules)
+            except ValueError as e:
+                error = e
+                if self.line_number >= MAX_PREAMBLE_LINES:
+                    break
+                continue
+            self.reader = csv.reader(lines, delimiter=line_delimiter)
+            self._header_line = self.line_number
+            return
+        raise error
+
+    def _reject(self, message):
+        """Compte une ligne illisible et garde les premiers messages"""
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"Ligne {self.line_number} : {message}")
+
+    def _cell(self, record, field):
+        """Valeur d'un champ dans une ligne ('' si la colonne est absente ou courte)"""
+        index = self.columns.get(field)
+        if index is None or index >= len(record):
+            return ''
+        return record[index].strip()
+
+    def _expense_cents(self, record):
+        """Montant de la dépense en centimes, None pour un crédit ou une ligne sans montant"""
+        if 'amount' in self.columns:
+            cents = parse_amount(self._cell(record, 'amount'))
+            # Montant signé : seules les sorties (négatives) sont des dépenses
+            return -cents if cents is not None and cents < 0 else None
+        cents = parse_amount(self._cell(record, 'debit'))
+        return abs(cents) if cents else None
+
+    def rows(self):
+        """
+        Lignes à insérer, produites au fil de la lecture
+
+        Yields:
+            tuple: (amount, description, category_id, date, import_hash)
+        """
+        for record in self.reader:
+            self.line_number = self._header_line + self.reader.line_num
+            if not any(cell.strip() for cell in record):
+                continue
+            self.read += 1
+            try:
+                date = self.parse_date(self._cell(record, 'date'))
+                cents = self._expense_cents(record)
+            except ValueError as e:
+                self._reject(str(e))
+                continue
+            if cents is None:
+                self.skipped += 1
+                continue
+
+            description = self._cell(record, 'description')
+            normalized = normalize_text(description)
+            key = (date, cents, normalized)
+            occurrence = self._occurrences.get(key, 0)
+            self._occurrences[key] = occurrence + 1
+
+            yield (
+                cents / 100,
+                description,
+                self.match_category(description, self._cell(record, 'category')),
+                date,
+                import_hash(date, cents, normalized, occurrence)
+            )
+
+
+def import_statement_csv(db, source, encoding='utf-8-sig', delimiter=None,
+                         chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Importe les dépenses d'un relevé bancaire CSV
+
+    Args:
+        db (ExpenseDatabase): Base de destination
+        source: Chemin du fichier, flux binaire (fichier envoyé) ou flux texte
+        encoding (str): Encodage du fichier (chemin ou flux binaire)
+        delimiter (str, optional): Séparateur (détecté sur l'en-tête par défaut)
+        chunk_size (int): Nombre de lignes insérées par paquet
+
+    Returns:
+        dict: Compteurs 'read' (opérations lues), 'inserted' (nouvelles dépenses),
+            'duplicates' (déjà importées), 'skipped' (crédits et lignes sans
+            montant), 'rejected' (lignes illisibles) et 'errors' (premiers messages)
+
+    Raises:
+        ValueError: Si l'en-tête est introuvable ou la catégorie par défaut inconnue
+    """
+    stream, owned = _open_text(source, encoding)
+    try:
+        statement = StatementImport(stream, db.get_categories(), delimiter)
+        inserted = db.import_expenses_bulk(statement.rows(), chunk_size)
+    finally:
+        if owned:
+            stream.close()
+        elif isinstance(stream, io.TextIOWrapper) and not isinstance(source, io.TextIOBase):
+            # Le flux binaire reste à l'appelant
+            stream.detach()
+
+    valid = statement.read - statement.skipped - statement.rejected
+    return {
+        'read': statement.read,
+        'inserted': inserted,
+        'duplicates': valid - inserted,
+        'skipped': statement.skipped,
+        'rejected': statement.rejected,
+        'errors': statement.errors
+    }
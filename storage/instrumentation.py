@@ -0,0 +1,146 @@
+"""
+Instrumentation des requêtes SQL pour l'application D-Tracker
+
+Chaque requête exécutée par ExpenseDatabase est chronométrée (durée, lignes
+retournées, attente de connexion). Les mesures sont regroupées par thread,
+c'est-à-dire par réexécution de page Streamlit. Les requêtes dépassant le
+seuil configuré sont journalisées avec leur plan d'exécution.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from config.settings import SLOW_QUERY_THRESHOLD_MS
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_sql(query):
+    """Ramène une requête sur une seule ligne (clé de regroupement)"""
+    return ' '.join(query.split())
+
+
+class QueryTrace:
+    """Mesure en cours d'une requête ; l'appelant renseigne `rows`"""
+
+    def __init__(self):
+        self.rows = 0
+
+
+class QueryRecorder:
+    """Collecte les mesures des requêtes, par thread"""
+
+    def __init__(self, slow_query_ms=SLOW_QUERY_THRESHOLD_MS):
+        self.slow_query_ms = slow_query_ms
+        self._local = threading.local()
+
+    def _stats(self):
+        """Compteurs du thread courant"""
+        stats = getattr(self._local, 'stats', None)
+        if stats is None:
+            stats = self._local.stats = {
+                'queries': 0,
+                'total_ms': 0.0,
+                'wait_ms': 0.0,
+                'rows': 0,
+                'slow_queries': 0,
+                'by_query': {}
+            }
+            self._local.pending_wait_ms = 0.0
+        return stats
+
+    def add_wait(self, seconds):
+        """Enregistre une attente de connexion ou de verrou, imputée à la requête suivante"""
+        self._stats()
+        self._local.pending_wait_ms += seconds * 1000
+
+    def record(self, conn, query, params, seconds, rows):
+        """
+        Enregistre une requête exécutée
+
+        Args:
+            conn (sqlite3.Connection): Connexion utilisée (pour EXPLAIN QUERY PLAN)
+            query (str): Requête SQL
+            params: Paramètres liés
+            seconds (float): Durée d'exécution et de lecture des résultats
+            rows (int): Nombre de lignes retournées (ou modifiées)
+        """
+        stats = self._stats()
+        elapsed_ms = seconds * 1000
+        wait_ms = self._local.pending_wait_ms
+        self._local.pending_wait_ms = 0.0
+
+        stats['queries'] += 1
+        stats['total_ms'] += elapsed_ms
+        stats['wait_ms'] += wait_ms
+        stats['rows'] += rows
+
+        sql = normalize_sql(query)
+        entry = stats['by_query'].setdefault(sql, {'calls': 0, 'total_ms': 0.0, 'wait_ms': 0.0, 'rows': 0})
+        entry['calls'] += 1
+        entry['total_ms'] += elapsed_ms
+        entry['wait_ms'] += wait_ms
+        entry['rows'] += rows
+
+        if self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms:
+            stats['slow_queries'] += 1
+            logger.warning(
+                "Requête lente (%.1f ms, %d lignes, attente %.1f ms) : %s\nPlan :\n%s",
+                elapsed_ms, rows, wait_ms, sql, self.explain(conn, query, params)
+            )
+
+    @contextmanager
+    def trace(self, conn, query, params=()):
+        """
+        Chronomètre le bloc qui exécute `query` et lit ses résultats
+
+        Yields:
+            QueryTrace: Objet dont l'appelant renseigne `rows`
+        """
+        trace = QueryTrace()
+        start = time.perf_counter()
+        try:
+            yield trace
+        finally:
+            self.record(conn, query, params, time.perf_counter() - start, trace.rows)
+
+    @staticmethod
+    def explain(conn, query, params=()):
+        """
+        Retourne le plan d'exécution de la requête (EXPLAIN QUERY PLAN)
+
+        Returns:
+            str: Une ligne par étape du plan, indentée selon sa profondeur
+        """
+        try:
+            plan = conn.execute('EXPLAIN QUERY PLAN ' + query, params).fetchall()
+        except Exception as e:
+            # Connexion d'un autre moteur (DuckDB) : EXPLAIN QUERY PLAN n'existe pas
+            return f"(plan indisponible : {e})"
+
+        depths = {0: -1}
+        lines = []
+        for node_id, parent_id, _, detail in plan:
+            depths[node_id] = depths.get(parent_id, -1) + 1
+            lines.append('  ' * depths[node_id] + detail)
+        return '\n'.join(lines)
+
+    def snapshot(self, reset=False):
+        """
+        Mesures du thread courant
+
+        Args:
+            reset (bool): Remet les compteurs à zéro après lecture
+
+        Returns:
+            dict: queries, total_ms, wait_ms, rows, slow_queries et by_query
+                (par requête : calls, total_ms, wait_ms, rows)
+        """
+        stats = self._stats()
+        snapshot = dict(stats, by_query={sql: dict(entry) for sql, entry in stats['by_query'].items()})
+        if reset:
+            self._local.stats = None
+            self._stats()
+        return snapshot
@@ -0,0 +1,601 @@
+"""
+Migrations versionnées du schéma SQLite pour l'application D-Tracker
+
+La version courante du schéma est stockée dans `PRAGMA user_version`.
+Chaque migration fait passer la base d'une version à la suivante et n'est
+exécutée qu'une seule fois, ce qui permet de faire évoluer une base
+existante sans la recréer.
+"""
+
+import sqlite3
+from contextlib import contextmanager
+
+from config.settings import DEFAULT_CATEGORIES
+from storage.encoding import cents_sql, day_sql, period_sql
+
+# Table virtuelle FTS5 indexant les descriptions des dépenses
+FULLTEXT_TABLE = 'expenses_fts'
+
+# Colonnes générées de daily_category_totals par granularité de période
+PERIOD_COLUMNS = {
+    'week': 'year_week',
+    'month': 'year_month',
+    'quarter': 'year_quarter',
+    'year': 'year'
+}
+
+
+def _create_base_tables(cursor):
+    """Tables d'origine et catégories par défaut (idempotent pour les bases existantes)"""
+    # Table des catégories
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            color TEXT DEFAULT '#1f77b4'
+        )
+    ''')
+
+    # Table des dépenses
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS expenses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            amount REAL NOT NULL,
+            description TEXT,
+            category_id INTEGER,
+            date TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (category_id) REFERENCES categories (id)
+        )
+    ''')
+
+    # Insérer les catégories par défaut
+    cursor.executemany('''
+        INSERT OR IGNORE INTO categories (name, color) VALUES (?, ?)
+    ''', DEFAULT_CATEGORIES)
+
+
+def _add_expense_indexes(cursor):
+    """Index pour les filtres par date et les jointures par catégorie"""
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses (date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_expenses_category_date ON expenses (category_id, date)')
+    # Index couvrant : les agrégats par date/catégorie ne lisent plus la table
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_expenses_date_category_amount ON expenses (date, category_id, amount)')
+
+
+def _create_daily_totals(cursor):
+    """Table d'agrégats par jour et par catégorie maintenue par triggers"""
+    # Les dépenses sans catégorie sont regroupées sous category_id = 0
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_category_totals (
+            date TEXT NOT NULL,
+            category_id INTEGER NOT NULL,
+            total REAL NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (date, category_id)
+        ) WITHOUT ROWID
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_totals_insert
+        AFTER INSERT ON expenses
+        BEGIN
+            INSERT INTO daily_category_totals (date, category_id, total, count)
+            VALUES (NEW.date, IFNULL(NEW.category_id, 0), NEW.amount, 1)
+            ON CONFLICT (date, category_id)
+            DO UPDATE SET total = total + excluded.total, count = count + 1;
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_totals_delete
+        AFTER DELETE ON expenses
+        BEGIN
+            UPDATE daily_category_totals
+            SET total = total - OLD.amount, count = count - 1
+            WHERE date = OLD.date AND category_id = IFNULL(OLD.category_id, 0);
+            DELETE FROM daily_category_totals
+            WHERE date = OLD.date AND category_id = IFNULL(OLD.category_id, 0) AND count <= 0;
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_totals_update
+        AFTER UPDATE OF amount, date, category_id ON expenses
+        BEGIN
+            UPDATE daily_category_totals
+            SET total = total - OLD.amount, count = count - 1
+            WHERE date = OLD.date AND category_id = IFNULL(OLD.category_id, 0);
+            DELETE FROM daily_category_totals
+            WHERE date = OLD.date AND category_id = IFNULL(OLD.category_id, 0) AND count <= 0;
+            INSERT INTO daily_category_totals (date, category_id, total, count)
+            VALUES (NEW.date, IFNULL(NEW.category_id, 0), NEW.amount, 1)
+            ON CONFLICT (date, category_id)
+            DO UPDATE SET total = total + excluded.total, count = count + 1;
+        END
+    ''')
+
+    cursor.execute('''
+        INSERT INTO daily_category_totals (date, category_id, total, count)
+        SELECT date, IFNULL(category_id, 0), SUM(amount), COUNT(*)
+        FROM expenses
+        GROUP BY date, IFNULL(category_id, 0)
+    ''')
+
+
+def rebuild_daily_totals(cursor):
+    """
+    Recalcule entièrement la table daily_category_totals depuis expenses
+
+    Args:
+        cursor (sqlite3.Cursor): Curseur sur la base (dans une transaction)
+    """
+    cursor.execute('DELETE FROM daily_category_totals')
+    cursor.execute('''
+        INSERT INTO daily_category_totals (day, category_id, total_cents, count)
+        SELECT day, IFNULL(category_id, 0), SUM(amount_cents), COUNT(*)
+        FROM expenses
+        GROUP BY day, IFNULL(category_id, 0)
+    ''')
+    if _table_exists(cursor, 'partition_totals'):
+        # Dépenses déplacées dans les archives annuelles (totaux figés à l'archivage)
+        cursor.execute('''
+            INSERT INTO daily_category_totals (day, category_id, total_cents, count)
+            SELECT day, category_id, total_cents, count FROM partition_totals WHERE true
+            ON CONFLICT (day, category_id)
+            DO UPDATE SET total_cents = total_cents + excluded.total_cents,
+                          count = count + excluded.count
+        ''')
+
+
+# Triggers tenant à jour les tables dérivées d'expenses à chaque insertion ou suppression
+INSERT_TRIGGERS = ('trg_expenses_totals_insert', 'trg_expenses_fts_insert')
+DELETE_TRIGGERS = ('trg_expenses_totals_delete', 'trg_expenses_fts_delete')
+
+
+@contextmanager
+def suspended_triggers(cursor, names):
+    """
+    Supprime des triggers le temps d'un bloc puis les recrée à l'identique
+
+    À utiliser dans une transaction : en cas d'erreur, l'annulation rétablit
+    aussi les triggers.
+
+    Args:
+        cursor (sqlite3.Cursor): Curseur sur la base (dans une transaction)
+        names (tuple): Noms des triggers
+
+    Yields:
+        dict: Nom -> définition SQL des triggers existants parmi names
+    """
+    placeholders = ', '.join('?' * len(names))
+    triggers = dict(cursor.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({placeholders})",
+        names
+    ).fetchall())
+    for name in triggers:
+        cursor.execute(f'DROP TRIGGER {name}')
+
+    yield triggers
+
+    for sql in triggers.values():
+        cursor.execute(sql)
+
+
+@contextmanager
+def deferred_insert_maintenance(cursor, rebuild=False):
+    """
+    Reporte la mise à jour des agrégats et de l'index plein texte à la fin d'un chargement en masse
+
+    Les triggers d'insertion sont supprimés le temps du chargement, puis les
+    lignes ajoutées sont reportées en une seule passe (agrégats regroupés par
+    jour et catégorie) et les triggers recréés. Tout se fait dans la
+    transaction de l'appelant : en cas d'erreur, l'annulation rétablit aussi
+    les triggers.
+
+    Args:
+        cursor (sqlite3.Cursor): Curseur sur la base (dans une transaction)
+        rebuild (bool): Recalcule entièrement agrégats et index, pour des
+            lignes insérées avec leurs propres id (restauration)
+    """
+    # AUTOINCREMENT : les lignes insérées ont un id supérieur au plus grand id actuel
+    last_id = cursor.execute('SELECT IFNULL(MAX(id), 0) FROM expenses').fetchone()[0]
+
+    with suspended_triggers(cursor, INSERT_TRIGGERS) as triggers:
+        changes = cursor.connection.total_changes
+
+        yield
+
+        # Aucune ligne insérée (réimport) : rien à reporter
+        inserted = cursor.connection.total_changes != changes
+        totals = inserted and 'trg_expenses_totals_insert' in triggers
+        fulltext = inserted and 'trg_expenses_fts_insert' in triggers
+        if rebuild:
+            if totals:
+                rebuild_daily_totals(cursor)
+            if fulltext:
+                cursor.execute(f"INSERT INTO {FULLTEXT_TABLE} ({FULLTEXT_TABLE}) VALUES ('rebuild')")
+        else:
+            if totals:
+                cursor.execute('''
+                    INSERT INTO daily_category_totals (day, category_id, total_cents, count)
+                    SELECT day, IFNULL(category_id, 0), SUM(amount_cents), COUNT(*)
+                    FROM expenses
+                    WHERE id > ?
+                    GROUP BY day, IFNULL(category_id, 0)
+                    ON CONFLICT (day, category_id)
+                    DO UPDATE SET total_cents = total_cents + excluded.total_cents,
+                                  count = count + excluded.count
+                ''', (last_id,))
+            if fulltext:
+                cursor.execute(f'''
+                    INSERT INTO {FULLTEXT_TABLE} (rowid, description)
+                    SELECT id, description FROM expenses WHERE id > ?
+                ''', (last_id,))
+
+
+def fulltext_table_sql(schema='main'):
+    """Définition de l'index plein texte des descriptions (base principale ou archive attachée)"""
+    # Table à contenu externe : seul l'index est stocké, le texte reste dans expenses
+    return f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {schema}.{FULLTEXT_TABLE} USING fts5(
+            description,
+            content='expenses',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    '''
+
+
+def _create_expenses_fts(cursor):
+    """Index plein texte des descriptions (ignoré si SQLite est compilé sans FTS5)"""
+    try:
+        cursor.execute(fulltext_table_sql())
+    except sqlite3.OperationalError:
+        # Module fts5 absent : la recherche se rabat sur LIKE
+        return
+
+    _create_fts_triggers(cursor)
+
+    # Indexation des dépenses existantes
+    cursor.execute(f"INSERT INTO {FULLTEXT_TABLE} ({FULLTEXT_TABLE}) VALUES ('rebuild')")
+
+
+def _create_fts_triggers(cursor):
+    """Triggers synchronisant l'index plein texte avec la table expenses"""
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_fts_insert
+        AFTER INSERT ON expenses
+        BEGIN
+            INSERT INTO {FULLTEXT_TABLE} (rowid, description) VALUES (NEW.id, NEW.description);
+        END
+    ''')
+
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_fts_delete
+        AFTER DELETE ON expenses
+        BEGIN
+            INSERT INTO {FULLTEXT_TABLE} ({FULLTEXT_TABLE}, rowid, description)
+            VALUES ('delete', OLD.id, OLD.description);
+        END
+    ''')
+
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_fts_update
+        AFTER UPDATE OF description ON expenses
+        BEGIN
+            INSERT INTO {FULLTEXT_TABLE} ({FULLTEXT_TABLE}, rowid, description)
+            VALUES ('delete', OLD.id, OLD.description);
+            INSERT INTO {FULLTEXT_TABLE} (rowid, description) VALUES (NEW.id, NEW.description);
+        END
+    ''')
+
+
+def _rebuild_expenses_table(cursor, columns, select):
+    """
+    Recrée la table expenses avec une nouvelle définition (SQLite ne sait pas modifier une colonne)
+
+    Les index et triggers de l'ancienne table disparaissent avec elle : la
+    migration appelante les recrée. Les identifiants sont conservés, ainsi
+    que le compteur AUTOINCREMENT (pas de réutilisation d'identifiants).
+
+    Args:
+        cursor (sqlite3.Cursor): Curseur sur la base (dans une transaction)
+        columns (str): Définition des colonnes de la nouvelle table
+        select (str): Requête sur l'ancienne table fournissant les lignes copiées
+    """
+    row = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'expenses'").fetchone()
+    sequence = row[0] if row else 0
+
+    cursor.execute(f'CREATE TABLE expenses_new ({columns})')
+    cursor.execute(f'INSERT INTO expenses_new {select}')
+    cursor.execute('DROP TABLE expenses')
+    cursor.execute('ALTER TABLE expenses_new RENAME TO expenses')
+    cursor.execute(
+        "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'expenses'", (sequence,)
+    )
+    if cursor.rowcount == 0 and sequence:
+        # Table vide : la nouvelle table n'a pas encore de compteur
+        cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('expenses', ?)", (sequence,))
+
+
+def _encode_amounts_and_dates(cursor):
+    """Montants en centimes entiers et dates en numéros de jour (expenses et agrégats)"""
+    _rebuild_expenses_table(cursor, '''
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        amount_cents INTEGER NOT NULL,
+        description TEXT,
+        category_id INTEGER,
+        day INTEGER NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (category_id) REFERENCES categories (id)
+    ''', f'''
+        SELECT id, {cents_sql('amount')}, description, category_id, {day_sql('date')}, created_at
+        FROM expenses
+    ''')
+
+    cursor.execute('CREATE INDEX idx_expenses_day ON expenses (day)')
+    cursor.execute('CREATE INDEX idx_expenses_category_day ON expenses (category_id, day)')
+    cursor.execute('CREATE INDEX idx_expenses_day_category_amount ON expenses (day, category_id, amount_cents)')
+
+    if _table_exists(cursor, FULLTEXT_TABLE):
+        # Les identifiants et descriptions sont inchangés : l'index reste valide
+        _create_fts_triggers(cursor)
+
+    # Agrégats quotidiens en centimes, par numéro de jour
+    cursor.execute('DROP TABLE daily_category_totals')
+    cursor.execute('''
+        CREATE TABLE daily_category_totals (
+            day INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            total_cents INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, category_id)
+        ) WITHOUT ROWID
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER trg_expenses_totals_insert
+        AFTER INSERT ON expenses
+        BEGIN
+            INSERT INTO daily_category_totals (day, category_id, total_cents, count)
+            VALUES (NEW.day, IFNULL(NEW.category_id, 0), NEW.amount_cents, 1)
+            ON CONFLICT (day, category_id)
+            DO UPDATE SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER trg_expenses_totals_delete
+        AFTER DELETE ON expenses
+        BEGIN
+            UPDATE daily_category_totals
+            SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+            WHERE day = OLD.day AND category_id = IFNULL(OLD.category_id, 0);
+            DELETE FROM daily_category_totals
+            WHERE day = OLD.day AND category_id = IFNULL(OLD.category_id, 0) AND count <= 0;
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER trg_expenses_totals_update
+        AFTER UPDATE OF amount_cents, day, category_id ON expenses
+        BEGIN
+            UPDATE daily_category_totals
+            SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+            WHERE day = OLD.day AND category_id = IFNULL(OLD.category_id, 0);
+            DELETE FROM daily_category_totals
+            WHERE day = OLD.day AND category_id = IFNULL(OLD.category_id, 0) AND count <= 0;
+            INSERT INTO daily_category_totals (day, category_id, total_cents, count)
+            VALUES (NEW.day, IFNULL(NEW.category_id, 0), NEW.amount_cents, 1)
+            ON CONFLICT (day, category_id)
+            DO UPDATE SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+        END
+    ''')
+
+    rebuild_daily_totals(cursor)
+
+
+def _add_period_columns(cursor):
+    """Colonnes de période générées et indexées sur les agrégats quotidiens"""
+    # Une colonne générée STORED ne peut pas être ajoutée par ALTER TABLE :
+    # la table d'agrégats (entièrement dérivée d'expenses) est recréée
+    generated = ',\n'.join(
+        f'{column} AS ({period_sql(period, "day")}) STORED'
+        for period, column in PERIOD_COLUMNS.items()
+    )
+    cursor.execute('DROP TABLE daily_category_totals')
+    cursor.execute(f'''
+        CREATE TABLE daily_category_totals (
+            day INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            total_cents INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            {generated},
+            PRIMARY KEY (day, category_id)
+        ) WITHOUT ROWID
+    ''')
+
+    # Index couvrants : regroupement par période dans l'ordre de l'index, sans tri
+    for column in PERIOD_COLUMNS.values():
+        cursor.execute(
+            f'CREATE INDEX idx_totals_{column} '
+            f'ON daily_category_totals ({column}, category_id, day, total_cents, count)'
+        )
+
+    rebuild_daily_totals(cursor)
+
+
+def _add_import_hash(cursor):
+    """Empreinte des lignes importées, unique pour rendre les réimports sans effet"""
+    cursor.execute('ALTER TABLE expenses ADD COLUMN import_hash BLOB')
+    # Index partiel : les dépenses saisies à la main (sans empreinte) n'y figurent pas
+    cursor.execute(
+        'CREATE UNIQUE INDEX idx_expenses_import_hash '
+        'ON expenses (import_hash) WHERE import_hash IS NOT NULL'
+    )
+
+
+def _create_partitions(cursor):
+    """Registre des archives annuelles et totaux figés des dépenses archivées"""
+    cursor.execute('''
+        CREATE TABLE partitions (
+            year INTEGER PRIMARY KEY,
+            path TEXT NOT NULL,
+            first_day INTEGER NOT NULL,
+            last_day INTEGER NOT NULL,
+            rows INTEGER NOT NULL,
+            archived_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Permet de recalculer daily_category_totals sans ouvrir les archives
+    cursor.execute('''
+        CREATE TABLE partition_totals (
+            day INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            total_cents INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, category_id)
+        ) WITHOUT ROWID
+    ''')
+
+
+def _create_rollup_changes(cursor):
+    """Journal des jours d'agrégats modifiés, pour la copie incrémentale en mémoire"""
+    # Un jour par ligne, avec le numéro de sa dernière modification
+    cursor.execute('''
+        CREATE TABLE rollup_changes (
+            day INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX idx_rollup_changes_version ON rollup_changes (version)')
+    # Triggers installés à l'ouverture, selon le moteur d'analyse (set_rollup_change_tracking)
+
+
+# Triggers tenant à jour rollup_changes : (événement, ligne dont le jour est noté)
+ROLLUP_CHANGE_EVENTS = (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD'))
+ROLLUP_CHANGE_TRIGGERS = tuple(f'trg_totals_changes_{event.lower()}' for event, _ in ROLLUP_CHANGE_EVENTS)
+
+
+def rollup_change_triggers(conn):
+    """
+    Triggers du journal rollup_changes présents dans la base
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base
+
+    Returns:
+        set: Noms des triggers installés
+    """
+    placeholders = ', '.join('?' * len(ROLLUP_CHANGE_TRIGGERS))
+    return {row[0] for row in conn.execute(
+        f"SELECT name FROM sqlite_master WHERE type = 'trigger' AND name IN ({placeholders})",
+        ROLLUP_CHANGE_TRIGGERS
+    )}
+
+
+def set_rollup_change_tracking(cursor, enabled):
+    """
+    Installe ou retire les triggers du journal rollup_changes (dans une transaction)
+
+    Le journal ne sert qu'aux copies du moteur d'analyse : chaque modification
+    d'un agrégat quotidien y ajoute l'écriture d'une ligne (et la lecture de
+    la version la plus élevée, par son index). Sans copie, les triggers sont
+    retirés et le journal vidé : une copie activée plus tard est d'abord
+    rechargée entièrement.
+
+    Args:
+        cursor (sqlite3.Cursor): Curseur sur la base (dans une transaction)
+        enabled (bool): True pour un moteur à copie ("memory", "duckdb")
+    """
+    if not enabled:
+        for name in ROLLUP_CHANGE_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute('DELETE FROM rollup_changes')
+        return
+
+    for (event, row), name in zip(ROLLUP_CHANGE_EVENTS, ROLLUP_CHANGE_TRIGGERS):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {name}
+            AFTER {event} ON daily_category_totals
+            BEGIN
+                INSERT INTO rollup_changes (day, version)
+                VALUES ({row}.day, (SELECT IFNULL(MAX(version), 0) + 1 FROM rollup_changes))
+                ON CONFLICT (day) DO UPDATE SET version = excluded.version;
+            END
+        ''')
+
+
+def _table_exists(cursor, name):
+    """Indique si une table (ou table virtuelle) existe"""
+    row = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+
+def has_fulltext_index(conn):
+    """
+    Indique si l'index plein texte des descriptions existe
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base
+
+    Returns:
+        bool: True si la table FTS5 a été créée par la migration
+    """
+    return _table_exists(conn, FULLTEXT_TABLE)
+
+
+# Liste ordonnée des migrations : (version, description, fonction)
+MIGRATIONS = [
+    (1, "Tables categories et expenses, catégories par défaut", _create_base_tables),
+    (2, "Index sur expenses (date, catégorie, montant)", _add_expense_indexes),
+    (3, "Agrégats quotidiens par catégorie", _create_daily_totals),
+    (4, "Index plein texte FTS5 des descriptions", _create_expenses_fts),
+    (5, "Montants en centimes et dates en numéros de jour", _encode_amounts_and_dates),
+    (6, "Colonnes de période indexées sur les agrégats quotidiens", _add_period_columns),
+    (7, "Empreinte unique des dépenses importées", _add_import_hash),
+    (8, "Registre des archives annuelles", _create_partitions),
+    (9, "Journal des jours d'agrégats modifiés", _create_rollup_changes),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    """
+    Lit la version du schéma enregistrée dans la base
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base
+
+    Returns:
+        int: Version courante (0 pour une base jamais migrée)
+    """
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def apply_migrations(conn):
+    """
+    Applique les migrations manquantes (à appeler dans une transaction)
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base
+
+    Returns:
+        list: Versions appliquées
+    """
+    current = get_schema_version(conn)
+    applied = []
+
+    for version, _description, migration in MIGRATIONS:
+        if version <= current:
+            continue
+        migration(conn.cursor())
+        # PRAGMA n'accepte pas de paramètre lié
+        conn.execute(f'PRAGMA user_version = {int(version)}')
+        applied.append(version)
+
+    return applied
@@ -0,0 +1,315 @@
+"""
+Archives annuelles des dépenses pour l'application D-Tracker
+
+Une année close peut être déplacée de la table expenses vers son propre
+fichier (expenses_2019.db à côté de la base), recensé dans la table
+partitions. La base principale ne garde que l'historique récent : ses pages
+et son cache servent les requêtes courantes.
+
+Les lectures de dépenses n'attachent (ATTACH) que les archives dont l'année
+recoupe la période demandée et interrogent une vue UNION ALL de la table
+principale et de ces archives. Les agrégats quotidiens restent entièrement
+dans la base principale (les totaux des lignes archivées sont figés dans
+partition_totals) : les statistiques lues dans ces agrégats n'ouvrent aucune
+archive. Celles qui portent sur les dépenses elles-mêmes (montant maximal
+du résumé de période, requêtes filtrées par montant ou par texte) lisent
+les archives de la période comme les autres lectures de dépenses.
+"""
+
+import os
+import sqlite3
+from collections import namedtuple
+from datetime import date
+
+from config.settings import PARTITION_FILENAME, PARTITION_MAX_ATTACHED
+from storage.encoding import to_day
+from storage.migrations import DELETE_TRIGGERS, FULLTEXT_TABLE, fulltext_table_sql, suspended_triggers
+
+# Colonnes d'expenses, dans le même ordre dans la base principale et les archives
+EXPENSE_STORAGE_COLUMNS = 'id, amount_cents, description, category_id, day, created_at, import_hash'
+
+# Nombre maximal de paramètres par requête IN (...)
+LOOKUP_BATCH_SIZE = 500
+
+Partition = namedtuple('Partition', ['year', 'path', 'first_day', 'last_day', 'rows'])
+
+
+def schema_name(year):
+    """Nom sous lequel l'archive d'une année est attachée"""
+    return f'archive_{int(year)}'
+
+
+def partition_filename(db_path, year):
+    """Nom du fichier d'archive d'une année (relatif au dossier de la base)"""
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    return PARTITION_FILENAME.format(stem=stem, year=int(year))
+
+
+def year_bounds(year):
+    """Premier et dernier numéros de jour d'une année"""
+    return to_day(date(year, 1, 1)), to_day(date(year, 12, 31))
+
+
+def load_partitions(conn, db_path):
+    """
+    Lit le registre des archives
+
+    Args:
+        conn (sqlite3.Connection): Connexion à la base principale
+        db_path (str): Chemin de la base (les archives sont dans le même dossier)
+
+    Returns:
+        list: Partition triées par année
+    """
+    directory = os.path.dirname(os.path.abspath(db_path))
+    rows = conn.execute(
+        'SELECT year, path, first_day, last_day, rows FROM partitions ORDER BY year'
+    ).fetchall()
+    return [
+        Partition(year, os.path.join(directory, path), first_day, last_day, count)
+        for year, path, first_day, last_day, count in rows
+    ]
+
+
+def overlapping(partitions, start_day=None, end_day=None):
+    """Archives dont l'année recoupe la période [start_day, end_day]"""
+    return [
+        partition for partition in partitions
+        if (start_day is None or partition.last_day >= start_day)
+        and (end_day is None or partition.first_day <= end_day)
+    ]
+
+
+def source_groups(partitions, size=PARTITION_MAX_ATTACHED):
+    """
+    Répartit les archives en groupes interrogés ensemble, les plus récentes d'abord
+
+    SQLite limite le nombre de bases attachées : au-delà de `size` archives,
+    une lecture est faite groupe par groupe.
+
+    Returns:
+        list: Listes de Partition (une liste vide si aucune archive)
+    """
+    ordered = sorted(partitions, key=lambda partition: partition.year, reverse=True)
+    return [ordered[index:index + size] for index in range(0, len(ordered), size)] or [[]]
+
+
+def attach(conn, partitions, create=False):
+    """
+    Attache des archives à une connexion (hors transaction)
+
+    Les archives déjà attachées sont réutilisées ; au-delà de
+    PARTITION_MAX_ATTACHED, les moins récemment utilisées sont détachées.
+
+    Args:
+        conn (ManagedConnection): Connexion du thread courant
+        partitions (list): Archives à attacher
+        create (bool): Crée les fichiers absents (archivage)
+
+    Returns:
+        list: Noms de schéma des archives
+
+    Raises:
+        FileNotFoundError: Si le fichier d'une archive enregistrée a disparu
+    """
+    if conn.attached is None:
+        conn.attached = {}
+    wanted = {schema_name(partition.year): partition.path for partition in partitions}
+
+    missing = [schema for schema in wanted if schema not in conn.attached]
+    for schema in list(conn.attached):
+        if len(conn.attached) + len(missing) <= PARTITION_MAX_ATTACHED:
+            break
+        if schema not in wanted:
+            conn.execute(f'DETACH DATABASE {schema}')
+            del conn.attached[schema]
+
+    for schema, path in wanted.items():
+        if schema in conn.attached:
+            # Marquée comme la plus récemment utilisée
+            conn.attached[schema] = conn.attached.pop(schema)
+            continue
+        if not create and not os.path.exists(path):
+            raise FileNotFoundError(f"Archive introuvable : {path}")
+        conn.execute(f'ATTACH DATABASE ? AS {schema}', (path,))
+        conn.attached[schema] = path
+    return list(wanted)
+
+
+def union_source(schemas, table='expenses'):
+    """
+    Source FROM couvrant la table expenses de plusieurs schémas
+
+    Args:
+        schemas (list): 'main' et/ou noms de schéma d'archives
+
+    Returns:
+        str: Nom de la table seule pour la base principale, sinon sous-requête UNION ALL
+            (les conditions de la requête englobante sont reportées dans chaque branche)
+    """
+    if list(schemas) == ['main']:
+        return table
+    branches = ' UNION ALL '.join(
+        f'SELECT {EXPENSE_STORAGE_COLUMNS} FROM {schema}.{table}' for schema in schemas
+    )
+    return f'({branches})'
+
+
+def _create_archive_schema(conn, schema, fulltext):
+    """Table expenses (et index plein texte) d'une archive, sans triggers ni agrégats"""
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {schema}.expenses (
+            id INTEGER PRIMARY KEY,
+            amount_cents INTEGER NOT NULL,
+            description TEXT,
+            category_id INTEGER,
+            day INTEGER NOT NULL,
+            created_at TEXT,
+            import_hash BLOB
+        )
+    ''')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_expenses_day ON expenses (day)')
+    conn.execute(
+        f'CREATE INDEX IF NOT EXISTS {schema}.idx_expenses_category_day ON expenses (category_id, day)'
+    )
+    conn.execute(
+        f'CREATE INDEX IF NOT EXISTS {schema}.idx_expenses_import_hash '
+        f'ON expenses (import_hash) WHERE import_hash IS NOT NULL'
+    )
+    if fulltext:
+        conn.execute(fulltext_table_sql(schema))
+
+
+def archive_year(connections, year, fulltext=False):
+    """
+    Déplace les dépenses d'une année close dans son fichier d'archive
+
+    La copie vers l'archive et la suppression dans la base principale sont
+    deux transactions distinctes, chacune ne modifiant qu'un fichier (la
+    validation d'une transaction sur plusieurs bases en WAL n'est pas
+    atomique). Si l'opération est interrompue entre les deux, les lignes
+    restent dans la base principale (et, pour une année déjà archivée,
+    apparaissent en double) : relancer l'archivage la termine. Une
+    année déjà archivée peut l'être de nouveau pour y ajouter les dépenses
+    saisies depuis.
+
+    Args:
+        connections (ConnectionManager): Connexions à la base principale
+        year (int): Année à archiver (antérieure à l'année en cours)
+        fulltext (bool): Crée aussi l'index plein texte de l'archive
+
+    Returns:
+        int: Nombre de dépenses déplacées
+
+    Raises:
+        ValueError: Si l'année n'est pas close
+    """
+    year = int(year)
+    if year >= date.today().year:
+        raise ValueError(f"L'année {year} n'est pas close : seules les années passées sont archivées")
+
+    first_day, last_day = year_bounds(year)
+    conn = connections.connection()
+    pending = conn.execute(
+        'SELECT COUNT(*) FROM main.expenses WHERE day BETWEEN ? AND ?', (first_day, last_day)
+    ).fetchone()[0]
+    if pending == 0:
+        return 0
+
+    filename = partition_filename(connections.db_path, year)
+    path = os.path.join(os.path.dirname(os.path.abspath(connections.db_path)), filename)
+    schema = attach(conn, [Partition(year, path, first_day, last_day, 0)], create=True)[0]
+
+    # 1. Copie dans l'archive : seule l'archive est modifiée
+    with connections.transaction() as conn:
+        _create_archive_schema(conn, schema, fulltext)
+        conn.execute(f'''
+            INSERT INTO {schema}.expenses ({EXPENSE_STORAGE_COLUMNS})
+            SELECT {EXPENSE_STORAGE_COLUMNS} FROM main.expenses
+            WHERE day BETWEEN ? AND ?
+            ON CONFLICT DO NOTHING
+        ''', (first_day, last_day))
+        if fulltext:
+            conn.execute(f"INSERT INTO {schema}.{FULLTEXT_TABLE} ({FULLTEXT_TABLE}) VALUES ('rebuild')")
+
+    # 2. Suppression dans la base principale : seule la base principale est modifiée
+    archived = f'day BETWEEN ? AND ? AND id IN (SELECT id FROM {schema}.expenses)'
+    params = (first_day, last_day)
+    with connections.transaction() as conn:
+        # Les agrégats quotidiens gardent les totaux archivés, figés dans partition_totals
+        conn.execute(f'''
+            INSERT INTO partition_totals (day, category_id, total_cents, count)
+            SELECT day, IFNULL(category_id, 0), SUM(amount_cents), COUNT(*)
+            FROM main.expenses
+            WHERE {archived}
+            GROUP BY day, IFNULL(category_id, 0)
+            ON CONFLICT (day, category_id)
+            DO UPDATE SET total_cents = total_cents + excluded.total_cents,
+                          count = count + excluded.count
+        ''', params)
+        if fulltext:
+            conn.execute(f'''
+                INSERT INTO main.{FULLTEXT_TABLE} ({FULLTEXT_TABLE}, rowid, description)
+                SELECT 'delete', id, description FROM main.expenses WHERE {archived}
+            ''', params)
+        with suspended_triggers(conn.cursor(), DELETE_TRIGGERS):
+            moved = conn.execute(f'DELETE FROM main.expenses WHERE {archived}', params).rowcount
+
+        conn.execute(f'''
+            INSERT INTO partitions (year, path, first_day, last_day, rows)
+            VALUES (?, ?, ?, ?, (SELECT COUNT(*) FROM {schema}.expenses))
+            ON CONFLICT (year) DO UPDATE SET
+                path = excluded.path, rows = excluded.rows, archived_at = CURRENT_TIMESTAMP
+        ''', (year, filename, first_day, last_day))
+
+    return moved
+
+
+class ArchiveLookup:
+    """
+    Recherche de clés (id, empreinte d'import) déjà présentes dans les archives
+
+    Les archives sont lues par des connexions directes en lecture seule :
+    la recherche reste possible pendant une transaction d'écriture sur la
+    base principale, où ATTACH est interdit.
+    """
+
+    def __init__(self, partitions):
+        self.by_year = {partition.year: partition for partition in partitions}
+        self._connections = {}
+
+    def existing(self, year, column, values):
+        """
+        Valeurs de `column` déjà présentes dans l'archive d'une année
+
+        Args:
+            year (int): Année des lignes
+            column (str): 'id' ou 'import_hash'
+            values (list): Valeurs cherchées
+
+        Returns:
+            set: Valeurs trouvées (vide si l'année n'est pas archivée)
+        """
+        partition = self.by_year.get(year)
+        if partition is None:
+            return set()
+        conn = self._connections.get(year)
+        if conn is None:
+            conn = sqlite3.connect(f'file:{partition.path}?mode=ro', uri=True)
+            self._connections[year] = conn
+
+        found = set()
+        values = [value for value in values if value is not None]
+        for start in range(0, len(values), LOOKUP_BATCH_SIZE):
+            batch = values[start:start + LOOKUP_BATCH_SIZE]
+            placeholders = ', '.join('?' * len(batch))
+            found.update(row[0] for row in conn.execute(
+                f'SELECT {column} FROM expenses WHERE {column} IN ({placeholders})', batch
+            ))
+        return found
+
+    def close(self):
+        """Ferme les connexions ouvertes sur les archives"""
+        for conn in self._connections.values():
+            conn.close()
+        self._connections = {}
@@ -0,0 +1,356 @@
+"""
+Requêtes déclaratives pour l'application D-Tracker
+
+Une QuerySpec décrit le résultat attendu par une page : filtres (dates,
+catégories, montants, texte), dimensions de regroupement et mesures.
+compile_query la traduit en une seule requête SQL paramétrée :
+
+- sur les agrégats quotidiens daily_category_totals (servis par le moteur
+  d'analyse) quand les filtres et les mesures le permettent ;
+- sur les dépenses sinon (filtre de montant ou de texte, minimum, maximum),
+  archives annuelles comprises.
+
+Le texte SQL ne dépend que de la forme de la spec (dimensions, mesures,
+filtres renseignés, nombre de catégories...) : il est compilé une fois par
+forme et gardé dans un cache LRU, et sqlite3 réutilise l'instruction
+préparée correspondante. Les valeurs sont toujours passées en paramètres.
+"""
+
+import functools
+import re
+from collections import namedtuple
+
+import pandas as pd
+
+from config.settings import QUERY_STATEMENT_CACHE_SIZE
+from storage.encoding import date_sql, period_key, period_sql, to_cents, to_day
+from storage.migrations import FULLTEXT_TABLE, PERIOD_COLUMNS
+from storage.partitions import union_source
+
+QuerySpec = namedtuple(
+    'QuerySpec',
+    ['group_by', 'measures', 'start_date', 'end_date', 'categories',
+     'min_amount', 'max_amount', 'text', 'order_by', 'limit'],
+    defaults=((), ('sum',), None, None, None, None, None, None, (), None)
+)
+QuerySpec.__doc__ = """
+Description d'une requête d'agrégation
+
+Args:
+    group_by (tuple): Dimensions parmi 'day', 'week', 'month', 'quarter', 'year', 'category'
+    measures (tuple): Mesures parmi 'sum', 'count', 'avg', 'min', 'max'
+    start_date (str, optional): Date de début 'YYYY-MM-DD'
+    end_date (str, optional): Date de fin 'YYYY-MM-DD'
+    categories (list, optional): Noms des catégories à inclure (None : toutes)
+    min_amount (float, optional): Montant minimal en euros
+    max_amount (float, optional): Montant maximal en euros
+    text (str, optional): Mots cherchés dans la description (comme search_expenses)
+    order_by (tuple): Colonnes du résultat, préfixées par '-' pour un ordre décroissant
+        (par défaut : ordre croissant des dimensions)
+    limit (int, optional): Nombre maximal de lignes
+"""
+
+# Colonne du résultat par dimension (la catégorie est ensuite nommée : category et color)
+DIMENSIONS = {
+    'day': 'date',
+    'week': 'week',
+    'month': 'month',
+    'quarter': 'quarter',
+    'year': 'year',
+    'category': 'category'
+}
+
+# Colonne du résultat par mesure
+MEASURES = {
+    'sum': 'total',
+    'count': 'count',
+    'avg': 'average',
+    'min': 'min',
+    'max': 'max'
+}
+
+# Mesures calculables depuis les agrégats quotidiens (total et nombre par jour et catégorie)
+ROLLUP_MEASURES = {'sum', 'count', 'avg'}
+
+# Expressions des mesures par source
+MEASURE_SQL = {
+    'rollup': {
+        'sum': 'SUM(total_cents) / 100.0',
+        'count': 'CAST(SUM(count) AS BIGINT)',
+        'avg': 'SUM(total_cents) / 100.0 / NULLIF(SUM(count), 0)'
+    },
+    'expenses': {
+        'sum': 'SUM(e.amount_cents) / 100.0',
+        'count': 'COUNT(*)',
+        'avg': 'AVG(e.amount_cents) / 100.0',
+        'min': 'MIN(e.amount_cents) / 100.0',
+        'max': 'MAX(e.amount_cents) / 100.0'
+    }
+}
+
+# Fusion des résultats partiels de plusieurs groupes d'archives (moyenne recalculée)
+MERGE_FUNCTIONS = {'total': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+
+
+def search_terms(text):
+    """Mots d'un texte saisi (la syntaxe FTS5 n'est pas interprétée)"""
+    return re.findall(r'\w+', text.lower()) if text else []
+
+
+def validate_spec(spec):
+    """
+    Vérifie les dimensions, mesures et colonnes de tri d'une spec
+
+    Raises:
+        ValueError: Si un nom est inconnu ou répété, ou si aucune mesure n'est demandée
+    """
+    for kind, names, known in (('Dimension', spec.group_by, DIMENSIONS),
+                               ('Mesure', spec.measures, MEASURES)):
+        unknown = [name for name in names if name not in known]
+        if unknown:
+            raise ValueError(f"{kind} inconnue : {unknown[0]} ({', '.join(known)})")
+        if len(set(names)) != len(names):
+            raise ValueError(f"{kind} répétée : {', '.join(names)}")
+    if not spec.measures:
+        raise ValueError("Au moins une mesure est nécessaire")
+
+    columns = result_columns(spec)
+    for name in spec.order_by:
+        if name.lstrip('-') not in columns:
+            raise ValueError(f"Tri sur une colonne absente du résultat : {name}")
+    if spec.limit is not None and spec.limit < 1:
+        raise ValueError(f"Limite invalide : {spec.limit}")
+
+
+def result_columns(spec):
+    """Colonnes du résultat, dans l'ordre : dimensions puis mesures"""
+    columns = []
+    for dimension in spec.group_by:
+        columns.extend(['category', 'color'] if dimension == 'category' else [DIMENSIONS[dimension]])
+    return columns + [MEASURES[measure] for measure in spec.measures]
+
+
+def uses_rollup(spec):
+    """Indique si la spec peut être servie par les agrégats quotidiens"""
+    return (
+        spec.min_amount is None and spec.max_amount is None and not search_terms(spec.text)
+        and set(spec.measures) <= ROLLUP_MEASURES
+    )
+
+
+def sorted_in_frame(spec):
+    """Indique si le tri (et la limite) sont appliqués au DataFrame plutôt qu'en SQL"""
+    # Les noms de catégorie viennent du registre : ils ne sont pas triables en SQL
+    return any(name.lstrip('-') in ('category', 'color') for name in spec.order_by)
+
+
+def partial_spec(spec):
+    """
+    Spec des résultats partiels à fusionner (lecture en plusieurs groupes d'archives)
+
+    La moyenne est remplacée par la somme et le nombre ; tri et limite sont
+    appliqués après la fusion.
+    """
+    measures = [measure for measure in spec.measures if measure != 'avg']
+    if 'avg' in spec.measures:
+        measures += [measure for measure in ('sum', 'count') if measure not in measures]
+    return spec._replace(measures=tuple(measures), order_by=(), limit=None)
+
+
+def merge_partials(frames, spec):
+    """
+    Fusionne les résultats partiels de partial_spec(spec)
+
+    Returns:
+        DataFrame: Résultat de la spec (non trié)
+    """
+    frame = pd.concat(frames, ignore_index=True)
+    keys = [DIMENSIONS[dimension] if dimension != 'category' else 'category_id'
+            for dimension in spec.group_by]
+    functions = {column: MERGE_FUNCTIONS[column] for column in frame.columns if column not in keys}
+    if keys:
+        frame = frame.groupby(keys, dropna=False, sort=False).agg(functions).reset_index()
+    else:
+        frame = pd.DataFrame([{column: frame[column].agg(function) for column, function in functions.items()}])
+    if 'avg' in spec.measures:
+        frame['average'] = frame['total'] / frame['count'].where(frame['count'] > 0)
+    return frame
+
+
+def finish_frame(frame, spec, sort=False):
+    """
+    Colonnes du résultat dans l'ordre de la spec, trié et limité si demandé
+
+    Args:
+        frame (DataFrame): Résultat (catégories déjà nommées)
+        spec (QuerySpec): Spec exécutée
+        sort (bool): Trie et limite le DataFrame (tri impossible en SQL)
+    """
+    frame = frame[result_columns(spec)]
+    if sort:
+        order = list(spec.order_by) or [DIMENSIONS[dimension] for dimension in spec.group_by]
+        if order:
+            frame = frame.sort_values(
+                [name.lstrip('-') for name in order],
+                ascending=[not name.startswith('-') for name in order],
+                kind='stable'
+            )
+        if spec.limit is not None:
+            frame = frame.head(spec.limit)
+    return frame.reset_index(drop=True)
+
+
+def compile_query(spec, category_ids=None, date_expr=date_sql('day'), schemas=('main',), fulltext=False):
+    """
+    Traduit une spec en requête SQL paramétrée
+
+    Args:
+        spec (QuerySpec): Spec validée (validate_spec)
+        category_ids (list, optional): Identifiants des catégories filtrées (None : toutes)
+        date_expr (str): Date 'YYYY-MM-DD' des agrégats regroupés par jour (moteur d'analyse)
+        schemas (tuple): Schémas des dépenses interrogés ensemble ('main' et archives)
+        fulltext (bool): Filtre de texte par l'index FTS5 plutôt que par LIKE
+
+    Returns:
+        tuple: (requête, paramètres) ; la catégorie est retournée en category_id
+    """
+    terms = search_terms(spec.text)
+    fulltext = fulltext and bool(terms)
+    rollup = uses_rollup(spec)
+    # Trie et limite en SQL, sauf si le résultat est trié après coup
+    ordered = not sorted_in_frame(spec)
+    query = _compile(
+        rollup,
+        tuple(spec.group_by),
+        tuple(spec.measures),
+        bool(spec.start_date),
+        bool(spec.end_date),
+        None if category_ids is None else len(category_ids),
+        spec.min_amount is not None,
+        spec.max_amount is not None,
+        len(terms),
+        fulltext,
+        tuple(spec.order_by) if ordered else None,
+        ordered and spec.limit is not None,
+        date_expr if rollup else None,
+        None if rollup else tuple(schemas)
+    )
+
+    # Paramètres dans l'ordre des conditions de _compile
+    params = []
+    if spec.start_date:
+        params.append(to_day(spec.start_date))
+    if spec.end_date:
+        params.append(to_day(spec.end_date))
+    if rollup:
+        for dimension in spec.group_by:
+            if dimension in PERIOD_COLUMNS:
+                if spec.start_date:
+                    params.append(period_key(dimension, spec.start_date))
+                if spec.end_date:
+                    params.append(period_key(dimension, spec.end_date))
+    if category_ids:
+        params.extend(category_ids)
+    if spec.min_amount is not None:
+        params.append(to_cents(spec.min_amount))
+    if spec.max_amount is not None:
+        params.append(to_cents(spec.max_amount))
+    if terms:
+        if fulltext:
+            params.extend([' '.join(f'"{term}"*' for term in terms)] * len(schemas))
+        else:
+            params.extend('%' + term.replace('_', '\\_') + '%' for term in terms)
+    if ordered and spec.limit is not None:
+        params.append(spec.limit)
+    return query, params
+
+
+@functools.lru_cache(maxsize=QUERY_STATEMENT_CACHE_SIZE)
+def _compile(rollup, group_by, measures, start, end, category_count, min_amount, max_amount,
+             term_count, fulltext, order_by, limit, date_expr, schemas):
+    """Texte SQL d'une forme de spec (les arguments ne contiennent aucune valeur filtrée)"""
+    if rollup:
+        source = 'daily_category_totals'
+        day = 'day'
+    else:
+        source = f'{union_source(schemas)} e'
+        day = 'e.day'
+
+    # Dimensions : (expression sélectionnée, clé de regroupement)
+    selected = []
+    keys = []
+    for dimension in group_by:
+        if dimension == 'day':
+            selected.append(f'{date_expr if rollup else date_sql(day)} as date')
+            keys.append(day)
+        elif dimension == 'category':
+            selected.append('category_id' if rollup else 'e.category_id as category_id')
+            keys.append('category_id' if rollup else 'e.category_id')
+        elif rollup:
+            # Colonne de période générée et indexée
+            selected.append(f'{PERIOD_COLUMNS[dimension]} as {dimension}')
+            keys.append(PERIOD_COLUMNS[dimension])
+        else:
+            selected.append(f'{period_sql(dimension, day)} as {dimension}')
+            keys.append(dimension)
+    expressions = MEASURE_SQL['rollup' if rollup else 'expenses']
+    selected.extend(f'{expressions[measure]} as {MEASURES[measure]}' for measure in measures)
+
+    conditions = []
+    if start:
+        conditions.append(f'{day} >= ?')
+    if end:
+        conditions.append(f'{day} <= ?')
+    if rollup:
+        # Bornes sur la colonne de période : parcours d'une plage de son index
+        for dimension in group_by:
+            if dimension in PERIOD_COLUMNS:
+                if start:
+                    conditions.append(f'{PERIOD_COLUMNS[dimension]} >= ?')
+                if end:
+                    conditions.append(f'{PERIOD_COLUMNS[dimension]} <= ?')
+    if category_count is not None:
+        column = 'category_id' if rollup else 'e.category_id'
+        conditions.append(f"{column} IN ({', '.join('?' * category_count)})" if category_count else 'FALSE')
+    if min_amount:
+        conditions.append('e.amount_cents >= ?')
+    if max_amount:
+        conditions.append('e.amount_cents <= ?')
+    if term_count and fulltext:
+        # Un index plein texte par base ; les identifiants sont uniques entre les bases
+        matches = ' UNION ALL '.join(
+            f'SELECT rowid FROM {schema}.{FULLTEXT_TABLE} WHERE {FULLTEXT_TABLE} MATCH ?'
+            for schema in schemas
+        )
+        conditions.append(f'e.id IN ({matches})')
+    else:
+        conditions.extend(["e.description LIKE ? ESCAPE '\\'"] * term_count)
+
+    query = f"SELECT {', '.join(selected)} FROM {source} WHERE {' AND '.join(conditions) or 'TRUE'}"
+    if keys:
+        query += f" GROUP BY {', '.join(keys)}"
+
+    if order_by is not None:
+        columns = {DIMENSIONS[dimension]: key for dimension, key in zip(group_by, keys)}
+        order = [
+            f"{columns.get(name.lstrip('-'), name.lstrip('-'))}{' DESC' if name.startswith('-') else ''}"
+            for name in order_by
+        ]
+        # Clés de regroupement en complément : ordre déterministe
+        order += [key for key in keys if key not in {item.split(' ')[0] for item in order}]
+        if order:
+            query += f" ORDER BY {', '.join(order)}"
+        if limit:
+            query += ' LIMIT ?'
+    return query
+
+
+def statement_cache_info():
+    """
+    Statistiques du cache des requêtes compilées
+
+    Returns:
+        dict: hits, misses, size, maxsize
+    """
+    info = _compile.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'maxsize': info.maxsize}
@@ -0,0 +1,145 @@
+"""
+Séries d'évolution des dépenses pour l'application D-Tracker
+
+Une série couvre chaque période (jour, semaine ou mois) d'un intervalle,
+y compris celles sans dépense (total nul) : un calendrier est généré par
+une CTE récursive puis joint aux agrégats quotidiens. Les moyennes mobiles,
+le cumul et l'écart avec la période précédente (LAG) sont calculés en SQL
+par des fonctions de fenêtre : Python ne reçoit que les lignes affichées.
+
+Les périodes sont complètes (semaines ISO du lundi au dimanche, mois
+calendaires) et la requête lit aussi les périodes précédant le début de
+l'intervalle nécessaires aux fenêtres : la première moyenne mobile et le
+premier écart affichés portent sur des périodes entières.
+
+Les séries sont lues dans la base SQLite principale quel que soit
+ANALYTICS_BACKEND : la requête joint categories et utilise les fonctions de
+date de SQLite, que les copies du moteur d'analyse n'ont pas.
+"""
+
+from config.settings import SERIES_MOVING_AVERAGES
+from storage.encoding import date_sql, period_sql, period_start_day
+from storage.migrations import PERIOD_COLUMNS
+
+
+def moving_average_columns(period):
+    """Colonnes des moyennes mobiles d'une série ('ma_7', 'ma_30'...)"""
+    if period not in SERIES_MOVING_AVERAGES:
+        raise ValueError(f"Période de série inconnue : {period} ({', '.join(SERIES_MOVING_AVERAGES)})")
+    return [f'ma_{window}' for window in SERIES_MOVING_AVERAGES[period]]
+
+
+def series_query(period, start_date, end_date, category_ids=None, by_category=False):
+    """
+    Construit la requête d'une série d'évolution
+
+    Args:
+        period (str): 'day', 'week' ou 'month'
+        start_date (str): Date de début 'YYYY-MM-DD'
+        end_date (str): Date de fin 'YYYY-MM-DD'
+        category_ids (list, optional): Catégories incluses (None : toutes)
+        by_category (bool): Une série par catégorie (colonne category_id)
+
+    Returns:
+        tuple: (requête, paramètres) ; colonnes : date, week ou month, [category_id,]
+            total, moyennes mobiles, cumulative, previous, change, change_pct
+
+    Raises:
+        ValueError: Si la période n'a pas de série
+    """
+    averages = moving_average_columns(period)
+    windows = SERIES_MOVING_AVERAGES[period]
+    # Périodes lues avant le début : fenêtre la plus large, et au moins une pour LAG
+    warmup = max(max(windows) - 1, 1)
+    first_day = period_start_day(period, start_date, -warmup)
+    shown_day = period_start_day(period, start_date)
+    last_day = period_start_day(period, end_date, 1) - 1
+
+    if period == 'day':
+        period_column = 'day'
+        calendar_period = 'day'
+        label = f'{date_sql("first_day")} as date'
+    else:
+        period_column = PERIOD_COLUMNS[period]
+        calendar_period = period_sql(period, 'day')
+        label = f'period as {period}'
+
+    params = [first_day, last_day]
+    ctes = ['''
+        calendar(day) AS (
+            SELECT ?
+            UNION ALL
+            SELECT day + 1 FROM calendar WHERE day < ?
+        )''', f'''
+        periods AS (
+            SELECT {calendar_period} AS period, MIN(day) AS first_day
+            FROM calendar
+            GROUP BY 1
+        )''']
+
+    category_filter = ''
+    if category_ids is not None:
+        category_filter = (
+            f"AND category_id IN ({', '.join('?' * len(category_ids))})" if category_ids else 'AND FALSE'
+        )
+
+    if by_category:
+        # Une ligne par période et par catégorie, même sans dépense
+        ctes.append(f'''
+        members AS (
+            SELECT id AS category_id FROM categories WHERE TRUE {category_filter}
+        )''')
+        params.extend(category_ids or [])
+        member_join = 'CROSS JOIN members m'
+        total_join = 'AND t.category_id = m.category_id'
+        category_select = 'm.category_id,'
+        category_group = ', category_id'
+        partition = 'PARTITION BY category_id'
+    else:
+        member_join = total_join = category_select = category_group = partition = ''
+
+    ctes.append(f'''
+        totals AS (
+            SELECT {period_column} AS period{', category_id' if by_category else ''},
+                   SUM(total_cents) AS total_cents
+            FROM daily_category_totals
+            WHERE day >= ? AND day <= ? {category_filter}
+            GROUP BY {period_column}{category_group}
+        )''')
+    params.extend([first_day, last_day])
+    params.extend(category_ids or [])
+
+    ctes.append(f'''
+        series AS (
+            SELECT p.period, p.first_day, {category_select} IFNULL(t.total_cents, 0) AS total_cents
+            FROM periods p
+            {member_join}
+            LEFT JOIN totals t ON t.period = p.period {total_join}
+        )''')
+
+    moving_averages = ',\n'.join(
+        f'AVG(total_cents) OVER (w ROWS BETWEEN {window - 1} PRECEDING AND CURRENT ROW) / 100.0 AS {column}'
+        for window, column in zip(windows, averages)
+    )
+    query = f'''
+        WITH RECURSIVE {','.join(ctes)}
+        SELECT {label}, {'category_id, ' if by_category else ''}total, {', '.join(averages)},
+               cumulative, previous, change, change_pct
+        FROM (
+            SELECT period, first_day, {'category_id, ' if by_category else ''}
+                   total_cents / 100.0 AS total,
+                   {moving_averages},
+                   SUM(CASE WHEN first_day >= ? THEN total_cents ELSE 0 END)
+                       OVER (w ROWS UNBOUNDED PRECEDING) / 100.0 AS cumulative,
+                   LAG(total_cents) OVER w / 100.0 AS previous,
+                   (total_cents - LAG(total_cents) OVER w) / 100.0 AS change,
+                   (total_cents - LAG(total_cents) OVER w) * 1.0
+                       / NULLIF(LAG(total_cents) OVER w, 0) AS change_pct
+            FROM series
+            WINDOW w AS ({partition} ORDER BY first_day)
+        )
+        WHERE first_day >= ?
+        ORDER BY first_day{', category_id' if by_category else ''}
+    '''
+    params.extend([shown_day, shown_day])
+    return query, params
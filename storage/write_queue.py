@@ -0,0 +1,180 @@
+"""
+File d'écriture à thread unique pour l'application D-Tracker
+
+Quand plusieurs sessions ajoutent des dépenses en même temps, chaque ajout
+prend le verrou d'écriture et valide sa propre transaction. La file
+confie toutes ces écritures à un seul thread qui les regroupe par lots
+dans une transaction commune (validation groupée) : le nombre de
+validations ne croît plus avec le nombre d'ajouts, et les sessions ne se
+disputent plus le verrou. Chaque demande retourne un Future.
+"""
+
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from config.settings import WRITE_QUEUE_MAX_BATCH, WRITE_QUEUE_MAX_DELAY_MS
+
+# Marque d'arrêt du thread d'écriture
+_STOP = object()
+
+
+class WriteQueue:
+    """Thread d'écriture unique validant les demandes par lots"""
+
+    def __init__(self, connections, max_batch=WRITE_QUEUE_MAX_BATCH,
+                 max_delay_ms=WRITE_QUEUE_MAX_DELAY_MS):
+        self.connections = connections
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.batches = 0
+        self.writes = 0
+        self.largest_batch = 0
+
+    def submit(self, fn, *args):
+        """
+        Demande l'exécution d'une écriture par le thread d'écriture
+
+        Args:
+            fn (callable): Fonction appelée avec (connexion, *args) dans la
+                transaction du lot ; sa valeur de retour devient le résultat
+            *args: Arguments de la fonction
+
+        Returns:
+            Future: Résolu après la validation du lot (ou avec l'exception levée)
+        """
+        future = Future()
+        self._ensure_started()
+        self._queue.put((future, fn, args))
+        return future
+
+    def _ensure_started(self):
+        """Démarre le thread d'écriture au premier envoi"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="d-tracker-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        """Boucle du thread d'écriture : collecte un lot puis le valide"""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+
+            # Attente bornée d'autres demandes à regrouper avec la première
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._commit(batch)
+
+    def _commit(self, batch):
+        """Exécute un lot dans une transaction, chaque demande dans son point de sauvegarde"""
+        outcomes = []
+        try:
+            with self.connections.transaction() as conn:
+                for future, fn, args in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    # Une demande en erreur est annulée seule, sans faire échouer le lot
+                    conn.execute('SAVEPOINT write_queue_item')
+                    try:
+                        result = fn(conn, *args)
+                    except Exception as e:
+                        conn.execute('ROLLBACK TO write_queue_item')
+                        conn.execute('RELEASE write_queue_item')
+                        outcomes.append((future, e, False))
+                    else:
+                        conn.execute('RELEASE write_queue_item')
+                        outcomes.append((future, result, True))
+        except Exception as e:
+            # Échec de la transaction (verrou, validation) : aucune demande n'est écrite
+            for future, _, _ in batch:
+                if future.running():
+                    future.set_exception(e)
+            return
+
+        for future, value, succeeded in outcomes:
+            if succeeded:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+        with self._lock:
+            self.batches += 1
+            self.writes += len(outcomes)
+            self.largest_batch = max(self.largest_batch, len(batch))
+
+    def stats(self):
+        """
+        Compteurs de la file
+
+        Returns:
+            dict: batches, writes, largest_batch, average_batch, pending
+        """
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'writes': self.writes,
+                'largest_batch': self.largest_batch,
+                'average_batch': self.writes / self.batches if self.batches else 0,
+                'pending': self._queue.qsize()
+            }
+
+    def close(self, timeout=None):
+        """Traite les demandes en attente puis arrête le thread d'écriture"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_write_queue(connections):
+    """
+    Retourne la file d'écriture partagée pour un gestionnaire de connexions
+
+    Args:
+        connections (ConnectionManager): Gestionnaire de la base
+
+    Returns:
+        WriteQueue: File commune à tout le processus
+    """
+    with _queues_lock:
+        write_queue = _queues.get(connections.db_path)
+        if write_queue is None:
+            write_queue = WriteQueue(connections)
+            _queues[connections.db_path] = write_queue
+        return write_queue
+
+
+@atexit.register
+def _close_queues():
+    """Valide les écritures en attente à l'arrêt du processus"""
+    with _queues_lock:
+        queues = list(_queues.values())
+    for write_queue in queues:
+        write_queue.close(timeout=5)